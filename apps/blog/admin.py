@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from . import threads
 from .models import BlogPost, Tag, BlogImage, Comment
 from django.utils import timezone
 
@@ -196,26 +197,29 @@ class CommentAdmin(admin.ModelAdmin):
 
     is_reply.short_description = "Reply"
 
-    def approve_comments(self, request, queryset):
+    def _moderate(self, request, queryset, status):
+        # update() skips the signals that invalidate the cached threads
+        post_ids = set(queryset.values_list("post_id", flat=True))
         updated = queryset.update(
-            status="approved", moderated_by=request.user, moderated_at=timezone.now()
+            status=status, moderated_by=request.user, moderated_at=timezone.now()
         )
+        threads.invalidate(*post_ids)
+        return updated
+
+    def approve_comments(self, request, queryset):
+        updated = self._moderate(request, queryset, "approved")
         self.message_user(request, f"{updated} comments were approved.")
 
     approve_comments.short_description = "Approve selected comments"
 
-    def reject_comments(self, request, obj):
-        updated = queryset.update(
-            status="rejected", moderated_by=request.user, moderated_at=timezone.now()
-        )
+    def reject_comments(self, request, queryset):
+        updated = self._moderate(request, queryset, "rejected")
         self.message_user(request, f"{updated} comments were rejected.")
 
     reject_comments.short_description = "Reject selected comments"
 
     def mark_as_spam(self, request, queryset):
-        updated = queryset.update(
-            status="spam", moderated_by=request.user, moderated_at=timezone.now()
-        )
+        updated = self._moderate(request, queryset, "spam")
         self.message_user(request, f"{updated} comments were marked as spam.")
 
     mark_as_spam.short_description = "Mark selected comments as spam"
@@ -297,6 +297,16 @@ class CommentForm(forms.ModelForm):
             raise forms.ValidationError("Comment must be less than 2000 characters.")
         return content
 
+    def clean_parent(self):
+        parent = self.cleaned_data.get("parent")
+        if parent is None:
+            return parent
+        if self.post and parent.post_id != self.post.pk:
+            raise forms.ValidationError("You can only reply to comments on this post.")
+        if parent.depth >= Comment.MAX_DEPTH:
+            raise forms.ValidationError("This conversation can't go any deeper.")
+        return parent
+
     def clean_author_name(self):
         # Skip validation for authenticated users since we set the name automatically
         if self.user and self.user.is_authenticated:
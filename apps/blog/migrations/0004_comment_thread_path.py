@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+PATH_SEPARATOR = "."
+PATH_DIGITS = 10
+
+
+def backfill_paths(apps, schema_editor):
+    Comment = apps.get_model("blog", "Comment")
+    parents = dict(Comment.objects.values_list("pk", "parent_id"))
+    positions = {}
+
+    def position(pk):
+        if pk not in positions:
+            segment = f"{pk:0{PATH_DIGITS}d}"
+            parent_id = parents.get(pk)
+            if parent_id is None or parent_id not in parents:
+                positions[pk] = (segment, 0)
+            else:
+                parent_path, parent_depth = position(parent_id)
+                positions[pk] = (
+                    f"{parent_path}{PATH_SEPARATOR}{segment}",
+                    parent_depth + 1,
+                )
+        return positions[pk]
+
+    comments = list(Comment.objects.only("pk"))
+    for comment in comments:
+        comment.path, comment.depth = position(comment.pk)
+    Comment.objects.bulk_update(comments, ["path", "depth"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_comment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'status', 'path'], name='blog_commen_post_id_5ba354_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,14 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DEFERRED
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils.text import slugify
 from django.utils import timezone
 from django.urls import reverse
-import markdown
 from django.utils.html import strip_tags
 from django.conf import settings
-from snowsune.models import SiteSetting
+from snowsune.markdown_render import render as render_markdown
+from snowsune.site_settings import get_setting
 
 User = get_user_model()
 
@@ -73,6 +74,16 @@ class BlogPost(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save() can tell when a post gets
+        # published without fetching the row again
+        status = dict(zip(field_names, values)).get("status", DEFERRED)
+        if status is not DEFERRED:
+            instance._loaded_status = status
+        return instance
+
     def save(self, *args, **kwargs):
         # Generate slug if not provided
         if not self.slug:
@@ -80,9 +91,7 @@ class BlogPost(models.Model):
 
         # Generate HTML content from markdown
         if self.content:
-            self.content_html = markdown.markdown(
-                self.content, extensions=["extra", "codehilite", "toc"]
-            )
+            self.content_html = render_markdown(self.content)
             # Generate excerpt from first paragraph
             if not self.excerpt:
                 html_text = strip_tags(self.content_html)
@@ -92,9 +101,14 @@ class BlogPost(models.Model):
                     self.excerpt = html_text
 
         # Check if status is changing to published
-        was_published = (
-            self.pk and BlogPost.objects.get(pk=self.pk).status == "published"
-        )
+        if hasattr(self, "_loaded_status"):
+            was_published = self._loaded_status == "published"
+        else:
+            was_published = (
+                self.pk
+                and not self._state.adding
+                and BlogPost.objects.filter(pk=self.pk, status="published").exists()
+            )
         is_now_published = self.status == "published"
 
         # Set published_at when status changes to published
@@ -102,6 +116,7 @@ class BlogPost(models.Model):
             self.published_at = timezone.now()
 
         super().save(*args, **kwargs)
+        self._loaded_status = self.status
 
         # Send Discord webhook notification when post is newly published
         if is_now_published and not was_published:
@@ -111,11 +126,7 @@ class BlogPost(models.Model):
         """Send Discord webhook notification for newly published blog post"""
         try:
             # Get webhook URL from site settings
-            webhook_setting = SiteSetting.objects.filter(key="blogpost_webhook").first()
-            if not webhook_setting or not webhook_setting.value:
-                return  # No webhook configured
-
-            webhook_url = webhook_setting.value.strip()
+            webhook_url = (get_setting("blogpost_webhook") or "").strip()
             if not webhook_url:
                 return
 
@@ -251,11 +262,23 @@ class Comment(models.Model):
         "self", on_delete=models.CASCADE, null=True, blank=True, related_name="replies"
     )
 
+    # Position in the thread: ancestors' ids and our own, zero padded and
+    # joined by PATH_SEPARATOR, so ordering by path walks the thread in order
+    # (see apps/blog/threads.py)
+    path = models.CharField(max_length=255, blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    PATH_SEPARATOR = "."
+    PATH_DIGITS = 10
+    # Deepest reply allowed, keeps the path within its max_length
+    MAX_DEPTH = 16
+
     class Meta:
         ordering = ["created_at"]
         indexes = [
             models.Index(fields=["post", "status", "created_at"]),
             models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["post", "status", "path"]),
         ]
 
     def __str__(self):
@@ -271,6 +294,9 @@ class Comment(models.Model):
 
     @property
     def has_replies(self):
+        # Comments from threads.get_thread() already know their replies
+        if hasattr(self, "replies_list"):
+            return bool(self.replies_list)
         return self.replies.exists()
 
     def get_display_name(self):
@@ -279,6 +305,24 @@ class Comment(models.Model):
             return self.user.username
         return self.author_name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save() can spot approvals without
+        # fetching the row again
+        status = dict(zip(field_names, values)).get("status", DEFERRED)
+        if status is not DEFERRED:
+            instance._loaded_status = status
+        return instance
+
+    def _thread_position(self):
+        """(path, depth) for this saved comment."""
+        segment = f"{self.pk:0{self.PATH_DIGITS}d}"
+        if not self.parent_id:
+            return segment, 0
+        parent = self.parent
+        return f"{parent.path}{self.PATH_SEPARATOR}{segment}", parent.depth + 1
+
     def save(self, *args, **kwargs):
         # Check if this is a new comment
         is_new_comment = self.pk is None
@@ -286,13 +330,24 @@ class Comment(models.Model):
         # Get the previous status if this is an update
         previous_status = None
         if not is_new_comment:
-            try:
-                previous_instance = Comment.objects.get(pk=self.pk)
-                previous_status = previous_instance.status
-            except Comment.DoesNotExist:
-                pass
-
-        super().save(*args, **kwargs)
+            if hasattr(self, "_loaded_status"):
+                previous_status = self._loaded_status
+            else:
+                previous_status = (
+                    Comment.objects.filter(pk=self.pk)
+                    .values_list("status", flat=True)
+                    .first()
+                )
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # The path needs our id, so it's filled in right after the insert
+            if not self.path:
+                self.path, self.depth = self._thread_position()
+                Comment.objects.filter(pk=self.pk).update(
+                    path=self.path, depth=self.depth
+                )
+        self._loaded_status = self.status
 
         # Send appropriate webhook notification for new comments
         if is_new_comment:
@@ -316,13 +371,7 @@ class Comment(models.Model):
         """Send webhook notification to moderator webhook for comments needing moderation"""
         try:
             # Get webhook URL from site settings
-            webhook_setting = SiteSetting.objects.filter(
-                key="moderator_webhook"
-            ).first()
-            if not webhook_setting or not webhook_setting.value:
-                return  # No webhook configured
-
-            webhook_url = webhook_setting.value.strip()
+            webhook_url = (get_setting("moderator_webhook") or "").strip()
             if not webhook_url:
                 return
 
@@ -347,11 +396,7 @@ class Comment(models.Model):
         """Send webhook notification to blogpost webhook for approved comments from authenticated users"""
         try:
             # Get webhook URL from site settings
-            webhook_setting = SiteSetting.objects.filter(key="blogpost_webhook").first()
-            if not webhook_setting or not webhook_setting.value:
-                return  # No webhook configured
-
-            webhook_url = webhook_setting.value.strip()
+            webhook_url = (get_setting("blogpost_webhook") or "").strip()
             if not webhook_url:
                 return
 
@@ -1,4 +1,5 @@
-from django.test import TestCase, Client, RequestFactory
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
@@ -6,9 +7,12 @@ from django.contrib.messages.storage.fallback import FallbackStorage
 from django.contrib.sessions.middleware import SessionMiddleware
 from django.contrib.messages.middleware import MessageMiddleware
 from django.http import HttpRequest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from unittest.mock import patch, MagicMock
 import json
 
+from . import threads
 from .models import BlogPost, Tag, Comment
 from .forms import BlogPostForm, CommentForm
 from .views import submit_comment, moderate_comment
@@ -152,6 +156,28 @@ class BlogModelsTest(TestCase):
         self.assertEqual(reply.parent, parent_comment)
         self.assertTrue(parent_comment.has_replies)
 
+    @patch.object(BlogPost, "send_discord_notification")
+    def test_publish_notification_sent_once(self, mock_notify):
+        """Only the draft -> published transition notifies"""
+        post = BlogPost.objects.create(
+            title="Draft", content="Words.", author=self.user, status="draft"
+        )
+        mock_notify.assert_not_called()
+
+        post.status = "published"
+        post.save()
+        post.save()
+        mock_notify.assert_called_once()
+
+        # A fresh copy knows its stored status without fetching the row again
+        loaded = BlogPost.objects.get(pk=post.pk)
+        with CaptureQueriesContext(connection) as queries:
+            loaded.save(update_fields=["title"])
+        self.assertFalse(
+            [q for q in queries if q["sql"].startswith('SELECT "blog_blogpost"')]
+        )
+        mock_notify.assert_called_once()
+
     @patch("apps.commorganizer.utils.send_discord_webhook")
     def test_comment_webhook_on_creation(self, mock_webhook):
         """Test that moderator webhook is sent when an anonymous comment is created"""
@@ -1079,3 +1105,181 @@ class BlogPerformanceTest(TestCase):
             # Verify comment was moderated
             comment.refresh_from_db()
             self.assertEqual(comment.status, "approved")
+
+
+class CommentThreadTest(TestCase):
+    """Test cases for the materialized-path comment threads"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.post = BlogPost.objects.create(
+            title="Thread Post",
+            content="Talk amongst yourselves.",
+            author=self.user,
+            status="published",
+        )
+
+    def comment(self, name, parent=None, status="approved"):
+        return Comment.objects.create(
+            post=self.post,
+            parent=parent,
+            author_name=name,
+            content=f"{name} says hi",
+            status=status,
+        )
+
+    def test_path_and_depth(self):
+        """Replies extend their parent's path"""
+        root = self.comment("root")
+        reply = self.comment("reply", parent=root)
+        nested = self.comment("nested", parent=reply)
+
+        self.assertEqual(root.path, f"{root.pk:010d}")
+        self.assertEqual(nested.path, f"{reply.path}.{nested.pk:010d}")
+        self.assertEqual((root.depth, reply.depth, nested.depth), (0, 1, 2))
+        nested.refresh_from_db()
+        self.assertEqual(nested.depth, 2)
+
+    def test_thread_order_and_hidden_branches(self):
+        """One query builds the tree; unapproved branches are left out"""
+        first = self.comment("first")
+        second = self.comment("second")
+        rejected = self.comment("rejected", parent=first, status="rejected")
+        self.comment("under rejected", parent=rejected)
+        reply = self.comment("reply", parent=first)
+        nested = self.comment("nested", parent=reply)
+        late = self.comment("late", parent=first)
+
+        with self.assertNumQueries(1):
+            roots = threads.get_thread(self.post)
+            self.assertEqual(roots, [first, second])
+            self.assertEqual(roots[0].replies_list, [reply, nested, late])
+            self.assertTrue(roots[0].has_replies)
+            self.assertFalse(roots[1].has_replies)
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_thread_cache_invalidated_on_approval(self):
+        """The cached thread is dropped when a comment is approved"""
+        cache.clear()
+        self.comment("visible")
+        pending = self.comment("pending", status="pending")
+        threads.get_thread(self.post)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(threads.get_thread(self.post)), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.status = "approved"
+            pending.save()
+        self.assertEqual(len(threads.get_thread(self.post)), 2)
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_admin_bulk_approval_invalidates(self):
+        """The admin action uses update(), which skips the signals"""
+        from django.contrib.admin.sites import site
+        from .admin import CommentAdmin
+
+        cache.clear()
+        pending = self.comment("pending", status="pending")
+        self.assertEqual(threads.get_thread(self.post), [])
+
+        request = RequestFactory().post("/")
+        request.user = self.user
+        with patch.object(CommentAdmin, "message_user"):
+            CommentAdmin(Comment, site).approve_comments(
+                request, Comment.objects.filter(pk=pending.pk)
+            )
+        self.assertEqual(threads.get_thread(self.post), [pending])
+
+    def test_reply_depth_is_capped(self):
+        """A chain of replies stops at MAX_DEPTH, within the path's max_length"""
+        parent = self.comment("root")
+        for i in range(Comment.MAX_DEPTH):
+            parent = self.comment(f"reply {i}", parent=parent)
+        self.assertEqual(parent.depth, Comment.MAX_DEPTH)
+        self.assertLessEqual(
+            len(parent.path), Comment._meta.get_field("path").max_length
+        )
+
+        self.client.login(username="testuser", password="testpass123")
+        response = self.client.post(
+            reverse("blog:submit_comment", args=[self.post.id]),
+            {"content": "One level too deep.", "parent": parent.pk},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Comment.objects.filter(parent=parent).exists())
+
+        form = CommentForm(
+            {"content": "One level too deep.", "parent": parent.pk},
+            user=self.user,
+            post=self.post,
+        )
+        self.assertIn("parent", form.errors)
+        form = CommentForm(
+            {"content": "Deep enough, fine.", "parent": parent.parent_id},
+            user=self.user,
+            post=self.post,
+        )
+        self.assertTrue(form.is_valid())
+
+    def test_reply_to_comment_on_another_post_is_rejected(self):
+        other = BlogPost.objects.create(
+            title="Other", content="x", author=self.user, status="published"
+        )
+        elsewhere = Comment.objects.create(
+            post=other, author_name="x", content="Over there.", status="approved"
+        )
+        form = CommentForm(
+            {"content": "Replying across posts.", "parent": elsewhere.pk},
+            user=self.user,
+            post=self.post,
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("parent", form.errors)
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_thread_cache_holds_no_user_rows(self):
+        """Only display fields are cached, and renames show up right away"""
+        cache.clear()
+        Comment.objects.create(
+            post=self.post, user=self.user, content="Signed in.", status="approved"
+        )
+        threads.get_thread(self.post)
+
+        cached = cache.get(threads.THREAD_CACHE_KEY.format(post_id=self.post.pk))
+        self.assertEqual(cached[0]["username"], "testuser")
+        self.assertNotIn(self.user.password, repr(cached))
+
+        with self.assertNumQueries(0):
+            [comment] = threads.get_thread(self.post)
+            self.assertEqual(comment.get_display_name(), "testuser")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = "renamed"
+            self.user.save()
+        [comment] = threads.get_thread(self.post)
+        self.assertEqual(comment.get_display_name(), "renamed")
+
+    def test_detail_view_queries_do_not_grow_with_comments(self):
+        """A long thread costs the same number of queries as a short one"""
+        root = self.comment("root")
+        self.comment("reply", parent=root)
+        with CaptureQueriesContext(connection) as short:
+            self.client.get(self.post.get_absolute_url())
+
+        for i in range(10):
+            root = self.comment(f"root {i}")
+            self.comment(f"reply {i}", parent=root)
+        with CaptureQueriesContext(connection) as long:
+            response = self.client.get(self.post.get_absolute_url())
+
+        self.assertContains(response, "reply 9 says hi")
+        self.assertEqual(len(long), len(short))
@@ -0,0 +1,119 @@
+"""
+Comment threads for blog posts.
+
+Each Comment stores a materialized ``path`` (its ancestors' zero-padded ids
+plus its own, e.g. "0000000012.0000000031") and its ``depth``. Ordering by
+path gives a whole thread in reading order from one query, and the approved
+thread of a post is cached until one of its comments (or a commenter's
+username) changes. Only the fields the page shows are cached, never the
+users' rows, and the comments are rebuilt from them on every request.
+
+Usage:
+    from apps.blog import threads
+
+    roots = threads.get_thread(post)   # root comments, .replies_list set
+    threads.invalidate(post.pk)
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Comment, User
+
+THREAD_CACHE_KEY = "blog:comment_thread:{post_id}"
+THREAD_CACHE_TTL = 60 * 60 * 24  # Changes invalidate it, this is a backstop
+THREAD_FIELDS = (
+    "id",
+    "post_id",
+    "parent_id",
+    "user_id",
+    "author_name",
+    "content",
+    "status",
+    "path",
+    "depth",
+    "created_at",
+)
+
+
+def approved_comments(post_id):
+    """
+    Every approved comment of the post in thread order (one query), as dicts
+    of THREAD_FIELDS plus the commenter's ``username``.
+    """
+    return list(
+        Comment.objects.filter(post_id=post_id, status="approved")
+        .order_by("path")
+        .values(*THREAD_FIELDS, username=F("user__username"))
+    )
+
+
+def _comment(row):
+    """A Comment rebuilt from an approved_comments() row, without queries."""
+    fields = dict(row)
+    username = fields.pop("username")
+    comment = Comment(**fields)
+    if comment.user_id:
+        # Enough for get_display_name()
+        comment.user = User(pk=comment.user_id, username=username)
+    return comment
+
+
+def build_tree(comments):
+    """
+    Group ``comments`` (in path order) under their root comment. Replies of
+    any depth end up in the root's replies_list, in reading order. A reply is
+    left out if any comment above it isn't in ``comments`` (not approved).
+    """
+    roots = {}
+    shown = set()
+    for comment in comments:
+        comment.replies_list = []
+        parent_path = comment.path.rpartition(Comment.PATH_SEPARATOR)[0]
+        if comment.depth == 0:
+            roots[comment.path] = comment
+        elif parent_path in shown:
+            root_path = comment.path.split(Comment.PATH_SEPARATOR, 1)[0]
+            roots[root_path].replies_list.append(comment)
+        else:
+            continue
+        shown.add(comment.path)
+    return list(roots.values())
+
+
+def get_thread(post):
+    """The approved comment tree of ``post``: a list of root comments."""
+    key = THREAD_CACHE_KEY.format(post_id=post.pk)
+    rows = cache.get(key)
+    if rows is None:
+        rows = approved_comments(post.pk)
+        cache.set(key, rows, THREAD_CACHE_TTL)
+    return build_tree([_comment(row) for row in rows])
+
+
+def invalidate(*post_ids):
+    cache.delete_many([THREAD_CACHE_KEY.format(post_id=pk) for pk in post_ids])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def _comment_changed(sender, instance, **kwargs):
+    # After commit, so a request in between can't re-cache the old thread
+    post_id = instance.post_id
+    transaction.on_commit(lambda: invalidate(post_id))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def _user_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    # Cached threads show the username; logins only save last_login
+    if created or (update_fields is not None and "username" not in update_fields):
+        return
+    post_ids = set(
+        Comment.objects.filter(user=instance).values_list("post_id", flat=True)
+    )
+    if post_ids:
+        transaction.on_commit(lambda: invalidate(*post_ids))
@@ -18,12 +18,14 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 from django.contrib.syndication.views import Feed
 from django.utils.feedgenerator import Rss201rev2Feed
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
+from snowsune import search
+from . import threads
 from .models import BlogPost, Tag, BlogImage, Comment
 from .forms import BlogPostForm, BlogPostCreateForm, TagForm, CommentForm
 from apps.notifications.utils import (
@@ -33,6 +35,49 @@ from apps.notifications.utils import (
 )
 
 
+class SearchResults:
+    """
+    Posts from ``queryset`` matching ``query``, best first, for the
+    paginator: count() asks the search index and a slice only fetches the
+    hits (and posts) of that page.
+    """
+
+    def __init__(self, query, queryset, object_ids=None):
+        self.query = query
+        self.queryset = queryset
+        self.object_ids = object_ids
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = search.count(self.query, ["blog"], self.object_ids)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index : index + 1][0]
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        hits = search.search(
+            self.query,
+            ["blog"],
+            limit=max(stop - start, 0),
+            offset=start,
+            object_ids=self.object_ids,
+        )
+        posts = self.queryset.in_bulk([int(hit["object_id"]) for hit in hits])
+        page = []
+        for hit in hits:
+            post = posts.get(int(hit["object_id"]))
+            if post is not None:
+                post.search_snippet = hit["snippet"]
+                page.append(post)
+        return page
+
+
 class BlogListView(ListView):
     model = BlogPost
     template_name = "blog/blog_list.html"
@@ -51,14 +96,14 @@ class BlogListView(ListView):
         if tag_slug:
             queryset = queryset.filter(tags__slug=tag_slug)
 
-        # Search functionality
-        search_query = self.request.GET.get("search")
+        # Search goes through the full-text index, best matches first, and
+        # is paged there too
+        search_query = self.request.GET.get("search", "").strip()
         if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query)
-                | Q(content__icontains=search_query)
-                | Q(tags__name__icontains=search_query)
-            ).distinct()
+            object_ids = None
+            if tag_slug:
+                object_ids = list(queryset.values_list("pk", flat=True))
+            return SearchResults(search_query, queryset, object_ids)
 
         return queryset
 
@@ -66,6 +111,12 @@ class BlogListView(ListView):
         context = super().get_context_data(**kwargs)
         context["tags"] = Tag.objects.all().order_by("name")
         context["recent_posts"] = BlogPost.objects.filter(status="published")[:5]
+
+        search_query = self.request.GET.get("search", "").strip()
+        if search_query:
+            context["other_results"] = search.search(
+                search_query, kinds=["comic", "page", "character"], limit=5
+            )
         return context
 
 
@@ -80,47 +131,28 @@ class BlogDetailView(DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Get approved comments for this post
-        comments = self.object.comments.filter(status="approved").select_related(
-            "user", "parent"
-        )
-
-        # Organize comments into a tree structure
-        comment_tree = self.build_comment_tree(comments)
-
-        context["comments"] = comment_tree
+        # Approved comments, threaded (one query, cached per post)
+        context["comments"] = threads.get_thread(self.object)
         context["comment_form"] = CommentForm(
             user=self.request.user, post=self.object, request=self.request
         )
+
+        # Posts sharing a tag; EXISTS instead of joining the tags and DISTINCT
+        tag_ids = [tag.pk for tag in self.object.tags.all()]
         context["related_posts"] = (
-            BlogPost.objects.filter(status="published", tags__in=self.object.tags.all())
-            .exclude(id=self.object.id)
-            .distinct()[:3]
+            BlogPost.objects.filter(
+                Exists(
+                    BlogPost.tags.through.objects.filter(
+                        blogpost_id=OuterRef("pk"), tag_id__in=tag_ids
+                    )
+                ),
+                status="published",
+            ).exclude(id=self.object.id)[:3]
+            if tag_ids
+            else []
         )
         return context
 
-    def build_comment_tree(self, comments):
-        """Build a tree structure for threaded comments"""
-        comment_dict = {}
-        root_comments = []
-
-        # First pass: create a dictionary of all comments
-        for comment in comments:
-            comment_dict[comment.id] = comment
-            comment.replies_list = []
-
-        # Second pass: build the tree
-        for comment in comments:
-            if comment.parent:
-                # This is a reply
-                if comment.parent.id in comment_dict:
-                    comment_dict[comment.parent.id].replies_list.append(comment)
-            else:
-                # This is a root comment
-                root_comments.append(comment)
-
-        return root_comments
-
 
 @require_POST
 def submit_comment(request, post_id):
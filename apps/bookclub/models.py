@@ -1,9 +1,10 @@
 import logging
-import markdown
 
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from snowsune.markdown_render import render as render_markdown
+
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -116,9 +117,7 @@ class MonthlyComic(models.Model):
     def save(self, *args, **kwargs):
         # Generate HTML content from markdown
         if self.blurb:
-            self.blurb_html = markdown.markdown(
-                self.blurb, extensions=["extra", "codehilite"]
-            )
+            self.blurb_html = render_markdown(self.blurb, "blurb")
         super().save(*args, **kwargs)
 
 
@@ -3,11 +3,11 @@ import io
 import os
 from pathlib import Path
 
-import requests
 from PIL import Image, ImageDraw, ImageFont
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from snowsune.models import SiteSetting
+from snowsune.site_settings import get_setting
+from snowsune.webhooks import enqueue
 
 from .models import MonthlyComic, UserProgress
 
@@ -156,17 +156,13 @@ def create_leader_image(user, page_number):
 
 def send_leader_change_webhook(new_leader_username, new_leader_page):
     """
-    Sends a webhook notification when the book club leader changes.
+    Queues a webhook notification when the book club leader changes.
 
     (assuming i set the BOOK_CLUB_WEBHOOK site setting)
     """
 
     try:
-        webhook_setting = SiteSetting.objects.filter(key="BOOK_CLUB_WEBHOOK").first()
-        if not webhook_setting or not webhook_setting.value:
-            return  # No webhook configured oops
-
-        webhook_url = webhook_setting.value.strip()
+        webhook_url = (get_setting("BOOK_CLUB_WEBHOOK") or "").strip()
         if not webhook_url:
             return
 
@@ -185,23 +181,25 @@ def send_leader_change_webhook(new_leader_username, new_leader_page):
 
         # Create the leader image
         img_bytes = create_leader_image(user, new_leader_page)
+
+        # Only the newest leader is worth announcing, so this replaces any
+        # leader change that is still waiting in the queue
         if not img_bytes:
             logger.warning("Could not create leader image, sending text-only webhook")
             message = f"{new_leader_username} is now in the lead at page [{new_leader_page}]({comic.get_page_url(new_leader_page)}) !~"
-            payload = {"content": message}
-            response = requests.post(webhook_url, json=payload, timeout=5)
-            response.raise_for_status()
+            enqueue(webhook_url, message, coalesce_key="bookclub:leader")
             return
 
-        # Send webhook with image
         message = f"{new_leader_username} is now in the lead at page {comic.get_page_url(new_leader_page)} !~"
-
-        # Fingers crossed attach the data manually without having to save and load
-        files = {"file": ("leader.png", img_bytes, "image/png")}
-        data = {"content": message}
-
-        response = requests.post(webhook_url, data=data, files=files, timeout=10)
-        response.raise_for_status()
-        logger.info(f"Sent leader change webhook with image for {new_leader_username}")
+        enqueue(
+            webhook_url,
+            message,
+            attachment=img_bytes.getvalue(),
+            attachment_name="leader.png",
+            coalesce_key="bookclub:leader",
+        )
+        logger.info(
+            f"Queued leader change webhook with image for {new_leader_username}"
+        )
     except Exception as e:
         logger.error(f"Failed to send book club leader change webhook: {e}")
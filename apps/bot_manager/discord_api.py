@@ -1,70 +1,60 @@
 import logging
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
-import requests
 from django.conf import settings
-from django.core.cache import cache
+from django.db import connections
 
-from . import virtual_discord_api
+from . import discord_client, virtual_discord_api
+from .discord_client import DiscordAPIError
+from .members import GuildMembers
 
 logger = logging.getLogger(__name__)
 
+MEMBERS_PAGE_SIZE = 1000
+USER_INFO_TTL = 600
+USER_INFO_STALE_TTL = 60 * 60
+USER_LOOKUP_WORKERS = 8
+
 
 def virtual_mode_enabled() -> bool:
     """Return True when the debug virtual dataset is active."""
     return virtual_discord_api.is_available()
 
 
-def get_bot_guilds() -> List[dict]:
-    cache_key = "fops_bot_guilds"
-    cached = cache.get(cache_key)
+def _bot_auth() -> Optional[str]:
+    bot_token = getattr(settings, "DISCORD_BOT_TOKEN", None)
+    if not bot_token:
+        logger.warning("Discord bot token not configured")
+        return None
+    return f"Bot {bot_token}"
 
-    if cached is not None:
-        logger.debug("Returning cached bot guilds")
-        return cached
 
+def get_bot_guilds() -> List[dict]:
     if virtual_mode_enabled():
         guilds = virtual_discord_api.get_bot_guilds()
-        cache.set(cache_key, guilds, 300)
         logger.info("Loaded %d virtual bot guild(s)", len(guilds))
         return guilds
 
-    bot_token = getattr(settings, "DISCORD_BOT_TOKEN", None)
-    if not bot_token:
-        logger.warning("Discord bot token not configured")
+    auth = _bot_auth()
+    if not auth:
         return []
 
-    try:
-        headers = {"Authorization": f"Bot {bot_token}"}
-        response = requests.get(
-            "https://discord.com/api/users/@me/guilds", headers=headers
-        )
-
-        logger.info(f"Bot guilds API response: {response.status_code}")
-        if response.status_code != 200:
-            logger.error(f"Failed to fetch bot guilds: {response.text}")
-            return []
-
-        guilds = response.json()
+    def fetch():
+        guilds = discord_client.get_json("/users/@me/guilds", auth)
         logger.info(f"Fops Bot is in {len(guilds)} guilds")
-
-        cache.set(cache_key, guilds, 300)
         return guilds
+
+    try:
+        return discord_client.cached("fops_bot_guilds", fetch, 300)
     except Exception as e:
         logger.error(f"Exception fetching bot guilds: {e}")
         return []
 
 
 def get_user_guilds(user) -> Optional[List[dict]]:
-    cache_key = f"user_{user.id}_discord_guilds"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        logger.info(f"Using cached guilds for user {user.id}")
-        return cached
-
     if virtual_mode_enabled():
         guilds = virtual_discord_api.get_user_guilds(user)
-        cache.set(cache_key, guilds, 300)
         logger.info(
             "Returning %d virtual guild(s) for user %s in debug mode",
             len(guilds),
@@ -72,48 +62,35 @@ def get_user_guilds(user) -> Optional[List[dict]]:
         )
         return guilds
 
-    logger.info(f"Fetching guilds for user {user.id} from Discord API")
-
-    access_token = user.get_discord_access_token()
-    if not access_token:
-        logger.warning(f"User {user.id} has no access token")
-        return None
+    def fetch():
+        logger.info(f"Fetching guilds for user {user.id} from Discord API")
+        access_token = user.get_discord_access_token()
+        if not access_token:
+            raise DiscordAPIError(401, f"user {user.id} has no access token")
+        guilds = discord_client.get_json("/users/@me/guilds", f"Bearer {access_token}")
+        logger.info(f"User {user.id} is in {len(guilds)} guilds")
+        return guilds
 
     try:
-        headers = {"Authorization": f"Bearer {access_token}"}
-        response = requests.get(
-            "https://discord.com/api/users/@me/guilds", headers=headers
+        # Admin checks rely on this, so don't serve it stale for long
+        return discord_client.cached(
+            f"user_{user.id}_discord_guilds", fetch, 300, stale_ttl=60
         )
-
-        logger.info(f"User {user.id} guilds API response: {response.status_code}")
-        if response.status_code != 200:
-            logger.error(f"User {user.id} guilds API failed: {response.text}")
-            return None
-
-        guilds = response.json()
-        logger.info(f"User {user.id} is in {len(guilds)} guilds")
-
-        cache.set(cache_key, guilds, 300)
-        return guilds
     except Exception as e:
         logger.error(f"Exception fetching user {user.id} guilds: {e}")
         return None
 
 
-def get_guild_channels(guild_id) -> List[dict]:
-    cache_key = f"guild_{guild_id}_channels"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        logger.info(f"Using cached channels for guild {guild_id}")
-        return cached
+def _text_channels(channels):
+    return sorted(
+        [c for c in channels if c.get("type") in [0, 5]],
+        key=lambda x: x.get("position", 0),
+    )
 
+
+def get_guild_channels(guild_id) -> List[dict]:
     if virtual_mode_enabled():
-        channels = virtual_discord_api.get_guild_channels(guild_id)
-        text_channels = sorted(
-            [c for c in channels if c.get("type") in [0, 5]],
-            key=lambda x: x.get("position", 0),
-        )
-        cache.set(cache_key, text_channels, 300)
+        text_channels = _text_channels(virtual_discord_api.get_guild_channels(guild_id))
         logger.info(
             "Loaded %d virtual text channels for guild %s in debug mode",
             len(text_channels),
@@ -121,92 +98,133 @@ def get_guild_channels(guild_id) -> List[dict]:
         )
         return text_channels
 
-    logger.info(f"Fetching channels for guild {guild_id} from Discord API")
-
-    bot_token = getattr(settings, "DISCORD_BOT_TOKEN", None)
-    if not bot_token:
-        logger.warning("Discord bot token not configured")
+    auth = _bot_auth()
+    if not auth:
         return []
 
-    try:
-        headers = {"Authorization": f"Bot {bot_token}"}
-        response = requests.get(
-            f"https://discord.com/api/guilds/{guild_id}/channels", headers=headers
-        )
-
-        logger.info(f"Guild {guild_id} channels API response: {response.status_code}")
-        if response.status_code != 200:
-            logger.error(
-                f"Failed to fetch channels for guild {guild_id}: {response.text}"
-            )
-            return []
-
-        channels = response.json()
-        text_channels = sorted(
-            [c for c in channels if c["type"] in [0, 5]],
-            key=lambda x: x.get("position", 0),
-        )
+    def fetch():
+        logger.info(f"Fetching channels for guild {guild_id} from Discord API")
+        channels = discord_client.get_json(f"/guilds/{guild_id}/channels", auth)
+        text_channels = _text_channels(channels)
         logger.info(f"Guild {guild_id} has {len(text_channels)} text channels")
-
-        cache.set(cache_key, text_channels, 300)
         return text_channels
+
+    try:
+        return discord_client.cached(f"guild_{guild_id}_channels", fetch, 300)
     except Exception as e:
         logger.error(f"Exception fetching channels for guild {guild_id}: {e}")
         return []
 
 
-def get_user_info(user_id) -> Optional[dict]:
-    cache_key = f"discord_user_{user_id}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
+def _user_info_key(user_id):
+    return f"discord_user_{user_id}"
 
+
+def _user_info(user_id, user_data):
+    return {
+        "username": user_data.get("username"),
+        "avatar": user_data.get("avatar"),
+        "id": str(user_id),
+    }
+
+
+def get_user_info(user_id) -> Optional[dict]:
     if virtual_mode_enabled():
-        user_info = virtual_discord_api.get_user_info(user_id)
-        if user_info:
-            cache.set(cache_key, user_info, 600)
-        return user_info
+        return virtual_discord_api.get_user_info(user_id)
 
     bot_token = getattr(settings, "DISCORD_BOT_TOKEN", None)
     if not bot_token:
         return None
 
+    def fetch():
+        user_data = discord_client.get_json(f"/users/{user_id}", f"Bot {bot_token}")
+        return _user_info(user_id, user_data)
+
     try:
-        headers = {"Authorization": f"Bot {bot_token}"}
-        response = requests.get(
-            f"https://discord.com/api/users/{user_id}", headers=headers
+        return discord_client.cached(
+            _user_info_key(user_id), fetch, USER_INFO_TTL, stale_ttl=USER_INFO_STALE_TTL
         )
+    except Exception as e:
+        logger.error(f"Exception fetching user {user_id}: {e}")
+        return None
 
-        if response.status_code != 200:
-            logger.error(f"Failed to fetch user {user_id}: {response.text}")
-            return None
-
-        user_data = response.json()
-        user_info = {
-            "username": user_data.get("username"),
-            "avatar": user_data.get("avatar"),
-            "id": str(user_id),
-        }
 
-        cache.set(cache_key, user_info, 600)
-        return user_info
+def _fetch_user_info(user_id, auth):
+    try:
+        user_data = discord_client.get_json(f"/users/{user_id}", auth)
+        return _user_info(user_id, user_data)
     except Exception as e:
         logger.error(f"Exception fetching user {user_id}: {e}")
         return None
+    finally:
+        connections.close_all()
+
 
+def get_users_info(user_ids, guild_id=None) -> Dict[str, dict]:
+    """
+    Bulk get_user_info(): {user_id: info} for every id that could be resolved.
 
-def get_guild_members(guild_id, max_members=5000) -> List[dict]:
-    cache_key = f"guild_{guild_id}_members"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        logger.info(f"Using cached members for guild {guild_id}")
-        return cached
+    Cached ids come from one get_many. Misses are filled from the guild's
+    cached member list when ``guild_id`` is given (never fetched just for
+    this), and whatever is left is fetched from Discord in parallel. Stale
+    entries are returned as-is and refetched alongside the misses.
+    """
+    user_ids = {str(user_id) for user_id in user_ids}
+    if not user_ids:
+        return {}
 
     if virtual_mode_enabled():
-        members = virtual_discord_api.get_guild_members(
-            guild_id, max_members=max_members
+        users = {
+            user_id: virtual_discord_api.get_user_info(user_id) for user_id in user_ids
+        }
+        return {user_id: info for user_id, info in users.items() if info}
+
+    keys = {_user_info_key(user_id): user_id for user_id in user_ids}
+    found, stale = discord_client.get_many(keys)
+    users = {keys[key]: info for key, info in found.items()}
+    wanted = (user_ids - set(users)) | {keys[key] for key in stale}
+    resolved = {}
+
+    if wanted and guild_id is not None:
+        found, _ = discord_client.get_many([_members_key(guild_id)])
+        members = next(iter(found.values()), None)
+        if members is not None:
+            for user_id in wanted:
+                info = members.profile(user_id)
+                if info:
+                    resolved[user_id] = info
+            wanted -= set(resolved)
+
+    bot_token = getattr(settings, "DISCORD_BOT_TOKEN", None)
+    if wanted and bot_token:
+        auth = f"Bot {bot_token}"
+        workers = min(USER_LOOKUP_WORKERS, len(wanted))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            fetched = executor.map(
+                lambda user_id: (user_id, _fetch_user_info(user_id, auth)), wanted
+            )
+            resolved.update((user_id, info) for user_id, info in fetched if info)
+        logger.info(f"Fetched {len(wanted)} Discord user(s) in parallel")
+
+    discord_client.set_many(
+        {_user_info_key(user_id): info for user_id, info in resolved.items()},
+        USER_INFO_TTL,
+        stale_ttl=USER_INFO_STALE_TTL,
+    )
+    users.update(resolved)
+    return users
+
+
+def _members_key(guild_id):
+    return f"guild_{guild_id}_compact_members"
+
+
+def get_guild_members(guild_id, max_members=5000) -> GuildMembers:
+    """The guild's members in compact form, see members.GuildMembers."""
+    if virtual_mode_enabled():
+        members = GuildMembers.from_discord(
+            virtual_discord_api.get_guild_members(guild_id, max_members=max_members)
         )
-        cache.set(cache_key, members, 300)
         logger.info(
             "Loaded %d virtual members for guild %s in debug mode",
             len(members),
@@ -214,46 +232,36 @@ def get_guild_members(guild_id, max_members=5000) -> List[dict]:
         )
         return members
 
-    bot_token = getattr(settings, "DISCORD_BOT_TOKEN", None)
-    if not bot_token:
-        logger.warning("Discord bot token not configured")
-        return []
-
-    headers = {"Authorization": f"Bot {bot_token}"}
-    members: List[dict] = []
-    after = 0
+    empty = GuildMembers.from_discord([])
+    auth = _bot_auth()
+    if not auth:
+        return empty
 
-    try:
+    def fetch():
+        members: List[dict] = []
+        after = 0
         while True:
-            params = {"limit": 1000}
+            params = {"limit": MEMBERS_PAGE_SIZE}
             if after:
                 params["after"] = after
-            response = requests.get(
-                f"https://discord.com/api/guilds/{guild_id}/members",
-                headers=headers,
-                params=params,
+            # Each page goes through the rate limiter, so a big guild waits
+            # for its bucket instead of getting 429s halfway through
+            batch = discord_client.get_json(
+                f"/guilds/{guild_id}/members", auth, params=params
             )
-            logger.info(
-                f"Guild {guild_id} members API response: {response.status_code} (after={after})"
-            )
-            if response.status_code != 200:
-                logger.error(
-                    f"Failed to fetch members for guild {guild_id}: {response.text}"
-                )
-                break
-
-            batch = response.json()
             if not isinstance(batch, list):
                 break
             members.extend(batch)
 
-            if len(batch) < 1000 or len(members) >= max_members:
+            if len(batch) < MEMBERS_PAGE_SIZE or len(members) >= max_members:
                 break
             after = int(batch[-1]["user"]["id"])
+        logger.info(f"Fetched {len(members)} members for guild {guild_id}")
+        # Only ids and roles are kept, the raw JSON never reaches the cache
+        return GuildMembers.from_discord(members)
 
-        cache.set(cache_key, members, 300)
+    try:
+        return discord_client.cached(_members_key(guild_id), fetch, 300)
     except Exception as e:
         logger.error(f"Exception fetching members for guild {guild_id}: {e}")
-        return []
-
-    return members
+        return empty
@@ -0,0 +1,291 @@
+"""
+Rate-limit aware Discord API client with a shared, coalescing cache.
+
+discord_api.py builds on the two halves of this module:
+
+request() / get_json()
+    One Discord API call through the pooled http_client. Rate-limit state
+    from the X-RateLimit-* headers is kept in the shared cache (per route
+    and per token, plus the global limit), so every gunicorn worker waits
+    out an exhausted bucket instead of walking into a 429. A 429 is waited
+    out and retried when the wait is short, otherwise RateLimited is raised.
+
+cached()
+    Stale-while-revalidate cache around a fetch function. Fresh entries are
+    returned as-is. Stale ones are returned immediately while one background
+    thread refreshes them. On a cold miss only one caller (across workers)
+    fetches, the rest wait briefly for its result (single-flight).
+
+stats() returns cache hits/misses, 429s etc. across all workers.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connections
+
+from snowsune import http_client
+
+logger = logging.getLogger(__name__)
+
+API_HOST = "https://discord.com"
+API_BASE = f"{API_HOST}/api"
+
+# Longest we'll block a request waiting for a rate limit to reset
+MAX_RATE_LIMIT_WAIT = 5.0
+MAX_RETRIES = 2
+
+DEFAULT_STALE_TTL = 15 * 60
+LOCK_TTL = 30
+COALESCE_WAIT = 5.0  # How long a cold miss waits for another caller's fetch
+COALESCE_POLL = 0.1
+
+GLOBAL_LIMIT_KEY = "discord_client:ratelimit:global"
+ROUTE_LIMIT_KEY = "discord_client:ratelimit:{route}"
+STATS_KEY = "discord_client:stats:{name}"
+STAT_NAMES = (
+    "hits",
+    "stale_hits",
+    "misses",
+    "coalesced",
+    "refreshes",
+    "requests",
+    "rate_limited",
+    "rate_limit_waits",
+    "errors",
+)
+
+# Path segments that are their own rate-limit bucket in Discord's eyes
+_MAJOR_PARAMS = {"guilds", "channels", "webhooks"}
+
+
+class DiscordAPIError(Exception):
+    def __init__(self, status_code, text=""):
+        super().__init__(f"Discord API returned {status_code}: {text[:200]}")
+        self.status_code = status_code
+
+
+class RateLimited(DiscordAPIError):
+    def __init__(self, retry_after):
+        Exception.__init__(self, f"Discord rate limited for {retry_after:.1f}s")
+        self.status_code = 429
+        self.retry_after = retry_after
+
+
+def _bump(name):
+    key = STATS_KEY.format(name=name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                pass
+
+
+def stats():
+    """Counters shared by every worker since the cache was last cleared."""
+    keys = {STATS_KEY.format(name=name): name for name in STAT_NAMES}
+    values = cache.get_many(list(keys))
+    return {name: values.get(key, 0) for key, name in keys.items()}
+
+
+def _route(method, path, auth):
+    """
+    Rate-limit route for a call. Discord buckets by route with the guild /
+    channel / webhook id kept, other ids collapsed, and per token.
+    """
+    segments = path.strip("/").split("/")
+    route = []
+    for i, segment in enumerate(segments):
+        if segment.isdigit() and (i == 0 or segments[i - 1] not in _MAJOR_PARAMS):
+            route.append(":id")
+        else:
+            route.append(segment)
+    token = hashlib.sha256(auth.encode("utf-8")).hexdigest()[:12]
+    return f"{method}:{'/'.join(route)}:{token}"
+
+
+def _blocked_until(route):
+    route_key = ROUTE_LIMIT_KEY.format(route=route)
+    values = cache.get_many([GLOBAL_LIMIT_KEY, route_key])
+    return max(values.get(GLOBAL_LIMIT_KEY, 0), values.get(route_key, 0))
+
+
+def _block(key, seconds):
+    cache.set(key, time.time() + seconds, math.ceil(seconds) + 1)
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    if value is None:
+        try:
+            value = response.json().get("retry_after")
+        except ValueError:
+            value = None
+    try:
+        return max(float(value), 0.1)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def request(method, path, auth, params=None, max_wait=MAX_RATE_LIMIT_WAIT):
+    """
+    Make one Discord API call, respecting known rate limits.
+
+    ``auth`` is the full Authorization header ("Bot ..." / "Bearer ...").
+    Raises RateLimited if Discord wants us to wait longer than ``max_wait``.
+    """
+    route = _route(method, path, auth)
+
+    for attempt in range(MAX_RETRIES + 1):
+        wait = _blocked_until(route) - time.time()
+        if wait > 0:
+            if wait > max_wait:
+                raise RateLimited(wait)
+            _bump("rate_limit_waits")
+            time.sleep(wait)
+
+        _bump("requests")
+        response = http_client.request(
+            method,
+            f"{API_BASE}{path}",
+            headers={"Authorization": auth},
+            params=params,
+        )
+
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                reset_after = float(response.headers.get("X-RateLimit-Reset-After", 1))
+            except ValueError:
+                reset_after = 1.0
+            _block(ROUTE_LIMIT_KEY.format(route=route), reset_after)
+
+        if response.status_code != 429:
+            return response
+
+        _bump("rate_limited")
+        retry_after = _retry_after(response)
+        is_global = response.headers.get("X-RateLimit-Global") == "true"
+        if not is_global:
+            try:
+                is_global = bool(response.json().get("global"))
+            except ValueError:
+                pass
+        _block(
+            GLOBAL_LIMIT_KEY if is_global else ROUTE_LIMIT_KEY.format(route=route),
+            retry_after,
+        )
+        logger.warning(
+            f"Discord 429 on {method} {path} ({'global' if is_global else 'route'}), "
+            f"retry after {retry_after:.2f}s"
+        )
+        if retry_after > max_wait or attempt == MAX_RETRIES:
+            raise RateLimited(retry_after)
+
+
+def get_json(path, auth, params=None):
+    """GET ``path`` and return the decoded JSON, raising DiscordAPIError otherwise."""
+    response = request("GET", path, auth, params=params)
+    if response.status_code != 200:
+        _bump("errors")
+        raise DiscordAPIError(response.status_code, response.text)
+    return response.json()
+
+
+def _entry(value, ttl):
+    return {"value": value, "fresh_until": time.time() + ttl}
+
+
+def _store(cache_key, value, ttl, stale_ttl):
+    cache.set(cache_key, _entry(value, ttl), ttl + stale_ttl)
+
+
+def get_many(cache_keys):
+    """
+    Bulk counterpart of cached()'s lookup: {key: value} for every key with a
+    fresh or stale entry, plus the set of keys that are stale. Nothing is
+    refreshed here, the caller fetches what it needs and calls set_many().
+    """
+    entries = cache.get_many(list(cache_keys))
+    now = time.time()
+    found, stale = {}, set()
+    for key in cache_keys:
+        entry = entries.get(key)
+        if entry is None:
+            _bump("misses")
+            continue
+        found[key] = entry["value"]
+        if entry["fresh_until"] > now:
+            _bump("hits")
+        else:
+            _bump("stale_hits")
+            stale.add(key)
+    return found, stale
+
+
+def set_many(values, ttl, stale_ttl=DEFAULT_STALE_TTL):
+    """Store {cache_key: value} in the format cached() and get_many() read."""
+    if values:
+        cache.set_many(
+            {key: _entry(value, ttl) for key, value in values.items()},
+            ttl + stale_ttl,
+        )
+
+
+def _refresh_in_background(cache_key, fetch, ttl, stale_ttl, lock_key):
+    def run():
+        try:
+            _store(cache_key, fetch(), ttl, stale_ttl)
+            _bump("refreshes")
+        except Exception as e:
+            logger.warning(f"Background refresh of {cache_key} failed: {e}")
+        finally:
+            cache.delete(lock_key)
+            connections.close_all()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def cached(cache_key, fetch, ttl, stale_ttl=DEFAULT_STALE_TTL):
+    """
+    Return ``fetch()``'s value through the stale-while-revalidate cache.
+
+    ``fetch`` should raise on failure so errors never get cached. A failed
+    background refresh just leaves the stale value in place until it expires.
+    """
+    lock_key = f"{cache_key}:lock"
+    entry = cache.get(cache_key)
+
+    if entry is not None:
+        if entry["fresh_until"] > time.time():
+            _bump("hits")
+            return entry["value"]
+
+        _bump("stale_hits")
+        if cache.add(lock_key, 1, LOCK_TTL):
+            _refresh_in_background(cache_key, fetch, ttl, stale_ttl, lock_key)
+        return entry["value"]
+
+    _bump("misses")
+    if not cache.add(lock_key, 1, LOCK_TTL):
+        # Someone else is already fetching this, wait for their result
+        _bump("coalesced")
+        deadline = time.monotonic() + COALESCE_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(COALESCE_POLL)
+            entry = cache.get(cache_key)
+            if entry is not None:
+                return entry["value"]
+
+    try:
+        value = fetch()
+        _store(cache_key, value, ttl, stale_ttl)
+        return value
+    finally:
+        cache.delete(lock_key)
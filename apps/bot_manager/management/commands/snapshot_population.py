@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from apps.bot_manager import population
+
+
+class Command(BaseCommand):
+    help = "Count species roles in the Fops guild(s) and store a population snapshot"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--guild",
+            action="append",
+            dest="guilds",
+            help="Guild id to snapshot (repeatable, default: the /fops/pop guild)",
+        )
+
+    def handle(self, *args, **options):
+        for guild_id in options["guilds"] or [population.default_guild_id()]:
+            try:
+                snapshot = population.take_snapshot(guild_id)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"{guild_id}: {e}"))
+                continue
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{guild_id}: {snapshot.matched_members}/"
+                    f"{snapshot.members_count} members matched"
+                )
+            )
@@ -0,0 +1,148 @@
+"""
+Compact guild member lists.
+
+Discord's member objects carry the nested user, avatar, flags, join dates
+and more. For 5000 members that is several MB per guild in the cache,
+while the consumers only need user ids and role ids (plus a name/avatar to
+show a subscriber). GuildMembers packs those into:
+
+- user ids as one array of unsigned 64 bit ints
+- the guild's distinct role ids as another
+- one fixed-width bitmask row per member (bit n set = has role n), all
+  rows in a single bytes object
+
+Usage:
+    members = discord_api.get_guild_members(guild_id)
+
+    len(members)
+    members.roles_of(user_id)          # frozenset of role id strings
+    members.members_with_role(role_id) # [user id strings]
+    for user_id, roles in members.iter_roles():
+        ...
+"""
+
+from array import array
+
+
+class GuildMembers:
+    __slots__ = (
+        "_ids",
+        "_role_ids",
+        "_width",
+        "_masks",
+        "_names",
+        "_avatars",
+        "_index",
+    )
+
+    def __init__(self, ids, role_ids, masks, names, avatars):
+        self._ids = ids
+        self._role_ids = role_ids
+        self._width = (len(role_ids) + 7) // 8
+        self._masks = masks
+        self._names = names
+        self._avatars = avatars
+        self._index = None
+
+    @classmethod
+    def from_discord(cls, members):
+        """Build from Discord member objects, skipping any without a user id."""
+        rows = []
+        for member in members:
+            user = member.get("user") or {}
+            if user.get("id") is None:
+                continue
+            rows.append((user, [int(r) for r in member.get("roles", ())]))
+
+        role_ids = array("Q", sorted({r for _, roles in rows for r in roles}))
+        position = {role_id: i for i, role_id in enumerate(role_ids)}
+        width = (len(role_ids) + 7) // 8
+        masks = bytearray(len(rows) * width)
+        for i, (_, roles) in enumerate(rows):
+            mask = 0
+            for role_id in roles:
+                mask |= 1 << position[role_id]
+            masks[i * width : (i + 1) * width] = mask.to_bytes(width, "little")
+
+        return cls(
+            ids=array("Q", (int(user["id"]) for user, _ in rows)),
+            role_ids=role_ids,
+            masks=bytes(masks),
+            names=tuple(user.get("username") for user, _ in rows),
+            avatars=tuple(user.get("avatar") for user, _ in rows),
+        )
+
+    def __getstate__(self):
+        # The id -> row index is rebuilt on demand, don't cache it
+        return (self._ids, self._role_ids, self._masks, self._names, self._avatars)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __bool__(self):
+        return bool(self._ids)
+
+    def _row(self, user_id):
+        if self._index is None:
+            self._index = {uid: i for i, uid in enumerate(self._ids)}
+        try:
+            return self._index.get(int(user_id))
+        except (TypeError, ValueError):
+            return None
+
+    def _mask(self, row):
+        start = row * self._width
+        return int.from_bytes(self._masks[start : start + self._width], "little")
+
+    def _roles(self, mask):
+        roles = []
+        position = 0
+        while mask:
+            if mask & 1:
+                roles.append(str(self._role_ids[position]))
+            mask >>= 1
+            position += 1
+        return frozenset(roles)
+
+    def user_ids(self):
+        return [str(uid) for uid in self._ids]
+
+    def iter_roles(self):
+        """Yield (user id, frozenset of role ids) for every member, as strings."""
+        for row, uid in enumerate(self._ids):
+            yield str(uid), self._roles(self._mask(row))
+
+    def roles_of(self, user_id):
+        """The member's role ids, or None if they're not in the list."""
+        row = self._row(user_id)
+        return None if row is None else self._roles(self._mask(row))
+
+    def has_role(self, user_id, role_id):
+        roles = self.roles_of(user_id)
+        return roles is not None and str(role_id) in roles
+
+    def members_with_role(self, role_id):
+        try:
+            position = self._role_ids.index(int(role_id))
+        except ValueError:
+            return []
+        byte, bit = divmod(position, 8)
+        return [
+            str(uid)
+            for row, uid in enumerate(self._ids)
+            if self._masks[row * self._width + byte] >> bit & 1
+        ]
+
+    def profile(self, user_id):
+        """{"username", "avatar", "id"} like get_user_info(), or None."""
+        row = self._row(user_id)
+        if row is None:
+            return None
+        return {
+            "username": self._names[row],
+            "avatar": self._avatars[row],
+            "id": str(user_id),
+        }
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subscription',
+            fields=[
+                ('service_type', models.CharField(choices=[('BixiBooru', 'BixiBooru'), ('FurAffinity', 'FurAffinity'), ('e621', 'e621')], max_length=50)),
+                ('user_id', models.BigIntegerField()),
+                ('guild_id', models.BigIntegerField()),
+                ('channel_id', models.BigIntegerField()),
+                ('search_criteria', models.CharField(max_length=255)),
+                ('filters', models.TextField(blank=True, null=True)),
+                ('is_pm', models.BooleanField(default=False)),
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('subscribed_at', models.DateTimeField(auto_now_add=True)),
+                ('last_reported_id', models.BigIntegerField(default=0)),
+                ('last_ran', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'subscriptions',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PopulationSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('guild_id', models.CharField(max_length=32)),
+                ('first_counts', models.JSONField(default=dict)),
+                ('hybrid_counts', models.JSONField(default=dict)),
+                ('members_count', models.PositiveIntegerField(default=0)),
+                ('matched_members', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['guild_id', '-created_at'], name='bot_manager_guild_i_c0dd0f_idx')],
+            },
+        ),
+    ]
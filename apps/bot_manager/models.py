@@ -1,15 +1,26 @@
 from django.db import models
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from psycopg2 import sql
 
 from . import virtual_discord_api
 from .utils import get_fops_connection
 
 
 class FopsDatabase:
+    TABLES_CACHE_KEY = "fops_tables"
+    TABLE_INFO_CACHE_KEY = "fops_table_info_{table}"
+    SCHEMA_CACHE_TTL = 300
+    EXPORT_BATCH_SIZE = 2000
+
     @staticmethod
     def get_tables():
         """Get list of tables in Fops database"""
+        tables = cache.get(FopsDatabase.TABLES_CACHE_KEY)
+        if tables is not None:
+            return tables
+
         with get_fops_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(
@@ -19,7 +30,126 @@ class FopsDatabase:
                     WHERE table_schema = 'public'
                 """
                 )
-                return [row["table_name"] for row in cur.fetchall()]
+                tables = [row["table_name"] for row in cur.fetchall()]
+        cache.set(FopsDatabase.TABLES_CACHE_KEY, tables, FopsDatabase.SCHEMA_CACHE_TTL)
+        return tables
+
+    @staticmethod
+    def get_table_info(table_name):
+        """
+        Columns, primary key and sortable columns of a table, or None if it
+        isn't one of get_tables(). Sortable columns are the NOT NULL leading
+        columns of an index, so keyset pagination on them stays an index scan.
+        """
+        if table_name not in FopsDatabase.get_tables():
+            return None
+
+        cache_key = FopsDatabase.TABLE_INFO_CACHE_KEY.format(table=table_name)
+        info = cache.get(cache_key)
+        if info is not None:
+            return info
+
+        regclass = 'public."{}"'.format(table_name.replace('"', '""'))
+        with get_fops_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT column_name, is_nullable
+                    FROM information_schema.columns
+                    WHERE table_schema = 'public' AND table_name = %s
+                    ORDER BY ordinal_position
+                    """,
+                    (table_name,),
+                )
+                columns = cur.fetchall()
+                cur.execute(
+                    """
+                    SELECT a.attname, i.indisprimary,
+                           array_position(i.indkey::int2[], a.attnum) AS position
+                    FROM pg_index i
+                    JOIN pg_attribute a
+                      ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+                    WHERE i.indrelid = %s::regclass
+                    ORDER BY position
+                    """,
+                    (regclass,),
+                )
+                index_columns = cur.fetchall()
+
+        not_null = {c["column_name"] for c in columns if c["is_nullable"] == "NO"}
+        primary_key = [r["attname"] for r in index_columns if r["indisprimary"]]
+        leading = {r["attname"] for r in index_columns if r["position"] == 1}
+        info = {
+            "columns": [c["column_name"] for c in columns],
+            "primary_key": primary_key,
+            "sortable": [
+                c["column_name"]
+                for c in columns
+                if c["column_name"] in leading and c["column_name"] in not_null
+            ],
+        }
+        cache.set(cache_key, info, FopsDatabase.SCHEMA_CACHE_TTL)
+        return info
+
+    @staticmethod
+    def _select(table_name, columns, order_by, descending):
+        select = sql.SQL("SELECT {columns} FROM {table}").format(
+            columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+            table=sql.Identifier(table_name),
+        )
+        if not order_by:
+            return select, sql.SQL("")
+        direction = sql.SQL("DESC" if descending else "ASC")
+        order = sql.SQL(" ORDER BY {}").format(
+            sql.SQL(", ").join(
+                sql.SQL("{} {}").format(sql.Identifier(c), direction) for c in order_by
+            )
+        )
+        return select, order
+
+    @staticmethod
+    def get_page(
+        table_name, columns, order_by, descending=False, after=None, limit=100
+    ):
+        """
+        One page of rows ordered by ``order_by`` (unique, e.g. sort column +
+        primary key), starting after the ``after`` key values. Returns
+        (rows, has_more). ``columns`` must already include ``order_by``.
+        """
+        select, order = FopsDatabase._select(table_name, columns, order_by, descending)
+        query = [select]
+        params = []
+        if after:
+            query.append(
+                sql.SQL(" WHERE ({}) {} ({})").format(
+                    sql.SQL(", ").join(map(sql.Identifier, order_by)),
+                    sql.SQL("<" if descending else ">"),
+                    sql.SQL(", ").join(sql.Placeholder() * len(after)),
+                )
+            )
+            params.extend(after)
+        query.append(order)
+        query.append(sql.SQL(" LIMIT %s"))
+        params.append(limit + 1)
+
+        with get_fops_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql.Composed(query), params)
+                rows = cur.fetchall()
+        return rows[:limit], len(rows) > limit
+
+    @staticmethod
+    def iter_rows(table_name, columns, order_by, descending=False):
+        """
+        Yield every row of a table through a server-side cursor, so exports
+        of big tables never sit in memory.
+        """
+        select, order = FopsDatabase._select(table_name, columns, order_by, descending)
+        with get_fops_connection() as conn:
+            with conn.cursor(name="fops_export") as cur:
+                cur.itersize = FopsDatabase.EXPORT_BATCH_SIZE
+                cur.execute(select + order)
+                yield from cur
 
 
 class Subscription(models.Model):
@@ -121,3 +251,29 @@ class Subscription(models.Model):
             with conn.cursor() as cur:
                 cur.execute("DELETE FROM subscriptions WHERE id = %s", (self.id,))
                 conn.commit()
+
+
+class PopulationSnapshot(models.Model):
+    """
+    Species population of a guild at one point in time, written by the
+    snapshot_population command. Rows are never updated, so the history can
+    be charted straight from the table.
+    """
+
+    guild_id = models.CharField(max_length=32)
+    # {species: count}, species in the YAML's order
+    first_counts = models.JSONField(default=dict)
+    hybrid_counts = models.JSONField(default=dict)
+    members_count = models.PositiveIntegerField(default=0)
+    matched_members = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["guild_id", "-created_at"])]
+
+    def __str__(self):
+        return f"Population of {self.guild_id} at {self.created_at:%Y-%m-%d %H:%M}"
+
+    def counts(self, mode):
+        return self.hybrid_counts if mode == "hybrid" else self.first_counts
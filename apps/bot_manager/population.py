@@ -0,0 +1,178 @@
+"""
+Species population snapshots for /fops/pop.
+
+The pop view used to re-read the species YAML, fetch up to 5000 guild members
+and count them on every request. Now the snapshot_population command (cron)
+does the counting and stores a PopulationSnapshot; the view only reads the
+latest one (cached) and the history for the trend chart.
+
+Usage:
+    from apps.bot_manager import population
+
+    population.take_snapshot(guild_id)
+    snapshot = population.latest_snapshot(guild_id)
+"""
+
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import discord_api, virtual_discord_api
+from .models import PopulationSnapshot
+
+try:
+    import yaml  # type: ignore
+except Exception:  # pragma: no cover
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+POP_GUILD_ID = "1153521286086148156"  # Just for bixi
+SPECIES_MAP_PATH = os.path.join(
+    settings.BASE_DIR, "apps", "bot_manager", "data", "species_roles_map.yaml"
+)
+
+LATEST_CACHE_KEY = "population:latest:{guild_id}"
+LATEST_CACHE_TTL = 60 * 60
+HISTORY_LENGTH = 90
+
+_compiled = {}  # path -> (mtime_ns, SpeciesMap)
+_compiled_lock = threading.Lock()
+
+
+class SpeciesMap:
+    """The YAML mapping compiled for counting: species order + role lookups."""
+
+    def __init__(self, mapping):
+        self.species = list(mapping)
+        self.rank = {species: i for i, species in enumerate(self.species)}
+        self.role_to_species = {}
+        for species, role_ids in mapping.items():
+            for role_id in role_ids:
+                self.role_to_species.setdefault(role_id, []).append(species)
+
+    def count(self, members):
+        """
+        Count a GuildMembers both ways: "first" gives each member only their
+        first species in YAML order, "hybrid" counts every species they have.
+        Returns (first, hybrid, matched_members).
+        """
+        first = dict.fromkeys(self.species, 0)
+        hybrid = dict.fromkeys(self.species, 0)
+        matched_members = 0
+
+        for _, roles in members.iter_roles():
+            matched = set()
+            for role_id in roles:
+                matched.update(self.role_to_species.get(role_id, ()))
+            if not matched:
+                continue
+
+            matched_members += 1
+            first[min(matched, key=self.rank.__getitem__)] += 1
+            for species in matched:
+                hybrid[species] += 1
+
+        return first, hybrid, matched_members
+
+
+def load_species_map(path=SPECIES_MAP_PATH):
+    """
+    The compiled SpeciesMap for ``path``, reparsed only when the file's mtime
+    changes. Returns None if the file or PyYAML is missing.
+    """
+    if yaml is None:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    cached = _compiled.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with _compiled_lock:
+        with open(path, "r", encoding="utf-8") as f:
+            loaded = yaml.safe_load(f) or {}
+        species_map = SpeciesMap(
+            {
+                str(species): {str(rid) for rid in (ids or [])}
+                for species, ids in loaded.items()
+            }
+        )
+        _compiled[path] = (mtime, species_map)
+    return species_map
+
+
+def default_guild_id():
+    if virtual_discord_api.is_available():
+        virtual_guilds = virtual_discord_api.get_bot_guilds()
+        if virtual_guilds:
+            return str(virtual_guilds[0]["id"])
+    return POP_GUILD_ID
+
+
+def take_snapshot(guild_id):
+    """Count ``guild_id``'s members now and store a PopulationSnapshot."""
+    species_map = load_species_map()
+    if species_map is None:
+        raise FileNotFoundError(
+            f"Species map not loaded from {SPECIES_MAP_PATH} (is PyYAML installed?)"
+        )
+
+    members = discord_api.get_guild_members(guild_id)
+    if not members:
+        # get_guild_members returns no one when the fetch failed; an all-zero
+        # snapshot would show up as the guild's current population
+        raise RuntimeError(f"No members fetched for guild {guild_id}, skipping")
+    first, hybrid, matched_members = species_map.count(members)
+    snapshot = PopulationSnapshot.objects.create(
+        guild_id=str(guild_id),
+        first_counts=first,
+        hybrid_counts=hybrid,
+        members_count=len(members),
+        matched_members=matched_members,
+    )
+    cache.set(LATEST_CACHE_KEY.format(guild_id=guild_id), snapshot, LATEST_CACHE_TTL)
+    logger.info(
+        f"Population of {guild_id}: {matched_members}/{len(members)} members matched"
+    )
+    return snapshot
+
+
+def latest_snapshot(guild_id):
+    """The newest PopulationSnapshot for ``guild_id``, or None."""
+    key = LATEST_CACHE_KEY.format(guild_id=guild_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = PopulationSnapshot.objects.filter(guild_id=str(guild_id)).first()
+        if snapshot is not None:
+            cache.set(key, snapshot, LATEST_CACHE_TTL)
+    return snapshot
+
+
+def history(guild_id, mode="first", length=HISTORY_LENGTH):
+    """
+    Oldest-first trend data for the last ``length`` snapshots:
+    {"labels": [iso timestamps], "series": {species: [counts]}}
+    """
+    field = "hybrid_counts" if mode == "hybrid" else "first_counts"
+    rows = list(
+        PopulationSnapshot.objects.filter(guild_id=str(guild_id))
+        .order_by("-created_at")
+        .values_list("created_at", field)[:length]
+    )
+    rows.reverse()
+
+    series = {}
+    for i, (_, counts) in enumerate(rows):
+        for species, count in counts.items():
+            series.setdefault(species, [0] * len(rows))[i] = count
+    return {
+        "labels": [created_at.isoformat() for created_at, _ in rows],
+        "series": {sp: counts for sp, counts in series.items() if any(counts)},
+    }
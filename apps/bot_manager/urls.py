@@ -11,6 +11,7 @@ urlpatterns = [
     path(
         "discord/callback/", views.discord_callback, name="bot_manager_discord_callback"
     ),
+    path("discord/stats/", views.discord_stats, name="bot_manager_discord_stats"),
     # Subscription management
     path(
         "subscriptions/add/",
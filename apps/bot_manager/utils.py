@@ -1,22 +1,123 @@
 import logging
+import os
+import threading
+import time
 from django.conf import settings
 from contextlib import contextmanager
 from datetime import datetime
 import psycopg2
+from psycopg2 import extensions, pool
 from psycopg2.extras import RealDictCursor
 from . import discord_api
 
 logger = logging.getLogger(__name__)
 
 
+class FopsPool:
+    """
+    Thread-safe pool of connections to the Fops database.
+
+    Connections idle for longer than FOPS_HEALTH_CHECK_INTERVAL are checked
+    with a SELECT 1 before being handed out, and broken ones are replaced.
+    When every connection is in use, callers wait up to FOPS_POOL_TIMEOUT.
+    """
+
+    def __init__(self, dsn, min_size, max_size, timeout, health_check_interval):
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.pid = os.getpid()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._last_used = {}
+        self._pool = pool.ThreadedConnectionPool(
+            min_size,
+            max_size,
+            dsn,
+            cursor_factory=RealDictCursor,
+            connect_timeout=settings.FOPS_CONNECT_TIMEOUT,
+        )
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is None:  # Fresh from psycopg2.connect
+            return True
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise pool.PoolError("Timed out waiting for a Fops database connection")
+        try:
+            conn = self._pool.getconn()
+            if not self._healthy(conn):
+                logger.warning("Discarding broken Fops database connection")
+                self._discard(conn)
+                conn = self._pool.getconn()
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        self._pool.putconn(conn, close=True)
+
+    def putconn(self, conn):
+        try:
+            if conn.closed:
+                self._discard(conn)
+                return
+            # Don't leave it idle in a transaction (or an aborted one)
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            self._last_used[id(conn)] = time.monotonic()
+            self._pool.putconn(conn)
+        except psycopg2.Error:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+_fops_pool = None
+_fops_pool_lock = threading.Lock()
+
+
+def get_fops_pool():
+    """This process's FopsPool, created on first use (after gunicorn forks)."""
+    global _fops_pool
+    if _fops_pool is None or _fops_pool.pid != os.getpid():
+        with _fops_pool_lock:
+            if _fops_pool is None or _fops_pool.pid != os.getpid():
+                _fops_pool = FopsPool(
+                    settings.FOPS_DATABASE,
+                    settings.FOPS_POOL_MIN_SIZE,
+                    settings.FOPS_POOL_MAX_SIZE,
+                    settings.FOPS_POOL_TIMEOUT,
+                    settings.FOPS_HEALTH_CHECK_INTERVAL,
+                )
+    return _fops_pool
+
+
 @contextmanager
 def get_fops_connection():
-    """Context manager for Fops database connections"""
-    conn = psycopg2.connect(settings.FOPS_DATABASE, cursor_factory=RealDictCursor)
+    """Context manager for Fops database connections, borrowed from the pool"""
+    fops_pool = get_fops_pool()
+    conn = fops_pool.getconn()
     try:
         yield conn
     finally:
-        conn.close()
+        fops_pool.putconn(conn)
 
 
 def has_guild_admin_access(user, guild_id):
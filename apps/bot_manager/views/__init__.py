@@ -6,6 +6,7 @@ from .debug import debug_clear_discord, debug_secret_key
 from .tables import table_data
 from .redirect import fops_redirect_view
 from .pop import pop_view
+from .stats import discord_stats
 
 __all__ = [
     "dashboard",
@@ -20,4 +21,5 @@ __all__ = [
     "table_data",
     "fops_redirect_view",
     "pop_view",
+    "discord_stats",
 ]
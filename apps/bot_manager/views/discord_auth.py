@@ -1,6 +1,5 @@
 """Discord OAuth authentication views"""
 
-import requests
 from django.shortcuts import redirect
 from django.http import JsonResponse
 from django.conf import settings
@@ -11,6 +10,7 @@ from django.utils import timezone
 from datetime import timedelta
 
 from apps.users.models import CustomUser
+from snowsune import http_client
 
 
 def discord_login(request):
@@ -44,7 +44,7 @@ def discord_callback(request):
         "redirect_uri": settings.DISCORD_REDIRECT_URI,
     }
 
-    response = requests.post("https://discord.com/api/oauth2/token", data=data)
+    response = http_client.post("https://discord.com/api/oauth2/token", data=data)
     if response.status_code != 200:
         return JsonResponse({"error": "Failed to get access token"}, status=400)
 
@@ -55,7 +55,9 @@ def discord_callback(request):
 
     # Get user info
     headers = {"Authorization": f"Bearer {access_token}"}
-    user_response = requests.get("https://discord.com/api/users/@me", headers=headers)
+    user_response = http_client.get(
+        "https://discord.com/api/users/@me", headers=headers
+    )
     if user_response.status_code != 200:
         return JsonResponse({"error": "Failed to get user info"}, status=400)
 
@@ -138,11 +138,7 @@ def guild_detail(request, guild_id):
 
         # Get unique user IDs from subscriptions and fetch user info
         user_ids = set(str(sub["user_id"]) for sub in guild_subscriptions)
-        user_map = {}
-        for user_id in user_ids:
-            user_info = discord_api.get_user_info(user_id)
-            if user_info:
-                user_map[user_id] = user_info
+        user_map = discord_api.get_users_info(user_ids, guild_id=guild_id)
 
         # Add channel names and calculate last_ran time to subscriptions
         current_time = int(time.time())
@@ -0,0 +1,18 @@
+from django.http import HttpResponseForbidden, JsonResponse
+
+from snowsune import http_client
+
+from .. import discord_client
+
+
+def discord_stats(request):
+    """Discord client cache / rate limit counters, staff only."""
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    return JsonResponse(
+        {
+            "client": discord_client.stats(),
+            "http": http_client.stats().get(discord_client.API_HOST, {}),
+        }
+    )
@@ -1,29 +1,173 @@
-from django.shortcuts import render, redirect
-from django.contrib.auth.decorators import login_required
+import base64
+import csv
+import json
+
 from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect, render
+
+from ..models import FopsDatabase
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def _encode_cursor(values):
+    data = json.dumps(values, cls=DjangoJSONEncoder).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii")
+
+
+def _decode_cursor(token, length):
+    """Key values from a ``cursor`` parameter, None if it's missing or mangled."""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+def _page_size(value):
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+
+
+def _export_query(params, export):
+    params = params.copy()
+    params.pop("limit", None)
+    params["format"] = export
+    return params.urlencode()
 
-from ..utils import get_fops_connection
+
+class _Echo:
+    """File-like object csv.writer can write a single row into."""
+
+    def write(self, value):
+        return value
+
+
+def _stream_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([row[c] for c in columns])
+
+
+def _stream_json(columns, rows):
+    yield "["
+    separator = "\n"
+    for row in rows:
+        row = {c: row[c] for c in columns}
+        yield separator + json.dumps(row, cls=DjangoJSONEncoder)
+        separator = ",\n"
+    yield "\n]\n"
 
 
 @login_required
 def table_data(request, table_name):
-    """Display data from a specific table - requires login only"""
-    if not request.user.discord_access_token:
-        messages.error(request, "You must connect your Discord account first.")
+    """
+    Browse a Fops table, staff only.
+
+    Query parameters:
+        columns   columns to show, repeated or comma separated (default: all)
+        sort      an indexed column to order by (default: the primary key)
+        desc      "1" to sort descending
+        limit     rows per page, up to MAX_PAGE_SIZE
+        cursor    opaque keyset cursor from the previous page's "next" link
+        format    "csv" or "json" to stream the whole table instead
+    """
+    if not request.user.is_staff:
+        messages.error(request, "Only staff can browse the Fops database.")
         return redirect("bot_manager_dashboard")
 
     try:
-        # Get table data from Fops database
-        with get_fops_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(f"SELECT * FROM {table_name} LIMIT 100")
-                columns = [desc[0] for desc in cur.description]
-                rows = cur.fetchall()
+        info = FopsDatabase.get_table_info(table_name)
+        if info is None:
+            messages.error(request, f"Unknown table: {table_name}")
+            return redirect("bot_manager_dashboard")
+
+        requested = [
+            c for value in request.GET.getlist("columns") for c in value.split(",")
+        ]
+        columns = [c for c in requested if c in info["columns"]] or info["columns"]
+
+        sort = request.GET.get("sort")
+        if sort not in info["sortable"]:
+            sort = None
+        descending = request.GET.get("desc") == "1"
+
+        # The key has to be unique for keyset pagination: sort column + pk
+        order_by = ([sort] if sort else []) + [
+            c for c in info["primary_key"] if c != sort
+        ]
+        # Key columns are always fetched, the cursor is built from them
+        select = columns + [c for c in order_by if c not in columns]
+
+        export = request.GET.get("format")
+        if export in ("csv", "json"):
+            rows = FopsDatabase.iter_rows(table_name, select, order_by, descending)
+            if export == "csv":
+                response = StreamingHttpResponse(
+                    _stream_csv(columns, rows), content_type="text/csv"
+                )
+            else:
+                response = StreamingHttpResponse(
+                    _stream_json(columns, rows), content_type="application/json"
+                )
+            response["Content-Disposition"] = (
+                f'attachment; filename="{table_name}.{export}"'
+            )
+            return response
+
+        limit = _page_size(request.GET.get("limit"))
+        after = _decode_cursor(request.GET.get("cursor"), len(order_by))
+        rows, has_more = FopsDatabase.get_page(
+            table_name, select, order_by, descending, after, limit
+        )
+
+        params = request.GET.copy()
+        params.pop("cursor", None)
+        next_url = None
+        # Without a primary key there's no stable key to page on
+        if has_more and order_by:
+            params["cursor"] = _encode_cursor([rows[-1][c] for c in order_by])
+            next_url = f"?{params.urlencode()}"
+            params.pop("cursor")
+
+        def sort_url(column):
+            sort_params = params.copy()
+            sort_params["sort"] = column
+            sort_params["desc"] = "1" if column == sort and not descending else "0"
+            return f"?{sort_params.urlencode()}"
 
         context = {
             "table_name": table_name,
             "columns": columns,
-            "rows": rows,
+            "all_columns": info["columns"],
+            "headers": [
+                {
+                    "name": c,
+                    "sort_url": sort_url(c) if c in info["sortable"] else None,
+                    "sorted": c == sort,
+                }
+                for c in columns
+            ],
+            "rows": [[row[c] for c in columns] for row in rows],
+            "sort": sort,
+            "descending": descending,
+            "limit": limit,
+            "has_primary_key": bool(info["primary_key"]),
+            "first_url": f"?{params.urlencode()}" if after else None,
+            "next_url": next_url,
+            "csv_url": f"?{_export_query(params, 'csv')}",
+            "json_url": f"?{_export_query(params, 'json')}",
         }
         response = render(request, "bot_manager/table_data.html", context)
         response["Vary"] = "Cookie"
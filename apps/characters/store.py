@@ -0,0 +1,179 @@
+"""
+In-memory store of the character markdown files in char_data.
+
+The character views used to list the directory on every request and read
+and render the .md file on every profile view. Now each file is parsed and
+rendered once and kept in process memory; the directory is only looked at
+again after CHECK_INTERVAL seconds, and a file is only re-rendered when its
+mtime changes.
+
+A file may start with YAML frontmatter:
+
+    ---
+    name: Vixi Argorrok
+    images: [/static/characters/vixi_argorrok.png]
+    tags: [fox, kitsune]
+    description: Arctic kitsune of many multiples
+    ---
+    Welcome to my profile!
+
+Everything in it is optional; the name defaults to the title-cased filename.
+
+Usage:
+    from apps.characters.store import STORE
+
+    STORE.all()            # [Character, ...] sorted by display name
+    STORE.get("rhettan")   # Character or None
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from html import unescape
+
+import yaml
+from django.conf import settings
+from django.utils.html import strip_tags
+
+from snowsune.markdown_render import render as render_markdown
+
+logger = logging.getLogger(__name__)
+
+CHARACTER_DATA_DIR = os.path.join(settings.BASE_DIR, "apps", "characters", "char_data")
+CHECK_INTERVAL = 5  # seconds between looking at the files again
+FRONTMATTER_FENCE = "---"
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value]
+    return [str(value)]
+
+
+def parse_frontmatter(text):
+    """Split ``text`` into (frontmatter dict, markdown body)."""
+    lines = text.splitlines(keepends=True)
+    if not lines or lines[0].strip() != FRONTMATTER_FENCE:
+        return {}, text
+    for i, line in enumerate(lines[1:], start=1):
+        if line.strip() == FRONTMATTER_FENCE:
+            try:
+                meta = yaml.safe_load("".join(lines[1:i])) or {}
+            except yaml.YAMLError as e:
+                logger.warning(f"Ignoring unreadable character frontmatter: {e}")
+                return {}, text
+            if not isinstance(meta, dict):
+                return {}, text
+            return meta, "".join(lines[i + 1 :])
+    return {}, text
+
+
+class Character:
+    """One parsed and rendered character file."""
+
+    __slots__ = (
+        "name",
+        "display_name",
+        "images",
+        "tags",
+        "description",
+        "html",
+        "text",
+        "mtime_ns",
+        "last_modified",
+        "etag",
+    )
+
+    def __init__(self, name, raw, mtime_ns):
+        meta, body = parse_frontmatter(raw)
+        self.name = name
+        self.display_name = str(meta.get("name") or name.replace("_", " ").title())
+        self.images = _as_list(meta.get("images") or meta.get("image"))
+        self.tags = _as_list(meta.get("tags"))
+        self.html = render_markdown(body, "plain")
+        self.text = unescape(strip_tags(self.html))
+        self.description = str(meta.get("description") or "")
+        self.mtime_ns = mtime_ns
+        self.last_modified = datetime.fromtimestamp(
+            mtime_ns / 1e9, tz=timezone.utc
+        ).replace(microsecond=0)
+        self.etag = hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+class CharacterStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self._characters = {}  # name -> Character
+        self._sorted = []
+        self._checked = None  # time.monotonic() of the last look at the files
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            filenames = [f for f in os.listdir(self.directory) if f.endswith(".md")]
+        except FileNotFoundError:
+            filenames = []
+
+        characters = {}
+        for filename in filenames:
+            name = filename[:-3]
+            path = os.path.join(self.directory, filename)
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+                current = self._characters.get(name)
+                if current is None or current.mtime_ns != mtime_ns:
+                    with open(path, "r", encoding="utf-8") as f:
+                        current = Character(name, f.read(), mtime_ns)
+            except (OSError, UnicodeDecodeError) as e:
+                logger.warning(f"Skipping character file {path}: {e}")
+                continue
+            characters[name] = current
+
+        self._characters = characters
+        self._sorted = sorted(characters.values(), key=lambda c: c.display_name)
+
+    def _fresh(self):
+        return (
+            self._checked is not None
+            and time.monotonic() - self._checked < CHECK_INTERVAL
+        )
+
+    def _check(self):
+        if self._fresh():
+            return
+        with self._lock:
+            if not self._fresh():
+                self._refresh()
+                self._checked = time.monotonic()
+
+    def all(self):
+        self._check()
+        return self._sorted
+
+    def get(self, name):
+        self._check()
+        return self._characters.get(name)
+
+    def etag(self):
+        """Changes whenever any character is added, removed or edited."""
+        return hashlib.sha1(
+            "".join(f"{c.name}:{c.etag}" for c in self.all()).encode()
+        ).hexdigest()[:16]
+
+    def invalidate(self, reparse=False):
+        """
+        Look at the files again on the next access. ``reparse`` re-renders
+        every file, even ones whose mtime didn't change.
+        """
+        with self._lock:
+            if reparse:
+                self._characters = {}
+            self._checked = None
+
+
+STORE = CharacterStore(CHARACTER_DATA_DIR)
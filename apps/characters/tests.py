@@ -1,3 +1,106 @@
+import os
+import tempfile
+from unittest.mock import patch
+
 from django.test import TestCase
+from django.urls import reverse
+
+from . import store
+from .store import CharacterStore, parse_frontmatter
+
+
+class FrontmatterTests(TestCase):
+    def test_parses_frontmatter(self):
+        meta, body = parse_frontmatter("---\nname: Vixi\ntags: [fox]\n---\n# Hi\n")
+        self.assertEqual(meta, {"name": "Vixi", "tags": ["fox"]})
+        self.assertEqual(body, "# Hi\n")
+
+    def test_no_or_broken_frontmatter_is_all_body(self):
+        self.assertEqual(parse_frontmatter("# Hi\n"), ({}, "# Hi\n"))
+        self.assertEqual(parse_frontmatter("---\nnot closed"), ({}, "---\nnot closed"))
+        text = "---\n: [bad\n---\nBody"
+        with self.assertLogs("apps.characters.store", "WARNING"):
+            self.assertEqual(parse_frontmatter(text), ({}, text))
+
+
+class CharacterStoreTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = CharacterStore(self.tmp.name)
+        patcher = patch.object(store, "STORE", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # The views imported STORE by name
+        patcher = patch("apps.characters.views.STORE", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, name, text, mtime=None):
+        path = os.path.join(self.tmp.name, f"{name}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def test_parses_files_once_and_rerenders_on_mtime_change(self):
+        self.write(
+            "vixi_argorrok",
+            "---\nimages: /static/v.png\ntags: [fox, kitsune]\n---\n*Hi*",
+            mtime=1_000_000,
+        )
+        self.write("rhettan", "Boats.", mtime=1_000_000)
+
+        characters = self.store.all()
+        self.assertEqual([c.name for c in characters], ["rhettan", "vixi_argorrok"])
+        vixi = self.store.get("vixi_argorrok")
+        self.assertEqual(vixi.display_name, "Vixi Argorrok")
+        self.assertEqual(vixi.images, ["/static/v.png"])
+        self.assertEqual(vixi.tags, ["fox", "kitsune"])
+        self.assertEqual(vixi.html, "<p><em>Hi</em></p>")
+
+        # Within CHECK_INTERVAL nothing touches the disk
+        with patch("apps.characters.store.os.listdir") as listdir:
+            self.store.all()
+        listdir.assert_not_called()
+
+        self.write("vixi_argorrok", "---\nname: Vixi\n---\nBye", mtime=2_000_000)
+        self.store.invalidate()
+        with patch("apps.characters.store.Character", wraps=store.Character) as parse:
+            self.assertEqual(self.store.get("vixi_argorrok").display_name, "Vixi")
+        # Only the edited file was parsed again
+        parse.assert_called_once()
+        self.assertIs(self.store.get("rhettan"), characters[0])
+
+    def test_views_show_edits_without_conditional_headers(self):
+        self.write("rhettan", "Boats.")
+
+        response = self.client.get(reverse("character-list"))
+        self.assertContains(response, "Rhettan")
+        detail = self.client.get(reverse("character-detail", args=["rhettan"]))
+        self.assertContains(detail, "<p>Boats.</p>")
+        # The page around the character (notifications, messages) changes on
+        # its own, so the whole page must never be answered with a 304
+        for page in (response, detail):
+            self.assertFalse(page.has_header("ETag"))
+            self.assertFalse(page.has_header("Last-Modified"))
+
+        mtime = os.path.getmtime(os.path.join(self.tmp.name, "rhettan.md"))
+        self.write("rhettan", "Trains.", mtime=mtime + 10)
+        self.store.invalidate()
+        changed = self.client.get(reverse("character-detail", args=["rhettan"]))
+        self.assertContains(changed, "<p>Trains.</p>")
+
+    def test_unreadable_file_is_skipped(self):
+        self.write("rhettan", "Boats &amp; trains.")
+        with open(os.path.join(self.tmp.name, "broken.md"), "wb") as f:
+            f.write(b"\xff\xfe not utf-8")
+
+        with self.assertLogs("apps.characters.store", "WARNING"):
+            self.assertEqual([c.name for c in self.store.all()], ["rhettan"])
+        self.assertEqual(self.store.get("rhettan").text, "Boats & trains.")
 
-# Create your tests here.
+    def test_missing_character(self):
+        response = self.client.get(reverse("character-detail", args=["nobody"]))
+        self.assertContains(response, "Character Not Found")
+        self.assertFalse(response.has_header("ETag"))
@@ -1,55 +1,38 @@
 from django.shortcuts import render
-import os
-import markdown
-from django.conf import settings
 
-CHARACTER_DATA_DIR = os.path.join(settings.BASE_DIR, "apps", "characters", "char_data")
+from .store import STORE
 
 
 def character_list(request):
     """
-    Lists all character markdown files as links, properly formatting names.
+    Lists all characters as links, with their frontmatter image and tags.
     """
-
-    character_files = [
-        {
-            "filename": f.replace(".md", ""),
-            "display_name": f.replace(".md", "").replace("_", " ").title(),
-        }
-        for f in os.listdir(CHARACTER_DATA_DIR)
-        if f.endswith(".md")
-    ]
-
     return render(
         request,
         "characters/list.html",  # Correct template for listing characters
-        {"characters": character_files},  # Pass list of characters to template
+        {"characters": STORE.all()},  # Pass list of characters to template
     )
 
 
 def character_detail(request, char_name):
     """
-    Loads a character's markdown file, formats its name, and renders it.
+    Renders a character's (pre-rendered) markdown profile.
     """
-    char_path = os.path.join(CHARACTER_DATA_DIR, f"{char_name}.md")
+    character = STORE.get(char_name)
 
-    if not os.path.exists(char_path):
+    if character is None:
         return render(
             request,
             "characters/not_found.html",
             {"char_name": char_name.replace("_", " ").title()},
         )
 
-    with open(char_path, "r", encoding="utf-8") as f:
-        md_content = f.read()
-
-    html_content = markdown.markdown(md_content)
-
     return render(
         request,
         "characters/detail.html",
         {
-            "character_name": char_name.replace("_", " ").title(),
-            "content": html_content,
+            "character": character,
+            "character_name": character.display_name,
+            "content": character.html,
         },
     )
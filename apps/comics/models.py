@@ -4,8 +4,8 @@ from django.urls import reverse
 from django.utils import timezone
 from django.utils.html import strip_tags
 from django.utils.text import slugify
-import markdown
 from apps.blog.models import BlogPost
+from snowsune.markdown_render import render as render_markdown
 
 User = get_user_model()
 
@@ -100,9 +100,7 @@ class ComicPage(models.Model):
     def save(self, *args, **kwargs):
         # Generate HTML content from markdown
         if self.description:
-            self.description_html = markdown.markdown(
-                self.description, extensions=["extra", "codehilite", "toc"]
-            )
+            self.description_html = render_markdown(self.description)
         else:
             self.description_html = ""
 
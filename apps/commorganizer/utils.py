@@ -1,10 +1,9 @@
-import requests
+from snowsune.webhooks import enqueue
 
 
 def send_discord_webhook(webhook_url, message):
+    """Queue a Discord message, the send_webhooks worker delivers it."""
     try:
-        payload = {"content": message}
-        response = requests.post(webhook_url, json=payload, timeout=5)
-        response.raise_for_status()
+        enqueue(webhook_url, message)
     except Exception as e:
         print(f"Discord webhook failed: {e}")
@@ -2,7 +2,8 @@ from django.db import models
 from django.urls import reverse
 from django.utils.text import slugify
 from django.utils import timezone
-import markdown
+
+from snowsune.markdown_render import render as render_markdown
 
 
 class CustomPage(models.Model):
@@ -53,9 +54,7 @@ class CustomPage(models.Model):
     def save(self, *args, **kwargs):
         # Generate HTML content from markdown
         if self.content:
-            self.content_html = markdown.markdown(
-                self.content, extensions=["extra", "codehilite", "toc"]
-            )
+            self.content_html = render_markdown(self.content)
         else:
             self.content_html = ""
 
@@ -0,0 +1,34 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from snowsune.models import SiteSetting
+
+from .models import Quote
+
+
+class QuoteWebhookTests(TestCase):
+    def post(self, body):
+        return self.client.post(
+            reverse("quotes_api:webhook_receive"),
+            json.dumps(body),
+            content_type="application/json",
+        )
+
+    def test_unset_bot_key_rejects_everything(self):
+        for key in (None, ""):
+            response = self.post({"content": "Sneaky quote", "key": key})
+            self.assertEqual(response.status_code, 401)
+        response = self.post({"content": "No key at all"})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Quote.objects.exists())
+
+    def test_matching_bot_key_adds_quote(self):
+        SiteSetting.objects.create(key="BOT_CONNECTOR_KEY", value="iamnotacrook")
+
+        self.assertEqual(self.post({"content": "Hi", "key": "wrong"}).status_code, 401)
+        response = self.post({"content": "Hi", "user": "vixi", "key": "iamnotacrook"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Quote.objects.get().user, "vixi")
@@ -5,7 +5,7 @@ import json
 from datetime import datetime, timedelta
 from django.utils import timezone
 from .models import Quote
-from snowsune.models import SiteSetting
+from snowsune.site_settings import get_setting
 
 
 def cleanup_old_quotes():
@@ -61,7 +61,10 @@ def webhook_receive(request):
         discord_id = data.get("discord_id", "")
         bot_key = data.get("key", "")
 
-        if bot_key != SiteSetting.objects.get(key="BOT_CONNECTOR_KEY").value:
+        # get_setting() gives None when the key isn't set (or can't be
+        # loaded), which must not match a request that sends no key either
+        expected = get_setting("BOT_CONNECTOR_KEY")
+        if not expected or bot_key != expected:
             return JsonResponse({"error": "Invalid bot key"}, status=401)
 
         if not content:
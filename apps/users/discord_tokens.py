@@ -0,0 +1,112 @@
+"""
+Proactive Discord OAuth token refresh.
+
+get_discord_access_token() used to refresh an about-to-expire token inline,
+so a page load could block on Discord's OAuth endpoint. Now the
+refresh_discord_tokens command (cron, every 10 minutes) refreshes every
+token expiring within REFRESH_AHEAD, and request-time code only reads.
+
+A refresh is guarded by a cache lock per user, so two workers (or the cron
+job and an explicit auto_refresh) never spend the same refresh token twice:
+Discord rotates it on every refresh and the loser would get invalid_grant.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+REFRESH_AHEAD = timedelta(hours=2)
+BATCH_SIZE = 50
+LOCK_KEY = "discord_token_refresh:{user_id}"
+LOCK_TTL = 60
+# After a failed refresh, leave the user alone for this long
+FAILED_KEY = "discord_token_refresh_failed:{user_id}"
+FAILED_BACKOFF = 60 * 60
+
+TOKEN_FIELDS = [
+    "discord_access_token",
+    "discord_refresh_token",
+    "discord_token_expires",
+]
+
+
+def refresh_user(user, expires_before=None):
+    """
+    Refresh ``user``'s Discord token under the per-user lock.
+
+    Returns True if refreshed, False if the refresh failed and None if it was
+    skipped (another worker holds the lock, or the token was refreshed since
+    it was picked and now expires after ``expires_before``).
+    """
+    lock_key = LOCK_KEY.format(user_id=user.pk)
+    if not cache.add(lock_key, 1, LOCK_TTL):
+        return None
+
+    try:
+        # Someone may have refreshed it while we weren't holding the lock
+        user.refresh_from_db(fields=TOKEN_FIELDS)
+        expires = user.discord_token_expires
+        if expires_before and expires and expires >= expires_before:
+            return None
+
+        if user.refresh_discord_token():
+            cache.delete(FAILED_KEY.format(user_id=user.pk))
+            return True
+        cache.set(FAILED_KEY.format(user_id=user.pk), 1, FAILED_BACKOFF)
+        return False
+    finally:
+        cache.delete(lock_key)
+
+
+def due_user_ids(now=None, ahead=REFRESH_AHEAD):
+    """Ids of users whose token expires within ``ahead``, soonest first."""
+    now = now or timezone.now()
+    return list(
+        CustomUser.objects.exclude(discord_refresh_token__isnull=True)
+        .exclude(discord_refresh_token="")
+        .filter(
+            Q(discord_token_expires__lt=now + ahead)
+            | Q(discord_token_expires__isnull=True)
+        )
+        .order_by("discord_token_expires")
+        .values_list("pk", flat=True)
+    )
+
+
+def refresh_due(now=None, ahead=REFRESH_AHEAD, batch_size=BATCH_SIZE):
+    """
+    Refresh every token expiring within ``ahead``.
+
+    Returns a dict of counts: refreshed, failed, skipped.
+    """
+    now = now or timezone.now()
+    expires_before = now + ahead
+    counts = {"refreshed": 0, "failed": 0, "skipped": 0}
+
+    ids = due_user_ids(now, ahead)
+    backing_off = cache.get_many([FAILED_KEY.format(user_id=pk) for pk in ids])
+    ids = [pk for pk in ids if FAILED_KEY.format(user_id=pk) not in backing_off]
+    counts["skipped"] += len(backing_off)
+
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start : start + batch_size]
+        users = CustomUser.objects.only("pk", *TOKEN_FIELDS).in_bulk(batch)
+        for user in users.values():
+            result = refresh_user(user, expires_before)
+            if result is None:
+                counts["skipped"] += 1
+            elif result:
+                counts["refreshed"] += 1
+            else:
+                counts["failed"] += 1
+
+    if ids:
+        logger.info(f"Discord token refresh: {counts}")
+    return counts
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.users.discord_tokens import BATCH_SIZE, REFRESH_AHEAD, refresh_due
+
+
+class Command(BaseCommand):
+    help = "Refresh Discord OAuth tokens that expire soon (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead-minutes",
+            type=int,
+            default=int(REFRESH_AHEAD.total_seconds() // 60),
+            help="Refresh tokens expiring within this many minutes",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        counts = refresh_due(
+            ahead=timedelta(minutes=options["ahead_minutes"]),
+            batch_size=options["batch_size"],
+        )
+        style = self.style.ERROR if counts["failed"] else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"Discord tokens: {counts['refreshed']} refreshed, "
+                f"{counts['failed']} failed, {counts['skipped']} skipped"
+            )
+        )
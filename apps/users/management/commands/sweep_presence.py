@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.presence import backfill_from_sessions, sweep_expired
+
+
+class Command(BaseCommand):
+    help = "Expire stale logged-in presence rows (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="Seed presence rows by decoding every unexpired session (slow, one-off)",
+        )
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            created = backfill_from_sessions()
+            self.stdout.write(f"Backfilled {created} logged-in session(s)")
+
+        extended, removed = sweep_expired()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Presence sweep done: {extended} extended, {removed} removed"
+            )
+        )
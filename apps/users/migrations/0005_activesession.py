@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_customuser_email_verification_sent_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActiveSession',
+            fields=[
+                ('session_key', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('expire_date', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='active_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
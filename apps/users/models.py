@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.urls import reverse
@@ -29,12 +31,16 @@ class CustomUser(AbstractUser):
         "Discord Token Expires", blank=True, null=True
     )
 
-    def get_discord_access_token(self, auto_refresh=True):
+    def get_discord_access_token(self, auto_refresh=False):
         """
         Get decrypted Discord access token.
 
+        Tokens are refreshed ahead of expiry by the refresh_discord_tokens
+        command, so this normally only reads.
+
         Args:
-            auto_refresh: If this is true, we'll also do the auro-refresh thing
+            auto_refresh: If this is true, an expired or expiring token is
+                refreshed right now (blocking, under the refresh lock)
 
         Returns:
             Decrypted access token or None
@@ -42,14 +48,14 @@ class CustomUser(AbstractUser):
         if not self.discord_access_token:
             return None
 
-        # Check if token is expired and refresh if needed
         if auto_refresh and self.is_discord_token_expired():
-            if self.refresh_discord_token():
-                # Token refreshed successfully, continue with new token
-                pass
-            else:
-                # Refresh failed, return None
-                return None
+            from .discord_tokens import refresh_user
+
+            refresh_user(self)
+
+        if self.is_discord_token_expired(buffer=timedelta(0)):
+            # The refresher didn't get to it (or the refresh token is dead)
+            return None
 
         # Check cache first to avoid repeated decryption
         cache_key = f"user_{self.id}_discord_access_token"
@@ -92,16 +98,14 @@ class CustomUser(AbstractUser):
 
         self.discord_refresh_token = encrypt_token(token)
 
-    def is_discord_token_expired(self):
+    def is_discord_token_expired(self, buffer=timedelta(minutes=5)):
         """Check if Discord access token is expired or about to expire"""
         if not self.discord_token_expires:
             return True  # No expiry set, assume expired
 
         from django.utils import timezone
-        from datetime import timedelta
 
-        # Consider expired if less than 5 minutes remaining
-        buffer = timedelta(minutes=5)
+        # Consider expired if less than ``buffer`` remaining
         return timezone.now() >= (self.discord_token_expires - buffer)
 
     def refresh_discord_token(self):
@@ -111,11 +115,10 @@ class CustomUser(AbstractUser):
         Returns:
             True if refresh successful, False otherwise
         """
-        import requests
+        from snowsune import http_client
         import logging
         from django.conf import settings
         from django.utils import timezone
-        from datetime import timedelta
 
         logger = logging.getLogger(__name__)
 
@@ -133,7 +136,7 @@ class CustomUser(AbstractUser):
                 "refresh_token": refresh_token,
             }
 
-            response = requests.post(
+            response = http_client.post(
                 "https://discord.com/api/oauth2/token",
                 data=data,
                 headers={"Content-Type": "application/x-www-form-urlencoded"},
@@ -153,7 +156,13 @@ class CustomUser(AbstractUser):
             self.discord_token_expires = timezone.now() + timedelta(
                 seconds=token_data["expires_in"]
             )
-            self.save()
+            self.save(
+                update_fields=[
+                    "discord_access_token",
+                    "discord_refresh_token",
+                    "discord_token_expires",
+                ]
+            )
 
             logger.info(f"Successfully refreshed Discord token for user {self.id}")
             return True
@@ -198,3 +207,20 @@ class CustomUser(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class ActiveSession(models.Model):
+    """
+    One row per logged-in session, maintained by the login/logout signals in
+    presence.py. Lets /api/live/ count logged-in visitors with a single indexed
+    query instead of decoding every row of the django_session table.
+    """
+
+    session_key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="active_sessions"
+    )
+    expire_date = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.user} until {self.expire_date}"
@@ -0,0 +1,96 @@
+"""
+Presence tracking for logged-in users.
+
+The ActiveSession table mirrors just the logged-in rows of django_session:
+login inserts, logout deletes and ``sweep_presence`` (cron) drops or extends
+rows whose expiry has passed. Counting is then one indexed COUNT(*).
+"""
+
+import logging
+
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.contrib.sessions.models import Session
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ActiveSession
+
+logger = logging.getLogger(__name__)
+
+
+def active_session_count():
+    """Number of unexpired sessions that belong to a logged-in user."""
+    return ActiveSession.objects.filter(expire_date__gt=timezone.now()).count()
+
+
+def sweep_expired():
+    """
+    Remove presence rows whose session is gone or expired.
+
+    Django pushes a session's expire_date forward whenever the session is
+    modified, so rows that look expired get re-checked against django_session
+    (by primary key) and extended rather than dropped when still valid.
+
+    Returns (extended, removed).
+    """
+    now = timezone.now()
+    stale = ActiveSession.objects.filter(expire_date__lte=now)
+    keys = list(stale.values_list("session_key", flat=True))
+    if not keys:
+        return 0, 0
+
+    live = dict(
+        Session.objects.filter(session_key__in=keys, expire_date__gt=now).values_list(
+            "session_key", "expire_date"
+        )
+    )
+    for session_key, expire_date in live.items():
+        ActiveSession.objects.filter(session_key=session_key).update(
+            expire_date=expire_date
+        )
+
+    removed, _ = stale.exclude(session_key__in=live.keys()).delete()
+    return len(live), removed
+
+
+def backfill_from_sessions():
+    """
+    One-off full scan of django_session to seed the table (e.g. right after
+    deploying presence tracking). Decodes every session, so keep it out of
+    request paths.
+    """
+    now = timezone.now()
+    created = 0
+    for session in Session.objects.filter(expire_date__gt=now).iterator(chunk_size=500):
+        user_id = session.get_decoded().get("_auth_user_id")
+        if not user_id:
+            continue
+        ActiveSession.objects.update_or_create(
+            session_key=session.session_key,
+            defaults={"user_id": user_id, "expire_date": session.expire_date},
+        )
+        created += 1
+    return created
+
+
+@receiver(user_logged_in)
+def _track_login(sender, request, user, **kwargs):
+    session = getattr(request, "session", None)
+    if session is None or not session.session_key:
+        return
+    try:
+        ActiveSession.objects.update_or_create(
+            session_key=session.session_key,
+            defaults={"user": user, "expire_date": session.get_expiry_date()},
+        )
+    except Exception as e:
+        # Presence is just a counter, never block a login over it
+        logger.warning(f"Could not record presence for user {user.pk}: {e}")
+
+
+@receiver(user_logged_out)
+def _track_logout(sender, request, user, **kwargs):
+    session = getattr(request, "session", None)
+    if session is None or not session.session_key:
+        return
+    ActiveSession.objects.filter(session_key=session.session_key).delete()
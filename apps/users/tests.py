@@ -1,3 +1,115 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest.mock import Mock, patch
 
-# Create your tests here.
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .discord_tokens import refresh_due
+from .models import ActiveSession, CustomUser
+from .presence import active_session_count, sweep_expired
+
+
+class PresenceTrackingTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username="presence", password="testpass123"
+        )
+
+    def test_login_and_logout_update_count(self):
+        self.assertEqual(active_session_count(), 0)
+
+        self.client.login(username="presence", password="testpass123")
+        self.assertEqual(active_session_count(), 1)
+
+        self.client.post("/users/logout/")
+        self.assertEqual(active_session_count(), 0)
+
+    def test_sweep_removes_dead_and_extends_live_sessions(self):
+        past = timezone.now() - timedelta(minutes=1)
+        future = timezone.now() + timedelta(days=1)
+
+        Session.objects.create(session_key="live", session_data="", expire_date=future)
+        ActiveSession.objects.create(
+            session_key="live", user=self.user, expire_date=past
+        )
+        ActiveSession.objects.create(
+            session_key="gone", user=self.user, expire_date=past
+        )
+
+        extended, removed = sweep_expired()
+
+        self.assertEqual((extended, removed), (1, 1))
+        self.assertEqual(
+            ActiveSession.objects.get(session_key="live").expire_date, future
+        )
+        self.assertEqual(active_session_count(), 1)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class DiscordTokenRefreshTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = self.make_user("soon", timedelta(minutes=30))
+
+    def make_user(self, username, expires_in):
+        user = CustomUser.objects.create_user(username=username, password="x")
+        user.set_discord_access_token(f"{username}-access")
+        user.set_discord_refresh_token(f"{username}-refresh")
+        user.discord_token_expires = timezone.now() + expires_in
+        user.save()
+        return user
+
+    def token_response(self, status_code=200):
+        response = Mock(status_code=status_code, text="")
+        response.json.return_value = {
+            "access_token": "new-access",
+            "refresh_token": "new-refresh",
+            "expires_in": 7 * 24 * 3600,
+        }
+        return response
+
+    @patch("snowsune.http_client.post")
+    def test_request_time_reads_never_refresh(self, post):
+        self.user.discord_token_expires = timezone.now() + timedelta(minutes=1)
+        self.assertEqual(self.user.get_discord_access_token(), "soon-access")
+
+        self.user.discord_token_expires = timezone.now() - timedelta(minutes=1)
+        self.assertIsNone(self.user.get_discord_access_token())
+        post.assert_not_called()
+
+    @patch("snowsune.http_client.post")
+    def test_refresh_due_only_touches_expiring_tokens(self, post):
+        post.return_value = self.token_response()
+        later = self.make_user("later", timedelta(days=3))
+
+        counts = refresh_due()
+
+        self.assertEqual(counts, {"refreshed": 1, "failed": 0, "skipped": 0})
+        self.user.refresh_from_db()
+        later.refresh_from_db()
+        self.assertEqual(self.user.get_discord_access_token(), "new-access")
+        self.assertEqual(self.user.get_discord_refresh_token(), "new-refresh")
+        self.assertEqual(later.get_discord_access_token(), "later-access")
+
+        # Nothing is due any more
+        self.assertEqual(refresh_due()["refreshed"], 0)
+        self.assertEqual(post.call_count, 1)
+
+    @patch("snowsune.http_client.post")
+    def test_locked_user_is_skipped(self, post):
+        cache.add(f"discord_token_refresh:{self.user.pk}", 1, 60)
+
+        self.assertEqual(refresh_due()["skipped"], 1)
+        post.assert_not_called()
+
+    @patch("snowsune.http_client.post")
+    def test_failed_refresh_backs_off(self, post):
+        post.return_value = self.token_response(status_code=400)
+
+        self.assertEqual(refresh_due()["failed"], 1)
+        self.assertEqual(refresh_due()["skipped"], 1)
+        self.assertEqual(post.call_count, 1)
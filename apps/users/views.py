@@ -37,13 +37,9 @@ def send_new_user_webhook(user):
     """New user ping!"""
     try:
         # Get webhook URL from site settings
-        from snowsune.models import SiteSetting
+        from snowsune.site_settings import get_setting
 
-        webhook_setting = SiteSetting.objects.filter(key="moderator_webhook").first()
-        if not webhook_setting or not webhook_setting.value:
-            return  # No webhook configured
-
-        webhook_url = webhook_setting.value.strip()
+        webhook_url = (get_setting("moderator_webhook") or "").strip()
         if not webhook_url:
             return
 
@@ -3,11 +3,35 @@
 ./manage.py makemigrations
 ./manage.py migrate
 
-# Generate initial sitemap
-./manage.py ensure_sitemap
+# Only does anything when CACHE_URL=db://...
+./manage.py createcachetable
 
-# Add cron job to regenerate sitemap every hour
-echo "0 */6 * * * /app/manage.py ensure_sitemap >> /var/log/cron.log 2>&1" | crontab -
+# Render any missing social preview images
+./manage.py warm_social_previews
+
+# Initial calendar fetch (the API only reads what this stores)
+./manage.py sync_calendars
+
+# Catch the search index up with anything saved while signals weren't firing
+./manage.py rebuild_search_index
+
+# First species population snapshot for /fops/pop
+./manage.py snapshot_population
+
+# Cron jobs: deliver queued webhooks (the worker polls for ~55s each run),
+# sweep expired presence rows, refresh Discord tokens before they expire,
+# refresh calendars every 15 minutes, reindex edited character files for
+# search, count the species population hourly, backfill missing thumbnails
+# nightly
+printf '%s\n' \
+    "* * * * * /app/manage.py send_webhooks >> /var/log/cron.log 2>&1" \
+    "*/15 * * * * /app/manage.py sync_calendars >> /var/log/cron.log 2>&1" \
+    "*/10 * * * * /app/manage.py sweep_presence >> /var/log/cron.log 2>&1" \
+    "*/10 * * * * /app/manage.py refresh_discord_tokens >> /var/log/cron.log 2>&1" \
+    "*/10 * * * * /app/manage.py rebuild_search_index --kind character >> /var/log/cron.log 2>&1" \
+    "5 * * * * /app/manage.py snapshot_population >> /var/log/cron.log 2>&1" \
+    "30 3 * * * /app/manage.py generate_thumbnails >> /var/log/cron.log 2>&1" \
+    | crontab -
 
 # Start cron daemon
 service cron start
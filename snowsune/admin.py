@@ -1,5 +1,9 @@
+from urllib.parse import urlparse
+
 from django.contrib import admin
-from .models import SiteSetting
+from django.utils import timezone
+
+from .models import CalendarSource, OutboundWebhook, SiteSetting
 
 
 @admin.register(SiteSetting)
@@ -8,3 +12,70 @@ class SiteSettingAdmin(admin.ModelAdmin):
 
     list_display = ("key", "value")
     search_fields = ("key", "value")
+
+
+@admin.register(CalendarSource)
+class CalendarSourceAdmin(admin.ModelAdmin):
+    """Read-mostly view of the synced calendars (edit CALENDAR_SOURCES instead)."""
+
+    list_display = ("name", "url", "last_fetched_at", "last_expanded_at", "last_error")
+    readonly_fields = (
+        "etag",
+        "last_modified",
+        "last_fetched_at",
+        "last_expanded_at",
+        "last_error",
+    )
+    exclude = ("ics_data",)
+
+
+@admin.register(OutboundWebhook)
+class OutboundWebhookAdmin(admin.ModelAdmin):
+    """Queue status for outbound webhooks (delivered by send_webhooks)."""
+
+    list_display = (
+        "id",
+        "status",
+        "destination",
+        "summary",
+        "attempts",
+        "created_at",
+        "next_attempt_at",
+        "sent_at",
+        "last_status_code",
+    )
+    list_filter = ("status", "coalesce_key")
+    date_hierarchy = "created_at"
+    exclude = ("attachment",)
+    readonly_fields = (
+        "url",
+        "payload",
+        "attachment_name",
+        "coalesce_key",
+        "attempts",
+        "last_status_code",
+        "last_error",
+        "created_at",
+        "sent_at",
+    )
+    actions = ["retry_now"]
+
+    @admin.display(description="Destination")
+    def destination(self, obj):
+        # Webhook URLs carry their token, keep it out of the list page
+        return urlparse(obj.url).hostname
+
+    @admin.display(description="Message")
+    def summary(self, obj):
+        content = obj.payload.get("content", "")
+        return content if len(content) <= 80 else content[:77] + "..."
+
+    @admin.action(description="Retry selected webhooks now")
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=OutboundWebhook.SENT).update(
+            status=OutboundWebhook.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            last_error="",
+        )
+        self.message_user(request, f"{updated} webhook(s) queued for retry.")
@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class SnowsuneConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "snowsune"
+
+    def ready(self):
+        # Hooks up the SiteSetting cache invalidation signals
+        from . import site_settings  # noqa: F401
+
+        # Sitemap sections are invalidated from model signals
+        from . import sitemaps  # noqa: F401
+
+        # Keeps the full-text search index in step with the indexed models
+        from . import search  # noqa: F401
+
+        # Render thumbnails for every ImageField upload
+        from .thumbnails import connect_signals
+
+        connect_signals()
@@ -0,0 +1,66 @@
+"""
+File cache with atomic add() and incr().
+
+Django's FileBasedCache implements add() as has_key() + set() and incr() as
+get() + set(), so two workers can both "win" the same add() and increments
+get lost. The single-flight locks (live status, Discord client), the
+per-user Discord token refresh lock and the version counters (site settings,
+calendar events, sitemaps) all rely on those being atomic. FileCache runs
+both under an flock, which holds between every process on this host, and
+the file cache is never shared wider than that anyway.
+
+FileBasedCache also lists the whole cache directory on every set() to see
+whether it has to cull; FileCache only looks every CULL_CHECK_EVERY writes.
+
+Usage (what CACHE_URL=file://... configures, see settings.py):
+    CACHES = {
+        "default": {
+            "BACKEND": "snowsune.cache_backends.FileCache",
+            "LOCATION": "/tmp/snowsune_cache",
+        }
+    }
+"""
+
+import fcntl
+import os
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+
+LOCK_DIR = "locks"
+LOCK_STRIPES = 256  # keys share this many lock files
+CULL_CHECK_EVERY = 100
+
+
+class FileCache(FileBasedCache):
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._writes = 0
+
+    @contextmanager
+    def _locked(self, key, version):
+        # The lock files live in a subdirectory, out of reach of cull/clear
+        stripe = int(os.path.basename(self._key_to_file(key, version))[:8], 16)
+        lock_dir = os.path.join(self._dir, LOCK_DIR)
+        os.makedirs(lock_dir, 0o700, exist_ok=True)
+        path = os.path.join(lock_dir, f"{stripe % LOCK_STRIPES:02x}.lock")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # releases the flock
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked(key, version):
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._locked(key, version):
+            return super().incr(key, delta, version)
+
+    def _cull(self):
+        self._writes += 1
+        if self._writes % CULL_CHECK_EVERY == 1:
+            super()._cull()
@@ -0,0 +1,278 @@
+"""
+Calendar sync: fetch the configured ICS feeds and store their occurrences.
+
+The calendar API used to download and expand every ICS feed inside the
+request. Now the sync_calendars command (cron) does that work:
+
+1. CalendarSource rows are matched up with the CALENDAR_SOURCES site setting
+2. every feed is fetched concurrently, with ETag / Last-Modified so unchanged
+   feeds come back as a cheap 304
+3. changed feeds are parsed, recurrences expanded, and the occurrences
+   replace that source's CalendarEvent rows
+
+The API then only runs an indexed range query over CalendarEvent. Windows
+outside the stored range (someone paging a year ahead) get expanded from the
+stored ICS text for just that window, see views/calendar.py.
+"""
+
+import json
+import logging
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+
+import pytz
+import recurring_ical_events
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from icalendar import Calendar
+
+from . import http_client
+from .models import CalendarEvent, CalendarSource
+from .site_settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+FETCH_TIMEOUT = 10
+FETCH_WORKERS = 4
+USER_AGENT = "Snowsune Calendar Fetcher"
+
+# How far around "now" occurrences get expanded into the table. The calendar
+# pages rarely look further than this; anything else is expanded on demand.
+EXPAND_PAST_DAYS = 60
+EXPAND_FUTURE_DAYS = 180
+
+# Bumped whenever stored events change, part of every API window cache key
+EVENTS_VERSION_CACHE_KEY = "calendar_events_version"
+
+# Re-expand unchanged feeds this often so the window keeps moving forward
+REEXPAND_AFTER = timedelta(days=1)
+
+
+def get_calendar_sources():
+    """Get calendar sources from SiteSetting, with fallback to default"""
+    try:
+        value = get_setting("CALENDAR_SOURCES")
+        if value:
+            return json.loads(value)
+    except (json.JSONDecodeError, AttributeError):
+        pass
+
+    # Default
+    return []
+
+
+def get_events_version():
+    version = cache.get(EVENTS_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(EVENTS_VERSION_CACHE_KEY, time_module.time_ns(), None)
+        version = cache.get(EVENTS_VERSION_CACHE_KEY)
+    return version
+
+
+def invalidate_events_cache():
+    try:
+        cache.incr(EVENTS_VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(EVENTS_VERSION_CACHE_KEY, time_module.time_ns(), None)
+
+
+def stored_window(source):
+    """(start, end) datetimes the CalendarEvent rows of ``source`` cover."""
+    if source.last_expanded_at is None:
+        return None
+    # Same date truncation as store_occurrences
+    first = (source.last_expanded_at - timedelta(days=EXPAND_PAST_DAYS)).date()
+    last = (source.last_expanded_at + timedelta(days=EXPAND_FUTURE_DAYS)).date()
+    return (
+        pytz.UTC.localize(datetime.combine(first, time.min)),
+        pytz.UTC.localize(datetime.combine(last, time.min)),
+    )
+
+
+def sync_sources_from_settings():
+    """Create/update CalendarSource rows to match CALENDAR_SOURCES."""
+    configured = get_calendar_sources()
+    names = []
+    changed = False
+
+    for config in configured:
+        name = config.get("name")
+        url = config.get("url")
+        if not name or not url:
+            continue
+        names.append(name)
+
+        source, created = CalendarSource.objects.get_or_create(
+            name=name, defaults={"url": url}
+        )
+        color = config.get("color", "#3788d8")
+        if source.url != url:
+            # New feed, old validators and data no longer apply
+            source.url = url
+            source.etag = ""
+            source.last_modified = ""
+            source.ics_data = ""
+            changed = True
+        if source.color != color:
+            source.color = color
+            changed = True
+        source.save()
+
+    removed, _ = CalendarSource.objects.exclude(name__in=names).delete()
+    if removed or changed:
+        invalidate_events_cache()
+    return list(CalendarSource.objects.filter(name__in=names))
+
+
+def fetch_source(source):
+    """
+    Conditional GET for one source. Runs in a worker thread, so it only
+    touches the network, never the database.
+
+    Returns a dict with status, content, etag, last_modified and error.
+    """
+    headers = {"User-Agent": USER_AGENT}
+    if source.etag:
+        headers["If-None-Match"] = source.etag
+    if source.last_modified:
+        headers["If-Modified-Since"] = source.last_modified
+
+    try:
+        response = http_client.get(source.url, timeout=FETCH_TIMEOUT, headers=headers)
+        if response.status_code == 304:
+            return {"status": 304, "error": ""}
+        response.raise_for_status()
+        return {
+            "status": response.status_code,
+            "content": response.text,
+            "etag": response.headers.get("ETag", ""),
+            "last_modified": response.headers.get("Last-Modified", ""),
+            "error": "",
+        }
+    except Exception as e:
+        return {"status": None, "error": str(e)}
+
+
+def _parse_datetime(dt_value):
+    """Turn an iCalendar DTSTART/DTEND into (aware datetime, is_all_day)."""
+    if dt_value is None:
+        return None, False
+
+    dt = dt_value.dt if hasattr(dt_value, "dt") else dt_value
+
+    # Date-only values are all-day events
+    if isinstance(dt, date) and not isinstance(dt, datetime):
+        return pytz.UTC.localize(datetime.combine(dt, time.min)), True
+    if isinstance(dt, datetime):
+        if not dt.tzinfo:
+            dt = pytz.UTC.localize(dt)
+        return dt, False
+
+    return None, False
+
+
+def expand_occurrences(ics_data, window_start, window_end):
+    """Parse ICS text and return event dicts for occurrences in the window."""
+    cal = Calendar.from_ical(ics_data)
+    occurrences = []
+
+    for component in recurring_ical_events.of(cal).between(window_start, window_end):
+        start, all_day = _parse_datetime(component.get("dtstart"))
+        if start is None:
+            continue
+        end, _ = _parse_datetime(component.get("dtend"))
+
+        occurrences.append(
+            {
+                "title": str(component.get("summary", "No Title"))[:500],
+                "start": start,
+                "end": end,
+                "all_day": all_day,
+                "description": str(component.get("description", "")),
+                "location": str(component.get("location", "")),
+                "url": str(component.get("url", "")),
+            }
+        )
+
+    return occurrences
+
+
+def store_occurrences(source, now=None):
+    """Re-expand a source's stored ICS and replace its CalendarEvent rows."""
+    now = now or timezone.now()
+    occurrences = expand_occurrences(
+        source.ics_data,
+        (now - timedelta(days=EXPAND_PAST_DAYS)).date(),
+        (now + timedelta(days=EXPAND_FUTURE_DAYS)).date(),
+    )
+
+    with transaction.atomic():
+        source.events.all().delete()
+        CalendarEvent.objects.bulk_create(
+            [CalendarEvent(source=source, **occ) for occ in occurrences],
+            batch_size=500,
+        )
+        source.last_expanded_at = now
+        source.save(update_fields=["last_expanded_at"])
+
+    invalidate_events_cache()
+    return len(occurrences)
+
+
+def sync_calendars(force=False):
+    """
+    Fetch every configured calendar (in parallel) and refresh the store.
+
+    Returns a list of (source name, outcome) tuples for reporting.
+    """
+    sources = sync_sources_from_settings()
+    if not sources:
+        return []
+
+    if force:
+        for source in sources:
+            source.etag = ""
+            source.last_modified = ""
+
+    with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(sources))) as pool:
+        results = list(pool.map(fetch_source, sources))
+
+    now = timezone.now()
+    report = []
+    for source, result in zip(sources, results):
+        source.last_fetched_at = now
+        source.last_error = result["error"]
+
+        if result["error"]:
+            logger.error(f"Error fetching calendar {source.name}: {result['error']}")
+            source.save(update_fields=["last_fetched_at", "last_error"])
+            report.append((source.name, f"error: {result['error']}"))
+            continue
+
+        if result["status"] == 304:
+            source.save(update_fields=["last_fetched_at", "last_error"])
+            stale = (
+                source.last_expanded_at is None
+                or now - source.last_expanded_at > REEXPAND_AFTER
+            )
+            if not (stale and source.ics_data):
+                report.append((source.name, "not modified"))
+                continue
+        else:
+            source.ics_data = result["content"]
+            source.etag = result["etag"]
+            source.last_modified = result["last_modified"]
+            source.save()
+
+        try:
+            count = store_occurrences(source, now=now)
+            report.append((source.name, f"{count} occurrence(s)"))
+        except Exception as e:
+            logger.error(f"Error parsing calendar {source.name}: {e}")
+            source.last_error = str(e)
+            source.save(update_fields=["last_error"])
+            report.append((source.name, f"error: {e}"))
+
+    return report
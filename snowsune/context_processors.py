@@ -6,7 +6,7 @@ from django.utils.safestring import mark_safe
 from datetime import datetime, date
 from django.utils import timezone as django_timezone
 
-from .models import SiteSetting
+from .site_settings import get_setting
 
 
 # Returns the git version directly
@@ -38,34 +38,19 @@ def expiry_links(request):
 
 
 # Quick processor for the discord invite link
-# TODO: Could be made generic for all SiteSettings
+# (all of these share one cached SiteSetting snapshot, see site_settings.py)
 def discord_invite_link(request):
-    invite = SiteSetting.objects.filter(key="discord_invite").first()
-    return {"discord_invite": invite.value if invite else ""}
+    return {"discord_invite": get_setting("discord_invite", "")}
 
 
 def ko_fi_url(request):
     """Add Ko-fi URL to all template contexts"""
-    try:
-        ko_fi_setting = SiteSetting.objects.filter(key="KO_FI_URL").first()
-        ko_fi_url = (
-            ko_fi_setting.value if ko_fi_setting else "https://ko-fi.com/snowsune"
-        )
-    except:
-        ko_fi_url = "https://ko-fi.com/snowsune"
-
-    return {"ko_fi_url": ko_fi_url}
+    return {"ko_fi_url": get_setting("KO_FI_URL", "https://ko-fi.com/snowsune")}
 
 
 def google_analytics_id(request):
     """Add Google Analytics tag to all template contexts"""
-    try:
-        ga_setting = SiteSetting.objects.filter(key="GOOGLE_TAG").first()
-        google_tag = ga_setting.value if ga_setting else None
-    except:
-        google_tag = None
-
-    return {"google_tag": google_tag}
+    return {"google_tag": get_setting("GOOGLE_TAG")}
 
 
 def seasonal_css(request):
@@ -1,18 +1,53 @@
-from cryptography.fernet import Fernet
-from django.conf import settings
-import hashlib
+"""
+Encryption for secrets stored in the database (Discord tokens).
+
+The Fernet keys are derived from SECRET_KEY once per process, not on every
+call. Old keys listed in SECRET_KEY_FALLBACKS can still decrypt, so the
+SECRET_KEY can be rotated:
+
+1. set SECRET_KEY to the new key and put the old one in SECRET_KEY_FALLBACKS
+2. run `./manage.py reencrypt_tokens` to re-encrypt everything with the new key
+3. drop the old key from SECRET_KEY_FALLBACKS
+
+`./manage.py benchmark_encryption` shows the per-call cost.
+"""
+
 import base64
+import hashlib
+from functools import lru_cache
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from django.conf import settings
+
+
+def derive_key(secret):
+    """Fernet key for a SECRET_KEY: urlsafe base64 of its SHA-256."""
+    return base64.urlsafe_b64encode(hashlib.sha256(secret.encode("utf-8")).digest())
 
 
 def get_encryption_key():
     """Generate encryption key from Django SECRET_KEY"""
-    # Uses Django's SECRET_KEY to create a consistent encryption key
-    secret = settings.SECRET_KEY.encode("utf-8")
-    # Hash the secret key to get a 32-byte key for Fernet
-    key = hashlib.sha256(secret).digest()
-    # Encode as base64 for Fernet
-    encoded_key = base64.urlsafe_b64encode(key)
-    return encoded_key
+    return derive_key(settings.SECRET_KEY)
+
+
+@lru_cache(maxsize=8)
+def _fernet(secret):
+    return Fernet(derive_key(secret))
+
+
+@lru_cache(maxsize=4)
+def _cipher(secret, fallbacks):
+    return MultiFernet([_fernet(key) for key in (secret, *fallbacks)])
+
+
+def get_cipher():
+    """
+    The process-wide MultiFernet: encrypts with SECRET_KEY, decrypts with it
+    or any of SECRET_KEY_FALLBACKS. Keyed on the settings, so changing them
+    (tests, override_settings) never reuses a stale cipher.
+    """
+    fallbacks = tuple(getattr(settings, "SECRET_KEY_FALLBACKS", ()))
+    return _cipher(settings.SECRET_KEY, fallbacks)
 
 
 def encrypt_token(token):
@@ -26,10 +61,7 @@ def encrypt_token(token):
         return token
 
     try:
-        key = get_encryption_key()
-        f = Fernet(key)
-        encrypted = f.encrypt(token.encode()).decode()
-        return encrypted
+        return get_cipher().encrypt(token.encode()).decode()
     except Exception as e:
         return None
 
@@ -45,9 +77,31 @@ def decrypt_token(encrypted_token):
         return encrypted_token
 
     try:
-        key = get_encryption_key()
-        f = Fernet(key)
-        decrypted = f.decrypt(encrypted_token.encode()).decode()
-        return decrypted
+        return get_cipher().decrypt(encrypted_token.encode()).decode()
     except Exception as e:
         return None
+
+
+def needs_rotation(encrypted_token):
+    """True if a stored token isn't encrypted with the current SECRET_KEY."""
+    if not encrypted_token or settings.DEBUG:
+        return False
+    try:
+        _fernet(settings.SECRET_KEY).decrypt(encrypted_token.encode())
+        return False
+    except InvalidToken:
+        return True
+
+
+def rotate_token(encrypted_token):
+    """
+    Re-encrypt a stored token with the current SECRET_KEY.
+
+    Returns the new ciphertext, or None if no known key can decrypt it.
+    """
+    if not encrypted_token or settings.DEBUG:
+        return encrypted_token
+    try:
+        return get_cipher().rotate(encrypted_token.encode()).decode()
+    except InvalidToken:
+        return None
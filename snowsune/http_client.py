@@ -0,0 +1,141 @@
+"""
+Shared outbound HTTP client.
+
+Every integration (Discord, Home Assistant, calendar feeds, webhooks) used to
+call requests.get/post directly: a new TCP + TLS handshake per call and, for
+the Discord API, no timeout at all. Everything goes through here instead:
+
+- one requests.Session (and so one keep-alive connection pool) per host
+- a default (connect, read) timeout, so a hung upstream can't pin a worker
+- retries with backoff for idempotent requests on connection errors and
+  502/503/504 (POSTs are never retried here, the webhook queue does that)
+- per-host call counts and latency, see stats(); slow calls get logged
+
+Usage:
+    from snowsune import http_client
+
+    response = http_client.get(url, headers=..., timeout=5)
+
+The responses and exceptions are plain requests ones.
+"""
+
+import logging
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+POOL_MAXSIZE = 10  # connections kept per host
+SLOW_CALL_SECONDS = 2.0
+USER_AGENT = "snowsune.net (+https://snowsune.net)"
+
+RETRY = Retry(
+    total=2,
+    connect=2,
+    read=1,
+    status=2,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+    backoff_factor=0.3,
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+_sessions = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def _host(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _new_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=RETRY
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    # Sessions are shared by every caller of a host (bot token and user
+    # tokens alike), so don't let cookies leak between them
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_session(url):
+    """The shared Session for ``url``'s scheme + host."""
+    host = _host(url)
+    session = _sessions.get(host)
+    if session is None:
+        with _lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = _sessions[host] = _new_session()
+    return session
+
+
+def _record(host, elapsed, status):
+    with _lock:
+        entry = _stats.setdefault(
+            host,
+            {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0},
+        )
+        entry["calls"] += 1
+        entry["total_seconds"] += elapsed
+        entry["max_seconds"] = max(entry["max_seconds"], elapsed)
+        if status is None or status >= 500:
+            entry["errors"] += 1
+
+
+def request(method, url, **kwargs):
+    """requests.request() through the pooled session for ``url``'s host."""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    host = _host(url)
+    status = None
+    start = time.monotonic()
+    try:
+        response = get_session(url).request(method, url, **kwargs)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.monotonic() - start
+        _record(host, elapsed, status)
+        if elapsed >= SLOW_CALL_SECONDS:
+            logger.warning(f"Slow {method} {host}: {elapsed:.2f}s (status {status})")
+        else:
+            logger.debug(f"{method} {host}: {elapsed * 1000:.0f}ms (status {status})")
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def stats():
+    """
+    Per-host call stats for this process:
+    {host: {"calls", "errors", "avg_ms", "max_ms"}}
+    """
+    with _lock:
+        return {
+            host: {
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "avg_ms": round(entry["total_seconds"] * 1000 / entry["calls"], 1),
+                "max_ms": round(entry["max_seconds"] * 1000, 1),
+            }
+            for host, entry in _stats.items()
+        }
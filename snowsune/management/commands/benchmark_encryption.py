@@ -0,0 +1,36 @@
+import timeit
+
+from cryptography.fernet import Fernet
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from snowsune.encryption import derive_key, get_cipher
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark token decryption: per-call key derivation vs cached cipher"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        number = options["number"]
+        token = get_cipher().encrypt(b"x" * 30)  # About a Discord access token
+
+        def per_call():
+            # What decrypt_token used to do on every call
+            Fernet(derive_key(settings.SECRET_KEY)).decrypt(token)
+
+        def cached():
+            get_cipher().decrypt(token)
+
+        def setup_only():
+            Fernet(derive_key(settings.SECRET_KEY))
+
+        for name, func in [
+            ("derive + Fernet() only", setup_only),
+            ("decrypt, key derived per call", per_call),
+            ("decrypt, cached cipher", cached),
+        ]:
+            seconds = min(timeit.repeat(func, number=number, repeat=3))
+            self.stdout.write(f"{name:32} {seconds / number * 1e6:8.2f} µs/call")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from snowsune.thumbnails import generate_derivatives, iter_image_names
+
+
+class Command(BaseCommand):
+    help = "Render missing thumbnail derivatives for every uploaded image"
+
+    def handle(self, *args, **options):
+        images = rendered = failed = 0
+
+        for name in iter_image_names():
+            images += 1
+            try:
+                rendered += generate_derivatives(name)
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"Failed {name}: {e}"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Thumbnails: {rendered} rendered for {images} image(s), {failed} failed"
+            )
+        )
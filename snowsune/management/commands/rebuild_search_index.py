@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from snowsune import search
+
+
+class Command(BaseCommand):
+    help = "Reindex blog posts, comic pages, custom pages and characters for search"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            action="append",
+            choices=search.KINDS,
+            help="Only rebuild this kind (repeatable, default: all)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Reindex character files even if they haven't changed",
+        )
+
+    def handle(self, *args, **options):
+        counts = search.rebuild(options["kind"], force=options["force"])
+        for kind, indexed in counts.items():
+            self.stdout.write(self.style.SUCCESS(f"{kind}: {indexed} indexed"))
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from snowsune.encryption import needs_rotation, rotate_token
+
+TOKEN_FIELDS = ["discord_access_token", "discord_refresh_token"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encrypt stored Discord tokens with the current SECRET_KEY "
+        "(after moving the old key to SECRET_KEY_FALLBACKS)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be re-encrypted",
+        )
+
+    def handle(self, *args, **options):
+        users = (
+            get_user_model()
+            .objects.filter(
+                Q(discord_access_token__isnull=False)
+                | Q(discord_refresh_token__isnull=False)
+            )
+            .only("pk", *TOKEN_FIELDS)
+        )
+
+        rotated = unreadable = skipped = 0
+        for user in users.iterator():
+            old, new = {}, {}
+            for field in TOKEN_FIELDS:
+                value = getattr(user, field)
+                if not needs_rotation(value):
+                    continue
+                new_value = rotate_token(value)
+                if new_value is None:
+                    unreadable += 1
+                    self.stdout.write(
+                        self.style.ERROR(
+                            f"User {user.pk}: {field} can't be decrypted with any key"
+                        )
+                    )
+                    continue
+                old[field] = value
+                new[field] = new_value
+
+            if not new:
+                continue
+            if not options["dry_run"]:
+                # Only if refresh_discord_tokens hasn't replaced the tokens
+                # since we read them, or we'd write the old grant back
+                updated = users.model.objects.filter(pk=user.pk, **old).update(**new)
+                if not updated:
+                    skipped += 1
+                    self.stdout.write(
+                        f"User {user.pk}: tokens changed while rotating, skipped"
+                    )
+                    continue
+            rotated += len(new)
+
+        verb = "Would re-encrypt" if options["dry_run"] else "Re-encrypted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {rotated} token(s), {unreadable} unreadable, "
+                f"{skipped} user(s) changed meanwhile"
+            )
+        )
@@ -0,0 +1,52 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from snowsune import search
+from snowsune.markdown_render import RENDERED_FIELDS, render_uncached
+
+BATCH_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-render every stored markdown *_html field "
+        "(after changing the markdown extensions or their config)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rows would change",
+        )
+
+    def handle(self, *args, **options):
+        reindex = []
+        for label, source, target, preset in RENDERED_FIELDS:
+            model = apps.get_model(label)
+            changed = []
+            total = 0
+            rows = model.objects.only("pk", source, target).iterator(BATCH_SIZE)
+            for obj in rows:
+                total += 1
+                text = getattr(obj, source)
+                html = render_uncached(text, preset) if text else ""
+                if html != getattr(obj, target):
+                    setattr(obj, target, html)
+                    changed.append(obj)
+
+            if changed and not options["dry_run"]:
+                # Straight to the table: save() would re-run webhooks and
+                # such, and nothing else about these rows changed
+                model.objects.bulk_update(changed, [target], batch_size=BATCH_SIZE)
+                if model in search.KIND_FOR_MODEL:
+                    reindex.append(search.KIND_FOR_MODEL[model])
+
+            verb = "would change" if options["dry_run"] else "re-rendered"
+            self.stdout.write(
+                self.style.SUCCESS(f"{label}.{target}: {len(changed)}/{total} {verb}")
+            )
+
+        # bulk_update skips the signals that keep the search index current
+        if reindex:
+            search.rebuild(reindex)
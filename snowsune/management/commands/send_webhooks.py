@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from snowsune.webhooks import process_due, purge_finished
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbound webhooks (see snowsune/webhooks.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Deliver what's due right now and exit",
+        )
+        parser.add_argument(
+            "--max-runtime",
+            type=int,
+            default=55,
+            help="Keep polling for this many seconds (default 55, fits a 1 minute cron)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_finished()
+        if purged:
+            self.stdout.write(f"Purged {purged} finished webhook(s)")
+
+        rate_limits = {}
+        totals = {"sent": 0, "retried": 0, "failed": 0, "deferred": 0}
+        stop_at = time.monotonic() + options["max_runtime"]
+
+        while True:
+            counts = process_due(rate_limits)
+            for key, value in counts.items():
+                totals[key] += value
+
+            if options["once"] or time.monotonic() >= stop_at:
+                break
+            if not any(counts.values()):
+                time.sleep(options["interval"])
+
+        summary = ", ".join(f"{value} {key}" for key, value in totals.items())
+        if totals["failed"]:
+            self.stdout.write(self.style.ERROR(f"Webhooks: {summary}"))
+        elif any(totals.values()):
+            self.stdout.write(self.style.SUCCESS(f"Webhooks: {summary}"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from snowsune.calendar_sync import sync_calendars
+
+
+class Command(BaseCommand):
+    help = "Fetch the CALENDAR_SOURCES ICS feeds and store their events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Ignore ETag/Last-Modified and re-download every feed",
+        )
+
+    def handle(self, *args, **options):
+        report = sync_calendars(force=options["force"])
+        if not report:
+            self.stdout.write("No calendar sources configured")
+            return
+
+        for name, outcome in report:
+            if outcome.startswith("error"):
+                self.stdout.write(self.style.ERROR(f"{name}: {outcome}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name}: {outcome}"))
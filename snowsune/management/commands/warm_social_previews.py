@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+
+from apps.blog.models import BlogPost
+from apps.comics.models import ComicPage
+from apps.custompages.models import CustomPage
+from snowsune.views.image_utils import (
+    get_or_create_social_preview,
+    get_preview_cache_path,
+)
+
+import os
+
+
+class Command(BaseCommand):
+    help = "Pre-render /format_preview/ images for published content"
+
+    def _image_names(self):
+        yield from (
+            BlogPost.objects.filter(status="published")
+            .exclude(featured_image="")
+            .exclude(featured_image__isnull=True)
+            .values_list("featured_image", flat=True)
+            .iterator()
+        )
+        yield from (
+            CustomPage.objects.filter(is_published=True)
+            .exclude(preview_image="")
+            .exclude(preview_image__isnull=True)
+            .values_list("preview_image", flat=True)
+            .iterator()
+        )
+        yield from (
+            ComicPage.published.exclude(image="")
+            .values_list("image", flat=True)
+            .iterator()
+        )
+
+    def handle(self, *args, **options):
+        created = existing = failed = 0
+
+        for name in set(self._image_names()):
+            cache_path = get_preview_cache_path(name)
+            if cache_path and os.path.exists(cache_path):
+                existing += 1
+                continue
+
+            try:
+                if get_or_create_social_preview(name):
+                    created += 1
+                else:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f"Skipped {name}"))
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"Failed {name}: {e}"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Previews: {created} rendered, {existing} already cached, {failed} failed"
+            )
+        )
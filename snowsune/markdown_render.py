@@ -0,0 +1,99 @@
+"""
+Shared markdown rendering.
+
+Blog posts, comic pages, custom pages and book club blurbs each used to call
+markdown.markdown() on every save, building a fresh Markdown instance (and
+loading its extensions) every time. Now each thread keeps one configured
+Markdown per preset and reuses it, and the rendered HTML is cached under a
+hash of the source plus the preset's version, so re-saving unchanged text
+is a cache hit.
+
+The version covers the extension list, their configs, the markdown package
+version and RENDER_VERSION, so changing any of them stops old HTML from
+being served. The HTML already stored in the models' *_html fields doesn't
+change by itself though: run `./manage.py rerender_markdown` for that.
+
+Usage:
+    from snowsune.markdown_render import render
+
+    html = render(post.content)            # extra, codehilite, toc
+    html = render(comic.blurb, "blurb")    # extra, codehilite
+"""
+
+import hashlib
+import json
+import threading
+
+import markdown
+from django.core.cache import cache
+
+# Bump when output should change without the extension config changing
+RENDER_VERSION = 1
+
+PRESETS = {
+    "default": {"extensions": ["extra", "codehilite", "toc"], "configs": {}},
+    "blurb": {"extensions": ["extra", "codehilite"], "configs": {}},
+    "plain": {"extensions": [], "configs": {}},
+}
+
+# (app label.model, source field, rendered field, preset) for every stored
+# rendering, used by rerender_markdown
+RENDERED_FIELDS = [
+    ("blog.BlogPost", "content", "content_html", "default"),
+    ("comics.ComicPage", "description", "description_html", "default"),
+    ("custompages.CustomPage", "content", "content_html", "default"),
+    ("bookclub.MonthlyComic", "blurb", "blurb_html", "blurb"),
+]
+
+CACHE_KEY = "markdown:{version}:{digest}"
+CACHE_TTL = 60 * 60 * 24 * 7
+
+_local = threading.local()
+_versions = {}
+
+
+def preset_version(preset="default"):
+    """Short hash identifying what ``preset`` renders with."""
+    if preset not in _versions:
+        config = PRESETS[preset]
+        _versions[preset] = hashlib.sha256(
+            json.dumps(
+                [RENDER_VERSION, markdown.__version__, config], sort_keys=True
+            ).encode()
+        ).hexdigest()[:12]
+    return _versions[preset]
+
+
+def _converter(preset):
+    converters = getattr(_local, "converters", None)
+    if converters is None:
+        converters = _local.converters = {}
+    md = converters.get(preset)
+    if md is None:
+        config = PRESETS[preset]
+        md = converters[preset] = markdown.Markdown(
+            extensions=config["extensions"],
+            extension_configs=config["configs"],
+        )
+    return md
+
+
+def render_uncached(text, preset="default"):
+    # reset() clears per-document state such as toc and footnotes
+    return _converter(preset).reset().convert(text)
+
+
+def render(text, preset="default"):
+    """HTML for markdown ``text`` rendered with ``preset``."""
+    if not text:
+        return ""
+
+    key = CACHE_KEY.format(
+        version=preset_version(preset),
+        digest=hashlib.sha256(text.encode()).hexdigest(),
+    )
+    html = cache.get(key)
+    if html is None:
+        html = render_uncached(text, preset)
+        cache.set(key, html, CACHE_TTL)
+    return html
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snowsune', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarSource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('url', models.URLField(max_length=500)),
+                ('color', models.CharField(default='#3788d8', max_length=20)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=100)),
+                ('ics_data', models.TextField(blank=True)),
+                ('last_fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('last_expanded_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CalendarEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=500)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField(blank=True, null=True)),
+                ('all_day', models.BooleanField(default=False)),
+                ('description', models.TextField(blank=True)),
+                ('location', models.TextField(blank=True)),
+                ('url', models.TextField(blank=True)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='snowsune.calendarsource')),
+            ],
+            options={
+                'ordering': ['start'],
+                'indexes': [models.Index(fields=['start'], name='snowsune_ca_start_f9c225_idx'), models.Index(fields=['source', 'start'], name='snowsune_ca_source__3ff168_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snowsune', '0004_calendarsource_calendarevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundWebhook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500)),
+                ('payload', models.JSONField(default=dict)),
+                ('attachment', models.BinaryField(blank=True, null=True)),
+                ('attachment_name', models.CharField(blank=True, max_length=255)),
+                ('coalesce_key', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed'), ('superseded', 'Superseded')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='snowsune_ou_status_c32462_idx'), models.Index(fields=['status', 'created_at'], name='snowsune_ou_status_e8ed47_idx')],
+            },
+        ),
+    ]
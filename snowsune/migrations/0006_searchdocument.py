@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+TABLE = "snowsune_searchdocument"
+FTS_TABLE = "snowsune_searchdocument_fts"
+
+POSTGRES_FORWARD = [
+    f"""
+    ALTER TABLE {TABLE} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(tags, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'C')
+    ) STORED
+    """,
+    f"CREATE INDEX {TABLE}_search_vector ON {TABLE} USING GIN (search_vector)",
+]
+POSTGRES_REVERSE = [
+    f"DROP INDEX IF EXISTS {TABLE}_search_vector",
+    f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector",
+]
+
+# External content FTS5 table, kept in step with the real table by triggers
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, tags, body,
+        content='{TABLE}', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, tags, body)
+        VALUES (new.id, new.title, new.tags, new.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, tags, body)
+        VALUES ('delete', old.id, old.title, old.tags, old.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {TABLE}_au AFTER UPDATE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, tags, body)
+        VALUES ('delete', old.id, old.title, old.tags, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, tags, body)
+        VALUES (new.id, new.title, new.tags, new.body);
+    END
+    """,
+]
+SQLITE_REVERSE = [
+    f"DROP TRIGGER IF EXISTS {TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+# Other databases get no full-text index, snowsune.search falls back to
+# icontains over the documents there
+add_fulltext_index = _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD})
+remove_fulltext_index = _run(
+    {"postgresql": POSTGRES_REVERSE, "sqlite": SQLITE_REVERSE}
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snowsune', '0005_outboundwebhook'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.CharField(max_length=200)),
+                ('title', models.CharField(max_length=300)),
+                ('tags', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+                ('url', models.CharField(max_length=500)),
+                ('visible_from', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(add_fulltext_index, remove_fulltext_index),
+    ]
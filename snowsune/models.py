@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class SiteSetting(models.Model):
@@ -16,3 +17,130 @@ class SiteSetting(models.Model):
 
     def __str__(self):
         return f"{self.key}: {self.value}"
+
+
+class CalendarSource(models.Model):
+    """
+    An ICS feed from the CALENDAR_SOURCES site setting. Kept in sync (and
+    fetched) by the sync_calendars command, see snowsune/calendar_sync.py.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    url = models.URLField(max_length=500)
+    color = models.CharField(max_length=20, default="#3788d8")
+
+    # Conditional GET bookkeeping
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    ics_data = models.TextField(blank=True)
+
+    last_fetched_at = models.DateTimeField(null=True, blank=True)
+    last_expanded_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class CalendarEvent(models.Model):
+    """A single (already recurrence-expanded) occurrence from a CalendarSource."""
+
+    source = models.ForeignKey(
+        CalendarSource, on_delete=models.CASCADE, related_name="events"
+    )
+    title = models.CharField(max_length=500)
+    start = models.DateTimeField()
+    end = models.DateTimeField(null=True, blank=True)
+    all_day = models.BooleanField(default=False)
+    description = models.TextField(blank=True)
+    location = models.TextField(blank=True)
+    url = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["start"]
+        indexes = [
+            models.Index(fields=["start"]),
+            models.Index(fields=["source", "start"]),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.start})"
+
+
+class OutboundWebhook(models.Model):
+    """
+    A queued Discord webhook post. Request code only inserts these (see
+    snowsune/webhooks.py), the send_webhooks worker does the HTTP.
+    """
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    SUPERSEDED = "superseded"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+        (SUPERSEDED, "Superseded"),
+    ]
+
+    url = models.URLField(max_length=500)
+    payload = models.JSONField(default=dict)
+    attachment = models.BinaryField(null=True, blank=True)
+    attachment_name = models.CharField(max_length=255, blank=True)
+
+    # A newer pending job with the same key replaces older ones
+    coalesce_key = models.CharField(max_length=100, blank=True, db_index=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_status_display()} webhook #{self.pk}"
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized, plain-text copy of a searchable page (blog post, comic page,
+    custom page, ...), kept in sync by snowsune.search. The full-text index
+    over it lives outside the ORM: a generated tsvector column + GIN index on
+    Postgres, an FTS5 table on SQLite (see migration 0006).
+    """
+
+    kind = models.CharField(max_length=20)
+    object_id = models.CharField(max_length=200)
+    title = models.CharField(max_length=300)
+    tags = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    url = models.CharField(max_length=500)
+    # Hidden from results until then (scheduled comic pages)
+    visible_from = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="unique_search_document"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.title}"
@@ -0,0 +1,429 @@
+"""
+Full-text search over blog posts, comic pages, custom pages and characters.
+
+Every searchable object gets one SearchDocument row (title, tags and plain
+text body), written by the save/delete receivers at the bottom of this
+module. Characters are markdown files rather than models, so they're picked
+up by rebuild() instead (cron runs it for them, reindexing changed files).
+
+The full-text index over those rows depends on the database:
+
+- Postgres: a generated, weighted tsvector column with a GIN index, queried
+  with websearch_to_tsquery, ranked with ts_rank_cd, snippets by ts_headline
+- SQLite: an FTS5 table kept in sync by triggers, ranked with bm25(),
+  snippets by snippet()
+- anything else: icontains over the documents (still one table, no joins)
+
+Usage:
+    from snowsune import search
+
+    hits = search.search("fox", kinds=["blog", "comic"], limit=10)
+    # [{"kind", "kind_label", "object_id", "title", "url", "snippet",
+    #   "score"}, ...]
+
+`./manage.py rebuild_search_index` (re)indexes everything.
+"""
+
+import logging
+import re
+from datetime import datetime, timezone as dt_timezone
+from html import unescape
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+from apps.blog.models import BlogPost, Tag
+from apps.characters import store as character_store
+from apps.comics.models import ComicPage
+from apps.custompages.models import CustomPage
+
+from .models import SearchDocument
+
+logger = logging.getLogger(__name__)
+
+TABLE = SearchDocument._meta.db_table
+FTS_TABLE = f"{TABLE}_fts"
+
+# Snippet highlight markers, swapped for <mark> after the snippet is escaped
+_START, _STOP = "\x02", "\x03"
+SNIPPET_WORDS = 24
+HEADLINE_OPTIONS = (
+    f"StartSel={_START}, StopSel={_STOP}, MaxFragments=2, "
+    f'MaxWords={SNIPPET_WORDS}, MinWords=8, FragmentDelimiter=" … "'
+)
+
+_has_fts_table = False
+
+
+def _blog_document(post):
+    if post.status != "published":
+        return None
+    return {
+        "title": post.title,
+        "tags": " ".join(tag.name for tag in post.tags.all()),
+        "body": unescape(strip_tags(post.content_html or post.content)),
+        "url": post.get_absolute_url(),
+        "visible_from": None,
+    }
+
+
+def transcript_text(transcript):
+    """Plain text of a ComicPage.transcript ({"elements": [{"text": ...}]})."""
+    elements = (transcript or {}).get("elements", [])
+    return "\n".join(
+        str(element.get("text", ""))
+        for element in elements
+        if isinstance(element, dict) and element.get("text")
+    )
+
+
+def _comic_document(page):
+    if not page.published_at:
+        return None
+    return {
+        "title": f"Page {page.page_number}: {page.title}",
+        "tags": "",
+        "body": "\n".join(
+            part
+            for part in (
+                unescape(strip_tags(page.description_html or page.description)),
+                transcript_text(page.transcript),
+            )
+            if part
+        ),
+        "url": page.get_absolute_url(),
+        # Scheduled pages only show up in results once they're live
+        "visible_from": page.published_at,
+    }
+
+
+def _custompage_document(page):
+    if not page.is_published:
+        return None
+    return {
+        "title": page.display_title,
+        "tags": page.meta_description,
+        "body": unescape(strip_tags(page.content_html or page.content)),
+        "url": page.get_absolute_url(),
+        "visible_from": None,
+    }
+
+
+# kind -> (model, rebuild queryset, document builder). A builder returning
+# None means "not searchable (any more)" and removes the document.
+INDEXERS = {
+    "blog": (
+        BlogPost,
+        lambda: BlogPost.objects.filter(status="published").prefetch_related("tags"),
+        _blog_document,
+    ),
+    "comic": (ComicPage, lambda: ComicPage.objects.all(), _comic_document),
+    "page": (CustomPage, lambda: CustomPage.objects.all(), _custompage_document),
+}
+KIND_FOR_MODEL = {model: kind for kind, (model, _, _) in INDEXERS.items()}
+
+CHARACTER_KIND = "character"
+KINDS = (*INDEXERS, CHARACTER_KIND)
+KIND_LABELS = {
+    "blog": "Blog post",
+    "comic": "Comic page",
+    "page": "Page",
+    CHARACTER_KIND: "Character",
+}
+
+
+def _character_document(character):
+    if character is None:
+        return None
+    return {
+        "title": character.display_name,
+        "tags": " ".join(character.tags),
+        "body": character.text,
+        "url": reverse("character-detail", kwargs={"char_name": character.name}),
+        "visible_from": None,
+    }
+
+
+def index_character(name):
+    """(Re)index the character ``name``, or drop it if its file is gone."""
+    character = character_store.STORE.get(name)
+    index_document(CHARACTER_KIND, name, _character_document(character))
+
+
+def index_document(kind, object_id, document):
+    """Store ``document`` (or remove it when None) for kind/object_id."""
+    if document is None:
+        remove_document(kind, object_id)
+        return
+    SearchDocument.objects.update_or_create(
+        kind=kind, object_id=str(object_id), defaults=document
+    )
+
+
+def remove_document(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=str(object_id)).delete()
+
+
+def index_instance(instance):
+    kind = KIND_FOR_MODEL[type(instance)]
+    index_document(kind, instance.pk, INDEXERS[kind][2](instance))
+
+
+def _rebuild_characters(force=False):
+    # Only files modified since they were last indexed, unless forced
+    indexed_at = dict(
+        SearchDocument.objects.filter(kind=CHARACTER_KIND).values_list(
+            "object_id", "updated_at"
+        )
+    )
+    store = character_store.STORE
+    store.invalidate(reparse=force)
+    names = []
+    for character in store.all():
+        names.append(character.name)
+        mtime = datetime.fromtimestamp(character.mtime_ns / 1e9, tz=dt_timezone.utc)
+        indexed = indexed_at.get(character.name)
+        if force or indexed is None or mtime >= indexed:
+            index_document(
+                CHARACTER_KIND, character.name, _character_document(character)
+            )
+
+    SearchDocument.objects.filter(kind=CHARACTER_KIND).exclude(
+        object_id__in=names
+    ).delete()
+    return len(names)
+
+
+def rebuild(kinds=None, force=False):
+    """
+    Reindex every object of ``kinds`` (default: all). Character files that
+    haven't changed since they were indexed are skipped unless ``force``.
+    Returns {kind: count}.
+    """
+    counts = {}
+    for kind in kinds or KINDS:
+        if kind == CHARACTER_KIND:
+            counts[kind] = _rebuild_characters(force)
+            continue
+
+        _, queryset, build = INDEXERS[kind]
+        seen = []
+        with transaction.atomic():
+            for instance in queryset().iterator(chunk_size=200):
+                document = build(instance)
+                if document is not None:
+                    index_document(kind, instance.pk, document)
+                    seen.append(str(instance.pk))
+            SearchDocument.objects.filter(kind=kind).exclude(
+                object_id__in=seen
+            ).delete()
+        counts[kind] = len(seen)
+    return counts
+
+
+def _backend():
+    global _has_fts_table
+    if connection.vendor == "postgresql":
+        return "postgres"
+    if connection.vendor == "sqlite":
+        if not _has_fts_table:
+            _has_fts_table = FTS_TABLE in connection.introspection.table_names()
+        if _has_fts_table:
+            return "fts5"
+    return "basic"
+
+
+def _terms(query):
+    return re.findall(r"\w+", query.lower())
+
+
+def _fts5_match(query):
+    # Every word must match, as a prefix; quoting keeps FTS5 syntax out
+    return " ".join(f'"{term}"*' for term in _terms(query))
+
+
+def _snippet(text):
+    return mark_safe(escape(text).replace(_START, "<mark>").replace(_STOP, "</mark>"))
+
+
+def _where(kinds, object_ids=None):
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    sql = " AND (d.visible_from IS NULL OR d.visible_from <= %s)"
+    params = [now]
+    if kinds:
+        sql += f" AND d.kind IN ({', '.join(['%s'] * len(kinds))})"
+        params.extend(kinds)
+    if object_ids is not None:
+        sql += f" AND d.object_id IN ({', '.join(['%s'] * len(object_ids))})"
+        params.extend(str(pk) for pk in object_ids)
+    return sql, params
+
+
+def _basic_queryset(query, kinds, object_ids=None):
+    queryset = SearchDocument.objects.filter(
+        Q(visible_from__isnull=True) | Q(visible_from__lte=timezone.now())
+    )
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    if object_ids is not None:
+        queryset = queryset.filter(object_id__in=[str(pk) for pk in object_ids])
+    for term in _terms(query):
+        queryset = queryset.filter(
+            Q(title__icontains=term) | Q(tags__icontains=term) | Q(body__icontains=term)
+        )
+    return queryset
+
+
+def _basic_snippet(body, query):
+    terms = _terms(query)
+    lower = body.lower()
+    position = min((lower.find(t) for t in terms if t in lower), default=0)
+    start = max(position - 60, 0)
+    text = body[start : start + 200]
+    for term in terms:
+        text = re.sub(
+            f"({re.escape(term)})", f"{_START}\\1{_STOP}", text, flags=re.IGNORECASE
+        )
+    return ("…" if start else "") + text + "…"
+
+
+def _hit(kind, object_id, title, url, snippet, score):
+    return {
+        "kind": kind,
+        "kind_label": KIND_LABELS.get(kind, kind),
+        "object_id": object_id,
+        "title": title,
+        "url": url,
+        "snippet": _snippet(snippet),
+        "score": abs(score),
+    }
+
+
+def search(query, kinds=None, limit=20, offset=0, object_ids=None):
+    """
+    Best matches for ``query`` first. Each hit is a dict with kind,
+    kind_label, object_id, title, url, snippet (safe HTML, matches in <mark>)
+    and score. ``object_ids`` limits the search to those objects.
+    """
+    if not _terms(query) or object_ids == []:
+        return []
+
+    backend = _backend()
+    where, params = _where(kinds, object_ids)
+
+    if backend == "basic":
+        documents = _basic_queryset(query, kinds, object_ids).order_by("-updated_at")
+        return [
+            _hit(d.kind, d.object_id, d.title, d.url, _basic_snippet(d.body, query), 0)
+            for d in documents[offset : offset + limit]
+        ]
+
+    if backend == "postgres":
+        sql = (
+            "SELECT d.kind, d.object_id, d.title, d.url,"
+            " ts_headline('english', d.body, q, %s),"
+            " ts_rank_cd(d.search_vector, q) AS score"
+            f" FROM {TABLE} d, websearch_to_tsquery('english', %s) q"
+            f" WHERE d.search_vector @@ q{where}"
+            " ORDER BY score DESC, d.id LIMIT %s OFFSET %s"
+        )
+        params = [HEADLINE_OPTIONS, query, *params, limit, offset]
+    else:
+        # bm25() is lower-is-better; weight title over tags over body
+        sql = (
+            "SELECT d.kind, d.object_id, d.title, d.url,"
+            f" snippet({FTS_TABLE}, -1, %s, %s, ' … ', %s),"
+            f" bm25({FTS_TABLE}, 10.0, 4.0, 1.0) AS score"
+            f" FROM {FTS_TABLE} JOIN {TABLE} d ON d.id = {FTS_TABLE}.rowid"
+            f" WHERE {FTS_TABLE} MATCH %s{where}"
+            " ORDER BY score, d.id LIMIT %s OFFSET %s"
+        )
+        params = [
+            _START,
+            _STOP,
+            SNIPPET_WORDS,
+            _fts5_match(query),
+            *params,
+            limit,
+            offset,
+        ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [_hit(*row) for row in rows]
+
+
+def count(query, kinds=None, object_ids=None):
+    """Total number of matches for ``query``."""
+    if not _terms(query) or object_ids == []:
+        return 0
+
+    backend = _backend()
+    if backend == "basic":
+        return _basic_queryset(query, kinds, object_ids).count()
+
+    where, params = _where(kinds, object_ids)
+    if backend == "postgres":
+        sql = (
+            f"SELECT count(*) FROM {TABLE} d, websearch_to_tsquery('english', %s) q"
+            f" WHERE d.search_vector @@ q{where}"
+        )
+        params = [query, *params]
+    else:
+        sql = (
+            f"SELECT count(*) FROM {FTS_TABLE}"
+            f" JOIN {TABLE} d ON d.id = {FTS_TABLE}.rowid"
+            f" WHERE {FTS_TABLE} MATCH %s{where}"
+        )
+        params = [_fts5_match(query), *params]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()[0]
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_save, sender=ComicPage)
+@receiver(post_save, sender=CustomPage)
+def _indexed_model_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        index_instance(instance)
+    except Exception as e:
+        # Search going stale is better than the save failing
+        logger.error(f"Failed to index {sender.__name__} {instance.pk}: {e}")
+
+
+@receiver(post_delete, sender=BlogPost)
+@receiver(post_delete, sender=ComicPage)
+@receiver(post_delete, sender=CustomPage)
+def _indexed_model_deleted(sender, instance, **kwargs):
+    remove_document(KIND_FOR_MODEL[sender], instance.pk)
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def _blog_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        index_instance(instance)
+    elif pk_set:
+        for post in BlogPost.objects.filter(pk__in=pk_set).prefetch_related("tags"):
+            index_instance(post)
+
+
+@receiver(post_save, sender=Tag)
+def _tag_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # A renamed tag changes the tags text of every post that has it
+    for post in instance.blog_posts.filter(status="published").prefetch_related("tags"):
+        index_instance(post)
@@ -13,7 +13,10 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 import re
 import logging
+import tempfile
+import importlib.util
 from pathlib import Path
+from urllib.parse import urlparse
 import sys
 from typing import Any, Dict, cast
 
@@ -43,6 +46,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.environ.get("SECRET_KEY", "default-secret-key")
 BAD_KEY = SECRET_KEY == "default-secret-key"
+# Old SECRET_KEYs (comma separated) still accepted for signing and for
+# decrypting stored tokens until `./manage.py reencrypt_tokens` has run
+SECRET_KEY_FALLBACKS = [
+    key for key in os.environ.get("SECRET_KEY_FALLBACKS", "").split(",") if key
+]
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.environ.get("DEBUG", "false").lower() == "true"
@@ -150,8 +158,92 @@ if DATABASE_URL:
     parsed = dj_database_url.parse(DATABASE_URL)
     DATABASES["default"] = cast(Dict[str, Any], parsed)
 
+# Shared cache configuration
+# Gunicorn runs several workers, so the default per-process LocMemCache would
+# give each one its own cold copy of everything (Discord API results, live
+# status, SiteSettings, ...). CACHE_URL picks a backend every worker shares:
+#   file:///path/to/dir           (default, under the system temp dir)
+#   db://cache_table              (run ./manage.py createcachetable)
+#   redis://host:6379/0           (needs the `redis` package)
+#   memcached://host:11211        (needs the `pymemcache` package)
+#   locmem://  or  dummy://
+# The locks and version counters built on add()/incr() (Discord token
+# refresh, live status, site settings, ...) need those to be atomic between
+# every process sharing the cache. The file cache (snowsune.cache_backends)
+# makes them atomic on this host, redis and memcached are atomic anyway.
+# Django's db cache isn't, so don't use db:// with more than one process.
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "snowsune_cache")
+CACHE_URL = os.getenv("CACHE_URL", f"file://{DEFAULT_CACHE_DIR}")
+CACHE_TIMEOUT = int(os.getenv("CACHE_TIMEOUT", "300"))
+# Django's default of 300 entries would have the cache culling constantly
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+_CULLED_CACHE_OPTIONS = {"MAX_ENTRIES": CACHE_MAX_ENTRIES, "CULL_FREQUENCY": 4}
+
+
+def _parse_cache_url(url):
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+
+    if scheme == "file":
+        return {
+            "BACKEND": "snowsune.cache_backends.FileCache",
+            "LOCATION": parsed.path or DEFAULT_CACHE_DIR,
+            "OPTIONS": _CULLED_CACHE_OPTIONS,
+        }
+    if scheme == "db":
+        return {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": (parsed.netloc or parsed.path.lstrip("/")) or "django_cache",
+            "OPTIONS": _CULLED_CACHE_OPTIONS,
+        }
+    if scheme in ("redis", "rediss"):
+        if importlib.util.find_spec("redis") is None:
+            raise ValueError("redis package not installed")
+        return {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": url,
+        }
+    if scheme == "memcached":
+        if importlib.util.find_spec("pymemcache") is None:
+            raise ValueError("pymemcache package not installed")
+        return {
+            "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+            "LOCATION": parsed.netloc,
+        }
+    if scheme == "locmem":
+        return {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": parsed.netloc or "snowsune",
+        }
+    if scheme == "dummy":
+        return {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    raise ValueError(f"unknown cache scheme '{scheme}'")
+
+
+try:
+    _default_cache = _parse_cache_url(CACHE_URL)
+except ValueError as e:
+    # Fall back to something every worker can still share
+    logging.warning(f"CACHE_URL ignored ({e}), using file cache")
+    _default_cache = _parse_cache_url(f"file://{DEFAULT_CACHE_DIR}")
+
+CACHES = {
+    "default": {
+        **_default_cache,
+        "TIMEOUT": CACHE_TIMEOUT,
+        "KEY_PREFIX": os.getenv("CACHE_KEY_PREFIX", "snowsune"),
+    }
+}
+
 # Fops Bot database configuration
 FOPS_DATABASE = os.getenv("FOPS_DATABASE")
+# Each gunicorn worker keeps its own pool of Fops connections
+FOPS_POOL_MIN_SIZE = int(os.getenv("FOPS_POOL_MIN_SIZE", "1"))
+FOPS_POOL_MAX_SIZE = int(os.getenv("FOPS_POOL_MAX_SIZE", "4"))
+FOPS_POOL_TIMEOUT = float(os.getenv("FOPS_POOL_TIMEOUT", "10"))
+# Connections idle for longer than this get a SELECT 1 before being reused
+FOPS_HEALTH_CHECK_INTERVAL = int(os.getenv("FOPS_HEALTH_CHECK_INTERVAL", "30"))
+FOPS_CONNECT_TIMEOUT = int(os.getenv("FOPS_CONNECT_TIMEOUT", "5"))
 
 # Discord OAuth configuration
 DISCORD_CLIENT_ID = os.getenv("DISCORD_CLIENT_ID")
@@ -261,3 +353,10 @@ if "test" in sys.argv:
     SECURE_SSL_REDIRECT = False
     # Use console email backend for tests
     EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+    # No shared cache in tests; TestCase rollbacks don't fire the signals that
+    # invalidate cached data (SiteSetting snapshot etc.) between tests.
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+        }
+    }
@@ -0,0 +1,122 @@
+"""
+Cached accessors for SiteSetting rows.
+
+Every page render used to ask the database for a handful of SiteSetting keys
+one at a time (discord invite, Ko-fi url, GA tag, ...). Instead we load *all*
+the keys in one query into a snapshot, keep that snapshot in Django's cache and
+in process memory, and version it with a counter that gets bumped whenever a
+SiteSetting is saved or deleted.
+
+Usage:
+    from snowsune.site_settings import get_setting
+
+    invite = get_setting("discord_invite", "")
+"""
+
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import SiteSetting
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = "site_settings:version"
+SNAPSHOT_CACHE_KEY = "site_settings:snapshot:{version}"
+SNAPSHOT_TTL = 60 * 60 * 24  # The version counter is what really expires these
+
+# Per-thread copy of the last snapshot we saw, plus whether we already checked
+# the version during the current request (so one request = one cache lookup).
+_local = threading.local()
+
+
+def _get_version():
+    """Current snapshot version, or None when no shared cache is available."""
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never restarts at a number
+        # an older (stale) snapshot is still stored under.
+        cache.add(VERSION_CACHE_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def _load_from_db():
+    return dict(SiteSetting.objects.values_list("key", "value"))
+
+
+def get_all_settings():
+    """
+    Return a dict of every SiteSetting key -> value.
+
+    Costs zero queries once the cache is warm, one query otherwise.
+    """
+    values = getattr(_local, "values", None)
+    if values is not None and getattr(_local, "request_checked", False):
+        return values
+
+    version = _get_version()
+    if version is None:
+        # No usable shared cache (DummyCache in tests), nothing to validate
+        # a local copy against so always read the database.
+        return _load_from_db()
+
+    if values is None or getattr(_local, "version", None) != version:
+        snapshot_key = SNAPSHOT_CACHE_KEY.format(version=version)
+        values = cache.get(snapshot_key)
+        if values is None:
+            values = _load_from_db()
+            cache.set(snapshot_key, values, SNAPSHOT_TTL)
+        _local.values = values
+        _local.version = version
+
+    if getattr(_local, "in_request", False):
+        _local.request_checked = True
+    return values
+
+
+def get_setting(key, default=None):
+    """Return the value for ``key`` (or ``default`` if it isn't set)."""
+    try:
+        return get_all_settings().get(key, default)
+    except Exception as e:
+        # Settings should never be the reason a page 500s
+        logger.warning("Could not load site settings: %s", e)
+        return default
+
+
+def invalidate():
+    """Bump the snapshot version so every process reloads on next access."""
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, time.time_ns(), None)
+    _local.values = None
+    _local.version = None
+    _local.request_checked = False
+
+
+@receiver(post_save, sender=SiteSetting)
+@receiver(post_delete, sender=SiteSetting)
+def _site_setting_changed(sender, **kwargs):
+    # Only once the change is committed: bumping the version earlier lets
+    # another worker reload the old values under the new version
+    transaction.on_commit(invalidate)
+
+
+@receiver(request_started)
+def _request_started(sender, **kwargs):
+    _local.in_request = True
+    _local.request_checked = False
+
+
+@receiver(request_finished)
+def _request_finished(sender, **kwargs):
+    _local.in_request = False
+    _local.request_checked = False
@@ -0,0 +1,302 @@
+"""
+Sitemap index and per-section sitemaps, built from the database.
+
+/sitemap.xml is an index pointing at one sitemap per section
+(/sitemap-blog.xml, /sitemap-comics.xml, ...). Each section is rendered from
+a single .only()/.iterator() query and cached under a per-section version
+counter. Saving or deleting one of the section's models bumps that counter
+(see the receivers at the bottom), so only the affected section and the index
+are rebuilt, and only on the next request.
+
+Usage:
+    from snowsune.sitemaps import get_index, get_section
+
+    entry = get_section("blog")  # {"xml", "etag", "last_modified"} or None
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+
+from apps.blog.models import BlogPost
+from apps.characters import store as character_store
+from apps.comics.models import ComicPage
+from apps.custompages.models import CustomPage
+from apps.tanks_manager.models import TankSite
+
+VERSION_CACHE_KEY = "sitemap:version:{section}"
+SECTION_CACHE_KEY = "sitemap:section:{section}:{version}"
+INDEX_CACHE_KEY = "sitemap:index:{versions}"
+SITEMAP_TTL = 60 * 60 * 24  # The version counters are what really expire these
+
+XMLNS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def _absolute(path):
+    return settings.SITE_URL.rstrip("/") + path
+
+
+def _url(path, lastmod=None, changefreq=None, priority=None):
+    return (path, lastmod, changefreq, priority)
+
+
+def _pages_urls():
+    """Landing pages that aren't backed by a model of their own."""
+    yield _url(reverse("home"), changefreq="daily", priority="1.0")
+    yield _url(reverse("tools"), changefreq="weekly", priority="0.9")
+    yield _url(reverse("projects"), changefreq="weekly", priority="0.8")
+    yield _url(reverse("blog:blog_list"), changefreq="daily", priority="0.9")
+    yield _url(reverse("comics:comic_home"), changefreq="weekly", priority="0.9")
+    yield _url(reverse("commorganizer"), changefreq="weekly", priority="0.8")
+    yield _url(reverse("calendar"), changefreq="daily", priority="0.6")
+    yield _url(reverse("thank_you"), changefreq="weekly", priority="0.7")
+
+
+def _blog_urls():
+    posts = (
+        BlogPost.objects.filter(status="published")
+        .only("slug", "updated_at")
+        .order_by("-published_at")
+    )
+    for post in posts.iterator():
+        yield _url(post.get_absolute_url(), post.updated_at, "weekly", "0.8")
+
+
+def _comics_urls():
+    pages = ComicPage.published.only("page_number", "updated_at").order_by(
+        "page_number"
+    )
+    for page in pages.iterator():
+        yield _url(page.get_absolute_url(), page.updated_at, "weekly", "0.8")
+
+
+def _custompages_urls():
+    pages = CustomPage.objects.filter(is_published=True).only("path", "updated_at")
+    for page in pages.iterator():
+        yield _url(page.get_absolute_url(), page.updated_at, "monthly", "0.7")
+
+
+def _characters_urls():
+    yield _url(reverse("character-list"), changefreq="monthly", priority="0.8")
+    for character in character_store.STORE.all():
+        yield _url(
+            reverse("character-detail", args=[character.name]),
+            character.last_modified,
+            "monthly",
+            "0.7",
+        )
+
+
+def _characters_fingerprint():
+    """Character pages are files, not rows: key their cache on their contents."""
+    return character_store.STORE.etag()
+
+
+def _tanks_urls():
+    yield _url(reverse("tanks_manager:hub"), changefreq="weekly", priority="0.6")
+    for site in TankSite.objects.only("slug").order_by("slug").iterator():
+        yield _url(
+            reverse("tanks_manager:show", args=[site.slug]),
+            changefreq="weekly",
+            priority="0.5",
+        )
+
+
+def _users_urls():
+    yield _url(reverse("user-gallery"), changefreq="weekly", priority="0.6")
+    users = (
+        get_user_model()
+        .objects.filter(email_verified=True, is_active=True)
+        .only("username")
+        .order_by("username")
+    )
+    for user in users.iterator():
+        yield _url(user.get_absolute_url(), changefreq="monthly", priority="0.4")
+
+
+# Section name -> (url generator, extra cache key or None). Order is the
+# order they appear in the index.
+SECTIONS = {
+    "pages": (_pages_urls, None),
+    "blog": (_blog_urls, None),
+    "comics": (_comics_urls, None),
+    "custompages": (_custompages_urls, None),
+    "characters": (_characters_urls, _characters_fingerprint),
+    "tanks": (_tanks_urls, None),
+    "users": (_users_urls, None),
+}
+
+
+def _get_version(section):
+    key = VERSION_CACHE_KEY.format(section=section)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(section):
+    """Bump ``section``'s version so it (and the index) rebuild on next request."""
+    key = VERSION_CACHE_KEY.format(section=section)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def _section_version(section):
+    """Version string for ``section``, or None when there's no usable cache."""
+    version = _get_version(section)
+    if version is None:
+        return None
+    fingerprint = SECTIONS[section][1]
+    if fingerprint:
+        return f"{version}-{fingerprint()}"
+    return str(version)
+
+
+def _entry(chunks, last_modified):
+    xml = "".join(chunks)
+    return {
+        "xml": xml,
+        "etag": f'"{hashlib.sha256(xml.encode("utf-8")).hexdigest()[:32]}"',
+        "last_modified": int(last_modified.timestamp()) if last_modified else None,
+    }
+
+
+def _format_lastmod(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def build_section(section):
+    """Render one section's <urlset>."""
+    urls, _ = SECTIONS[section]
+    newest = None
+    chunks = [f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{XMLNS}">\n']
+
+    for path, lastmod, changefreq, priority in urls():
+        chunks.append(f"  <url>\n    <loc>{escape(_absolute(path))}</loc>\n")
+        if lastmod:
+            chunks.append(f"    <lastmod>{_format_lastmod(lastmod)}</lastmod>\n")
+            newest = max(newest, lastmod) if newest else lastmod
+        if changefreq:
+            chunks.append(f"    <changefreq>{changefreq}</changefreq>\n")
+        if priority:
+            chunks.append(f"    <priority>{priority}</priority>\n")
+        chunks.append("  </url>\n")
+
+    chunks.append("</urlset>\n")
+    return _entry(chunks, newest)
+
+
+def _section_ttl(section):
+    """
+    Scheduled comic pages go live without being saved, so the comics section
+    must not outlive the next scheduled publish.
+    """
+    if section != "comics":
+        return SITEMAP_TTL
+    next_publish = (
+        ComicPage.objects.filter(published_at__gt=timezone.now())
+        .order_by("published_at")
+        .values_list("published_at", flat=True)
+        .first()
+    )
+    if next_publish is None:
+        return SITEMAP_TTL
+    seconds = (next_publish - timezone.now()).total_seconds()
+    return max(1, min(SITEMAP_TTL, int(seconds) + 1))
+
+
+def get_section(section):
+    """Cached {"xml", "etag", "last_modified"} for ``section``, None if unknown."""
+    if section not in SECTIONS:
+        return None
+
+    version = _section_version(section)
+    if version is None:
+        return build_section(section)
+
+    key = SECTION_CACHE_KEY.format(section=section, version=version)
+    entry = cache.get(key)
+    if entry is None:
+        entry = build_section(section)
+        cache.set(key, entry, _section_ttl(section))
+    return entry
+
+
+def build_index(sections):
+    """Render the <sitemapindex> from already built section entries."""
+    newest = None
+    chunks = [
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{XMLNS}">\n'
+    ]
+    for section, entry in sections.items():
+        loc = _absolute(reverse("sitemap_section", args=[section]))
+        chunks.append(f"  <sitemap>\n    <loc>{escape(loc)}</loc>\n")
+        if entry["last_modified"]:
+            lastmod = datetime.fromtimestamp(entry["last_modified"], tz=dt_timezone.utc)
+            chunks.append(f"    <lastmod>{_format_lastmod(lastmod)}</lastmod>\n")
+            newest = max(newest, lastmod) if newest else lastmod
+        chunks.append("  </sitemap>\n")
+    chunks.append("</sitemapindex>\n")
+    return _entry(chunks, newest)
+
+
+def get_index():
+    """Cached sitemap index; rebuilt whenever any section's version changes."""
+    versions = [_section_version(section) for section in SECTIONS]
+    if None in versions:
+        return build_index({s: get_section(s) for s in SECTIONS})
+
+    key = INDEX_CACHE_KEY.format(
+        versions=hashlib.sha256("|".join(versions).encode("utf-8")).hexdigest()
+    )
+    entry = cache.get(key)
+    if entry is None:
+        entry = build_index({s: get_section(s) for s in SECTIONS})
+        cache.set(key, entry, min(_section_ttl(s) for s in SECTIONS))
+    return entry
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def _blog_changed(sender, **kwargs):
+    invalidate("blog")
+
+
+@receiver(post_save, sender=ComicPage)
+@receiver(post_delete, sender=ComicPage)
+def _comics_changed(sender, **kwargs):
+    invalidate("comics")
+
+
+@receiver(post_save, sender=CustomPage)
+@receiver(post_delete, sender=CustomPage)
+def _custompages_changed(sender, **kwargs):
+    invalidate("custompages")
+
+
+@receiver(post_save, sender=TankSite)
+@receiver(post_delete, sender=TankSite)
+def _tanks_changed(sender, **kwargs):
+    invalidate("tanks")
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def _users_changed(sender, update_fields=None, **kwargs):
+    # Every login saves last_login, which doesn't change the sitemap
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    invalidate("users")
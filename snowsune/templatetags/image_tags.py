@@ -1,4 +1,9 @@
 from django import template
+from django.conf import settings
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from .. import thumbnails
 from ..views.image_utils import get_social_preview_url
 
 register = template.Library()
@@ -34,3 +39,38 @@ def social_preview_url_og(image_url, request=None):
             # Fallback to hardcoded domain
             return f"https://snowsune.net{preview_path}"
     return None
+
+
+@register.simple_tag
+def thumbnail(image, preset="md", sizes=None, **attrs):
+    """
+    Render a <picture> with AVIF/WebP/fallback srcsets for an ImageField.
+
+    Usage: {% thumbnail post.featured_image "md" alt=post.title loading="lazy" %}
+
+    Extra keyword arguments become attributes of the <img>. Images that can't
+    be thumbnailed (animated, unreadable) fall back to a plain <img>.
+    """
+    name = getattr(image, "name", image)
+    if not name:
+        return ""
+
+    picture = thumbnails.picture_sources(name, preset)
+    if picture is None:
+        url = image.url if hasattr(image, "url") else settings.MEDIA_URL + name
+        return format_html('<img src="{}"{}>', url, flatatt(attrs))
+
+    sizes = sizes or f"(max-width: {picture['width']}px) 100vw, {picture['width']}px"
+    return format_html(
+        '<picture class="thumbnail">{}<img src="{}" srcset="{}" sizes="{}"{}>'
+        "</picture>",
+        format_html_join(
+            "",
+            '<source type="{}" srcset="{}" sizes="{}">',
+            ((mime, srcset, sizes) for mime, srcset in picture["sources"]),
+        ),
+        picture["src"],
+        picture["srcset"],
+        sizes,
+        flatatt(attrs),
+    )
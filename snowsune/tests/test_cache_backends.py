@@ -0,0 +1,60 @@
+import tempfile
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from snowsune import cache_backends
+from snowsune.cache_backends import FileCache
+
+
+class FileCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = FileCache(tmp.name, {"OPTIONS": {"MAX_ENTRIES": 1000}})
+
+    def race(self, target, threads=8):
+        start = threading.Barrier(threads)
+
+        def run():
+            start.wait()
+            target()
+
+        workers = [threading.Thread(target=run) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def test_only_one_add_wins(self):
+        won = []
+        self.race(lambda: won.append(self.cache.add("lock", 1, 60)))
+
+        self.assertEqual(won.count(True), 1)
+
+    def test_increments_are_not_lost(self):
+        self.cache.set("counter", 0, None)
+
+        def bump():
+            for _ in range(25):
+                self.cache.incr("counter")
+
+        self.race(bump)
+        self.assertEqual(self.cache.get("counter"), 200)
+
+    def test_lock_files_survive_clear(self):
+        self.cache.add("lock", 1, 60)
+        self.cache.clear()
+
+        self.assertIsNone(self.cache.get("lock"))
+        self.assertTrue(self.cache.add("lock", 1, 60))
+
+    def test_directory_is_only_listed_every_few_writes(self):
+        with patch.object(
+            FileCache, "_list_cache_files", return_value=[]
+        ) as list_files:
+            for i in range(cache_backends.CULL_CHECK_EVERY + 1):
+                self.cache.set(f"key{i}", i)
+
+        self.assertEqual(list_files.call_count, 2)
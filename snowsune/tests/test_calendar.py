@@ -0,0 +1,181 @@
+import warnings
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from snowsune.calendar_sync import sync_calendars
+from snowsune.models import CalendarEvent, CalendarSource, SiteSetting
+
+ICS_TEMPLATE = """BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//snowsune//tests//EN
+BEGIN:VEVENT
+UID:weekly@snowsune
+DTSTART:{start}
+DTEND:{end}
+RRULE:FREQ=WEEKLY;COUNT=4
+SUMMARY:Weekly Stream
+END:VEVENT
+BEGIN:VEVENT
+UID:allday@snowsune
+DTSTART;VALUE=DATE:{day}
+SUMMARY:Fox Day
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def _response(status, text="", headers=None):
+    response = MagicMock()
+    response.status_code = status
+    response.text = text
+    response.headers = headers or {}
+    return response
+
+
+class CalendarSyncTests(TestCase):
+    def setUp(self):
+        SiteSetting.objects.create(
+            key="CALENDAR_SOURCES",
+            value='[{"name": "Streams", "url": "https://example.com/s.ics", "color": "#f00"}]',
+        )
+        self.first = (timezone.now() + timedelta(days=1)).replace(
+            hour=18, minute=0, second=0, microsecond=0
+        )
+        self.ics = ICS_TEMPLATE.format(
+            start=self.first.strftime("%Y%m%dT%H%M%SZ"),
+            end=(self.first + timedelta(hours=2)).strftime("%Y%m%dT%H%M%SZ"),
+            day=(self.first + timedelta(days=2)).strftime("%Y%m%d"),
+        )
+
+    @patch("snowsune.calendar_sync.http_client.get")
+    def test_sync_stores_expanded_occurrences(self, mock_get):
+        mock_get.return_value = _response(200, self.ics, {"ETag": '"v1"'})
+
+        sync_calendars()
+
+        source = CalendarSource.objects.get(name="Streams")
+        self.assertEqual(source.etag, '"v1"')
+        self.assertEqual(source.color, "#f00")
+        self.assertEqual(source.events.filter(title="Weekly Stream").count(), 4)
+        self.assertTrue(source.events.get(title="Fox Day").all_day)
+
+    @patch("snowsune.calendar_sync.http_client.get")
+    def test_unchanged_feed_is_conditional_and_keeps_events(self, mock_get):
+        mock_get.return_value = _response(200, self.ics, {"ETag": '"v1"'})
+        sync_calendars()
+
+        mock_get.return_value = _response(304)
+        sync_calendars()
+
+        headers = mock_get.call_args.kwargs["headers"]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(CalendarEvent.objects.count(), 5)
+
+    @patch("snowsune.calendar_sync.http_client.get")
+    def test_api_filters_by_range(self, mock_get):
+        mock_get.return_value = _response(200, self.ics)
+        sync_calendars()
+
+        window_start = self.first - timedelta(hours=1)
+        window_end = self.first + timedelta(days=1)
+        response = self.client.get(
+            reverse("calendar_events_api"),
+            {"start": window_start.isoformat(), "end": window_end.isoformat()},
+        )
+
+        data = response.json()
+        self.assertEqual([e["title"] for e in data], ["Weekly Stream"])
+        self.assertEqual(data[0]["calendar"], "Streams")
+        self.assertFalse(data[0]["allDay"])
+
+    @patch("snowsune.calendar_sync.http_client.get")
+    def test_api_expands_windows_outside_the_store(self, mock_get):
+        mock_get.return_value = _response(200, self.ics)
+        sync_calendars()
+
+        # Pretend the store was expanded long ago so it no longer covers now
+        CalendarSource.objects.update(
+            last_expanded_at=timezone.now() - timedelta(days=1000)
+        )
+        CalendarEvent.objects.all().delete()
+
+        response = self.client.get(
+            reverse("calendar_events_api"),
+            {
+                "start": (self.first - timedelta(days=1)).date().isoformat(),
+                "end": (self.first + timedelta(days=8)).date().isoformat(),
+            },
+        )
+
+        titles = [e["title"] for e in response.json()]
+        self.assertEqual(titles.count("Weekly Stream"), 2)
+        self.assertIn("Fox Day", titles)
+
+    @patch("snowsune.calendar_sync.http_client.get")
+    def test_api_filters_by_calendar(self, mock_get):
+        mock_get.return_value = _response(200, self.ics)
+        sync_calendars()
+
+        params = {"calendar": "Nope"}
+        self.assertEqual(
+            self.client.get(reverse("calendar_events_api"), params).json(), []
+        )
+        params = {"calendar": "Streams"}
+        self.assertTrue(self.client.get(reverse("calendar_events_api"), params).json())
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "calendar-tests",
+            }
+        }
+    )
+    @patch("snowsune.calendar_sync.http_client.get")
+    def test_same_window_is_served_from_cache(self, mock_get):
+        cache.clear()
+        mock_get.return_value = _response(200, self.ics)
+        sync_calendars()
+        params = {"start": "2026-01-01", "end": "2026-02-01"}
+
+        self.client.get(reverse("calendar_events_api"), params)
+        with self.assertNumQueries(0):
+            self.client.get(reverse("calendar_events_api"), params)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "calendar-tests",
+            }
+        }
+    )
+    @patch("snowsune.calendar_sync.http_client.get")
+    def test_calendar_name_is_not_used_raw_in_cache_keys(self, mock_get):
+        cache.clear()
+        mock_get.return_value = _response(200, self.ics)
+        sync_calendars()
+
+        # Memcached refuses keys with spaces or over 250 characters
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            response = self.client.get(
+                reverse("calendar_events_api"), {"calendar": "no such " + "x" * 300}
+            )
+        self.assertEqual(response.json(), [])
+
+    def test_out_of_range_dates_fall_back_to_the_default_window(self):
+        for params in (
+            {"end": "0001-01-01"},
+            {"start": "9999-12-31"},
+            {"start": "0001-01-01T00:00:00+05:00", "end": "9999-12-31T23:59:59"},
+        ):
+            response = self.client.get(reverse("calendar_events_api"), params)
+            self.assertEqual(response.status_code, 200, params)
+            self.assertEqual(response.json(), [])
@@ -0,0 +1,177 @@
+import pickle
+import time
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from apps.bot_manager import discord_api, discord_client
+from apps.bot_manager.members import GuildMembers
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def _response(status_code, json=None, headers=None):
+    response = Mock(status_code=status_code, headers=headers or {}, text="")
+    response.json.return_value = json if json is not None else {}
+    return response
+
+
+@override_settings(CACHES=LOCMEM)
+class DiscordClientTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch("apps.bot_manager.discord_client.time.sleep")
+    @patch("apps.bot_manager.discord_client.http_client.request")
+    def test_short_429_is_waited_out_and_retried(self, http_request, sleep):
+        http_request.side_effect = [
+            _response(429, {"retry_after": 0.5}, {"Retry-After": "0.5"}),
+            _response(200, [{"id": "1"}]),
+        ]
+
+        channels = discord_client.get_json("/guilds/1/channels", "Bot x")
+
+        self.assertEqual(channels, [{"id": "1"}])
+        self.assertEqual(http_request.call_count, 2)
+        self.assertTrue(sleep.called)
+        stats = discord_client.stats()
+        self.assertEqual(stats["rate_limited"], 1)
+        self.assertEqual(stats["requests"], 2)
+
+    @patch("apps.bot_manager.discord_client.http_client.request")
+    def test_long_429_raises_and_blocks_the_route(self, http_request):
+        http_request.return_value = _response(429, {}, {"Retry-After": "60"})
+
+        with self.assertRaises(discord_client.RateLimited):
+            discord_client.get_json("/guilds/1/members", "Bot x")
+        # The bucket is now known to be empty, so we don't even try
+        with self.assertRaises(discord_client.RateLimited):
+            discord_client.get_json("/guilds/1/members", "Bot x")
+        self.assertEqual(http_request.call_count, 1)
+
+        # Other guilds are a different bucket
+        http_request.return_value = _response(200, [])
+        self.assertEqual(discord_client.get_json("/guilds/2/members", "Bot x"), [])
+
+    def test_routes_keep_major_ids_and_split_tokens(self):
+        route = discord_client._route("GET", "/guilds/1/members", "Bot a")
+        self.assertIn("guilds/1/members", route)
+        self.assertEqual(
+            discord_client._route("GET", "/users/5", "Bot a"),
+            discord_client._route("GET", "/users/6", "Bot a"),
+        )
+        self.assertNotEqual(
+            route, discord_client._route("GET", "/guilds/1/members", "Bot b")
+        )
+
+    def test_cached_hit_and_miss(self):
+        fetch = Mock(return_value=["guild"])
+
+        self.assertEqual(discord_client.cached("key", fetch, 60), ["guild"])
+        self.assertEqual(discord_client.cached("key", fetch, 60), ["guild"])
+        self.assertEqual(fetch.call_count, 1)
+        stats = discord_client.stats()
+        self.assertEqual((stats["misses"], stats["hits"]), (1, 1))
+
+    def test_failed_fetch_is_not_cached(self):
+        fetch = Mock(side_effect=[discord_client.DiscordAPIError(500), ["ok"]])
+
+        with self.assertRaises(discord_client.DiscordAPIError):
+            discord_client.cached("key", fetch, 60)
+        self.assertEqual(discord_client.cached("key", fetch, 60), ["ok"])
+
+    @patch("apps.bot_manager.discord_client._refresh_in_background")
+    def test_stale_entry_is_served_while_one_refresh_runs(self, refresh):
+        discord_client._store("key", ["old"], 60, 600)
+        entry = cache.get("key")
+        entry["fresh_until"] = time.time() - 1
+        cache.set("key", entry)
+        fetch = Mock(return_value=["new"])
+
+        self.assertEqual(discord_client.cached("key", fetch, 60), ["old"])
+        self.assertEqual(discord_client.cached("key", fetch, 60), ["old"])
+        # Only the first stale read takes the lock and starts a refresh
+        self.assertEqual(refresh.call_count, 1)
+        fetch.assert_not_called()
+        self.assertEqual(discord_client.stats()["stale_hits"], 2)
+
+    @patch("apps.bot_manager.discord_client.COALESCE_POLL", 0)
+    def test_cold_miss_waits_for_in_flight_fetch(self):
+        cache.add("key:lock", 1, 30)
+        fetch = Mock(return_value=["mine"])
+
+        def other_worker_finishes(seconds):
+            discord_client._store("key", ["theirs"], 60, 600)
+
+        with patch("apps.bot_manager.discord_client.time.sleep", other_worker_finishes):
+            self.assertEqual(discord_client.cached("key", fetch, 60), ["theirs"])
+        fetch.assert_not_called()
+        self.assertEqual(discord_client.stats()["coalesced"], 1)
+
+
+@override_settings(CACHES=LOCMEM, DISCORD_BOT_TOKEN="token")
+class UsersInfoTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = patch.object(discord_api, "virtual_mode_enabled", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("apps.bot_manager.discord_client.http_client.request")
+    def test_bulk_lookup_uses_cache_members_and_discord(self, http_request):
+        discord_client.set_many(
+            {"discord_user_1": {"username": "cached", "avatar": None, "id": "1"}}, 600
+        )
+        members = GuildMembers.from_discord(
+            [{"user": {"id": "2", "username": "member"}}]
+        )
+        discord_client.set_many({discord_api._members_key(9): members}, 300)
+        http_request.side_effect = lambda method, url, **kwargs: _response(
+            200, {"id": url.rsplit("/", 1)[1], "username": "fetched"}
+        )
+
+        users = discord_api.get_users_info(["1", "2", "3", "4"], guild_id=9)
+
+        self.assertEqual(users["1"]["username"], "cached")
+        self.assertEqual(users["2"]["username"], "member")
+        self.assertEqual(users["3"]["username"], "fetched")
+        self.assertEqual(users["4"]["id"], "4")
+        self.assertEqual(http_request.call_count, 2)
+
+        # Everything was written back, so a second pass needs no requests
+        discord_api.get_users_info(["1", "2", "3", "4"])
+        self.assertEqual(http_request.call_count, 2)
+
+
+class GuildMembersTests(SimpleTestCase):
+    def setUp(self):
+        self.members = GuildMembers.from_discord(
+            [
+                {"user": {"id": "1", "username": "vixi"}, "roles": ["10", "30"]},
+                {"user": {"id": "2", "username": "bixi"}, "roles": [20]},
+                {"user": {"id": "3"}, "roles": []},
+                {"roles": ["10"]},  # No user, skipped
+            ]
+            + [
+                {"user": {"id": str(100 + i)}, "roles": [str(1000 + i)]}
+                for i in range(9)
+            ]
+        )
+
+    def test_accessors(self):
+        self.assertEqual(len(self.members), 12)
+        self.assertEqual(self.members.roles_of("1"), {"10", "30"})
+        self.assertEqual(self.members.roles_of(2), {"20"})
+        self.assertEqual(self.members.roles_of("3"), frozenset())
+        self.assertIsNone(self.members.roles_of("404"))
+        self.assertTrue(self.members.has_role("1", 30))
+        self.assertEqual(self.members.members_with_role("10"), ["1"])
+        self.assertEqual(self.members.members_with_role("1008"), ["108"])
+        self.assertEqual(self.members.members_with_role("404"), [])
+        self.assertEqual(self.members.profile("2")["username"], "bixi")
+
+    def test_round_trips_through_the_cache(self):
+        restored = pickle.loads(pickle.dumps(self.members))
+        self.assertEqual(dict(restored.iter_roles()), dict(self.members.iter_roles()))
+        self.assertEqual(restored.profile("1"), self.members.profile("1"))
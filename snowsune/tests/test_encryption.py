@@ -0,0 +1,68 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from snowsune import encryption
+
+
+@override_settings(SECRET_KEY="old-key", SECRET_KEY_FALLBACKS=[])
+class EncryptionTests(TestCase):
+    def test_round_trip_with_cached_cipher(self):
+        encrypted = encryption.encrypt_token("access")
+
+        self.assertNotEqual(encrypted, "access")
+        self.assertEqual(encryption.decrypt_token(encrypted), "access")
+        self.assertIs(encryption.get_cipher(), encryption.get_cipher())
+        self.assertIsNone(encryption.decrypt_token("garbage"))
+
+    def test_key_rotation(self):
+        user = get_user_model().objects.create_user("vixi", password="x")
+        user.set_discord_access_token("access")
+        user.set_discord_refresh_token("refresh")
+        user.save()
+        old_cipher = encryption.get_cipher()
+
+        with override_settings(SECRET_KEY="new-key", SECRET_KEY_FALLBACKS=["old-key"]):
+            self.assertIsNot(encryption.get_cipher(), old_cipher)
+            user.refresh_from_db()
+            # Still readable through the fallback key
+            self.assertEqual(user.get_discord_refresh_token(), "refresh")
+            self.assertTrue(encryption.needs_rotation(user.discord_refresh_token))
+
+            out = StringIO()
+            call_command("reencrypt_tokens", stdout=out)
+            self.assertIn("Re-encrypted 2 token(s)", out.getvalue())
+
+        with override_settings(SECRET_KEY="new-key", SECRET_KEY_FALLBACKS=[]):
+            user.refresh_from_db()
+            self.assertEqual(user.get_discord_refresh_token(), "refresh")
+            self.assertFalse(encryption.needs_rotation(user.discord_access_token))
+
+    def test_rotation_does_not_overwrite_a_concurrent_refresh(self):
+        User = get_user_model()
+        user = User.objects.create_user("vixi", password="x")
+        user.set_discord_refresh_token("refresh")
+        user.save()
+
+        with override_settings(SECRET_KEY="new-key", SECRET_KEY_FALLBACKS=["old-key"]):
+            fresh = encryption.encrypt_token("fresh")
+
+            def refreshed_meanwhile(value):
+                # refresh_discord_tokens saves a new grant mid-rotation
+                User.objects.filter(pk=user.pk).update(discord_refresh_token=fresh)
+                return encryption.rotate_token(value)
+
+            out = StringIO()
+            with patch(
+                "snowsune.management.commands.reencrypt_tokens.rotate_token",
+                side_effect=refreshed_meanwhile,
+            ):
+                call_command("reencrypt_tokens", stdout=out)
+
+            self.assertIn("Re-encrypted 0 token(s)", out.getvalue())
+            self.assertIn("1 user(s) changed meanwhile", out.getvalue())
+            user.refresh_from_db()
+            self.assertEqual(user.get_discord_refresh_token(), "fresh")
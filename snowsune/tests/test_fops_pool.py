@@ -0,0 +1,92 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+from django.test import SimpleTestCase
+from psycopg2 import extensions, pool
+
+from apps.bot_manager.utils import FopsPool
+
+
+def _connection():
+    conn = MagicMock(closed=0)
+    conn.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_IDLE
+    return conn
+
+
+class FakeThreadedPool:
+    def __init__(self, *args, **kwargs):
+        self.idle = []
+        self.opened = []
+        self.closed = []
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        conn = _connection()
+        self.opened.append(conn)
+        return conn
+
+    def putconn(self, conn, close=False):
+        if close:
+            self.closed.append(conn)
+        else:
+            self.idle.append(conn)
+
+
+@patch.object(pool, "ThreadedConnectionPool", FakeThreadedPool)
+class FopsPoolTests(SimpleTestCase):
+    def make_pool(self, **kwargs):
+        options = {
+            "min_size": 1,
+            "max_size": 2,
+            "timeout": 0.01,
+            "health_check_interval": 30,
+        }
+        options.update(kwargs)
+        return FopsPool("postgres://fops", **options)
+
+    def test_connections_are_reused(self):
+        fops_pool = self.make_pool()
+        conn = fops_pool.getconn()
+        fops_pool.putconn(conn)
+
+        self.assertIs(fops_pool.getconn(), conn)
+        self.assertEqual(len(fops_pool._pool.opened), 1)
+        conn.cursor.assert_not_called()  # Recently used, no health check
+
+    def test_open_transaction_is_rolled_back_on_return(self):
+        fops_pool = self.make_pool()
+        conn = fops_pool.getconn()
+        conn.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_INTRANS
+        fops_pool.putconn(conn)
+        conn.rollback.assert_called_once()
+
+    def test_idle_broken_connection_is_replaced(self):
+        fops_pool = self.make_pool(health_check_interval=0)
+        conn = fops_pool.getconn()
+        fops_pool.putconn(conn)
+        conn.cursor.return_value.__enter__.return_value.execute.side_effect = (
+            psycopg2.OperationalError
+        )
+
+        replacement = fops_pool.getconn()
+        self.assertIsNot(replacement, conn)
+        self.assertEqual(fops_pool._pool.closed, [conn])
+
+    def test_closed_connection_is_dropped_on_return(self):
+        fops_pool = self.make_pool()
+        conn = fops_pool.getconn()
+        conn.closed = 2
+        fops_pool.putconn(conn)
+        self.assertEqual(fops_pool._pool.closed, [conn])
+
+    def test_exhausted_pool_times_out(self):
+        fops_pool = self.make_pool()
+        fops_pool.getconn()
+        fops_pool.getconn()
+
+        start = time.monotonic()
+        with self.assertRaises(pool.PoolError):
+            fops_pool.getconn()
+        self.assertLess(time.monotonic() - start, 1)
@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.bot_manager.models import FopsDatabase
+from apps.bot_manager.views.tables import _decode_cursor
+
+TABLE_INFO = {
+    "columns": ["id", "guild_id", "search_criteria"],
+    "primary_key": ["id"],
+    "sortable": ["id", "guild_id"],
+}
+
+
+@patch.object(FopsDatabase, "get_table_info", return_value=TABLE_INFO)
+class TableBrowserTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "vixi", password="x", is_staff=True
+        )
+        self.client.force_login(self.user)
+        self.url = reverse("bot_manager_table", args=["subscriptions"])
+
+    def test_staff_only(self, get_table_info):
+        self.user.is_staff = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertRedirects(
+            response, reverse("bot_manager_dashboard"), fetch_redirect_response=False
+        )
+        get_table_info.assert_not_called()
+
+    def test_unknown_table_is_rejected(self, get_table_info):
+        get_table_info.return_value = None
+        response = self.client.get(reverse("bot_manager_table", args=["x; DROP"]))
+        self.assertEqual(response.status_code, 302)
+
+    @patch.object(FopsDatabase, "get_page")
+    def test_keyset_pages_with_projection_and_sort(self, get_page, _):
+        get_page.return_value = (
+            [{"guild_id": 5, "id": 1}, {"guild_id": 7, "id": 2}],
+            True,
+        )
+
+        response = self.client.get(
+            self.url, {"columns": "guild_id,bogus", "sort": "guild_id", "limit": 2}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        get_page.assert_called_with(
+            "subscriptions", ["guild_id", "id"], ["guild_id", "id"], False, None, 2
+        )
+        self.assertEqual(response.context["columns"], ["guild_id"])
+        self.assertEqual(response.context["rows"], [[5], [7]])
+
+        # The next link carries the last row's key
+        next_url = response.context["next_url"]
+        self.client.get(self.url + next_url)
+        after = get_page.call_args.args[4]
+        self.assertEqual(after, [7, 2])
+
+    @patch.object(FopsDatabase, "get_page", return_value=([], False))
+    def test_unindexed_sort_falls_back_to_primary_key(self, get_page, _):
+        self.client.get(self.url, {"sort": "search_criteria"})
+        self.assertEqual(get_page.call_args.args[2], ["id"])
+
+    @patch.object(FopsDatabase, "iter_rows")
+    def test_csv_export_streams(self, iter_rows, _):
+        iter_rows.return_value = iter(
+            [{"id": i, "guild_id": 1, "search_criteria": "fox"} for i in range(3)]
+        )
+
+        response = self.client.get(self.url, {"format": "csv"})
+
+        self.assertTrue(response.streaming)
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(body.splitlines()[0], "id,guild_id,search_criteria")
+        self.assertEqual(len(body.splitlines()), 4)
+
+    def test_mangled_cursor_is_ignored(self, _):
+        self.assertIsNone(_decode_cursor("not base64!", 1))
+        self.assertIsNone(_decode_cursor("WzEsMl0=", 1))  # [1, 2], wrong length
@@ -0,0 +1,41 @@
+from unittest.mock import Mock, patch
+
+import requests
+from django.test import SimpleTestCase
+
+from snowsune import http_client
+
+
+class HttpClientTests(SimpleTestCase):
+    def test_one_session_per_host(self):
+        first = http_client.get_session("https://discord.com/api/users/@me")
+        second = http_client.get_session("https://discord.com/api/guilds/1")
+        other = http_client.get_session("https://example.com/feed.ics")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        adapter = first.get_adapter("https://discord.com/")
+        self.assertIs(adapter.max_retries, http_client.RETRY)
+
+    @patch.object(requests.Session, "request")
+    def test_default_timeout_and_stats(self, session_request):
+        session_request.return_value = Mock(status_code=200)
+        host = "https://stats.example"
+
+        http_client.get(f"{host}/a")
+        http_client.post(f"{host}/b", json={}, timeout=1)
+
+        self.assertEqual(
+            session_request.call_args_list[0].kwargs["timeout"],
+            http_client.DEFAULT_TIMEOUT,
+        )
+        self.assertEqual(session_request.call_args_list[1].kwargs["timeout"], 1)
+        self.assertEqual(http_client.stats()[host]["calls"], 2)
+        self.assertEqual(http_client.stats()[host]["errors"], 0)
+
+    @patch.object(requests.Session, "request", side_effect=requests.ConnectionError)
+    def test_errors_are_counted_and_raised(self, session_request):
+        host = "https://down.example"
+        with self.assertRaises(requests.ConnectionError):
+            http_client.get(f"{host}/")
+        self.assertEqual(http_client.stats()[host]["errors"], 1)
@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from snowsune.views import image_utils
+
+
+class FormatPreviewCacheTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        os.makedirs(os.path.join(self.media_root, "blog", "featured"))
+        self.image_name = "blog/featured/wide.png"
+        Image.new("RGBA", (800, 800), (255, 0, 0, 128)).save(
+            os.path.join(self.media_root, self.image_name)
+        )
+
+    def _get(self, path):
+        return self.client.get(f"/format_preview/{path}")
+
+    def test_preview_rendered_once_then_served_from_disk(self):
+        with patch.object(
+            image_utils,
+            "create_social_preview_image",
+            wraps=image_utils.create_social_preview_image,
+        ) as render:
+            first = self._get(self.image_name)
+            second = self._get(self.image_name)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(render.call_count, 1)
+
+        cache_path = image_utils.get_preview_cache_path(self.image_name)
+        self.assertTrue(os.path.exists(cache_path))
+        with Image.open(cache_path) as preview:
+            self.assertEqual(preview.size, (1200, 628))
+
+    def test_changed_source_gets_a_new_preview(self):
+        old_path = image_utils.get_preview_cache_path(self.image_name)
+        source = os.path.join(self.media_root, self.image_name)
+        stat = os.stat(source)
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertNotEqual(
+            image_utils.get_preview_cache_path(self.image_name), old_path
+        )
+
+    def test_paths_outside_media_root_are_404(self):
+        self.assertEqual(self._get("../../etc/passwd").status_code, 404)
+        self.assertEqual(self._get("missing.png").status_code, 404)
+
+    def test_etag_is_stable_and_revalidation_skips_rendering(self):
+        first = self._get(self.image_name)
+        etag = first["ETag"]
+        self.assertEqual(self._get(self.image_name)["ETag"], etag)
+        self.assertIn("Last-Modified", first)
+
+        with patch.object(image_utils, "get_or_create_social_preview") as render:
+            revalidated = self.client.get(
+                f"/format_preview/{self.image_name}", HTTP_IF_NONE_MATCH=etag
+            )
+            by_date = self.client.get(
+                f"/format_preview/{self.image_name}",
+                HTTP_IF_MODIFIED_SINCE=first["Last-Modified"],
+            )
+
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(by_date.status_code, 304)
+        self.assertIn("max-age=86400", revalidated["Cache-Control"])
+        render.assert_not_called()
+
+    def test_etag_changes_with_source(self):
+        etag = self._get(self.image_name)["ETag"]
+        source = os.path.join(self.media_root, self.image_name)
+        stat = os.stat(source)
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        response = self.client.get(
+            f"/format_preview/{self.image_name}", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
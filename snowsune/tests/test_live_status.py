@@ -0,0 +1,55 @@
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from snowsune.views import live_status
+
+LOCMEM_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "live-status-tests",
+    }
+}
+
+PAYLOAD = {
+    "active_users": 3,
+    "server_offset": "1.0",
+    "ko_fi_progress": "50.0",
+    "timestamp": "2026-01-01T00:00:00+00:00",
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class LiveStatusCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch("snowsune.views.live_status.build_live_payload", return_value=PAYLOAD)
+    def test_payload_shared_across_visitors(self, mock_build):
+        first = self.client.get(reverse("live_status_api"))
+        self.client.cookies["sessionid"] = "someone-else"
+        second = self.client.get(reverse("live_status_api"))
+
+        self.assertEqual(first.json(), PAYLOAD)
+        self.assertEqual(second.json(), PAYLOAD)
+        self.assertEqual(mock_build.call_count, 1)
+        self.assertNotIn("Cookie", second.get("Vary", ""))
+
+    @patch("snowsune.views.live_status.threading.Thread")
+    @patch("snowsune.views.live_status.build_live_payload", return_value=PAYLOAD)
+    def test_stale_payload_served_while_refreshing_once(self, mock_build, mock_thread):
+        cache.set(
+            live_status.LIVE_PAYLOAD_CACHE_KEY,
+            {"payload": {"active_users": 1}, "generated_at": time.time() - 60},
+            300,
+        )
+
+        self.assertEqual(live_status.get_live_payload(), {"active_users": 1})
+        self.assertEqual(live_status.get_live_payload(), {"active_users": 1})
+
+        # Only the first stale read wins the refresh lock
+        self.assertEqual(mock_thread.call_count, 1)
+        mock_build.assert_not_called()
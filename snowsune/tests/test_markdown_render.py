@@ -0,0 +1,91 @@
+import threading
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.blog.models import BlogPost
+from snowsune import markdown_render, search
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM)
+class MarkdownRenderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_renders_with_preset_extensions(self):
+        html = markdown_render.render("# Title\n\n| a |\n|---|\n| b |")
+
+        self.assertIn('<h1 id="title">Title</h1>', html)
+        self.assertIn("<table>", html)
+        self.assertEqual(markdown_render.render(""), "")
+        self.assertNotIn('id="', markdown_render.render("# Title", "plain"))
+
+    def test_repeat_renders_hit_the_cache(self):
+        with patch.object(
+            markdown_render, "render_uncached", wraps=markdown_render.render_uncached
+        ) as uncached:
+            first = markdown_render.render("Some *text*")
+            second = markdown_render.render("Some *text*")
+            markdown_render.render("Some *text*", "blurb")
+
+        self.assertEqual(first, second)
+        self.assertEqual(uncached.call_count, 2)
+
+    def test_version_depends_on_preset_config(self):
+        self.assertNotEqual(
+            markdown_render.preset_version("default"),
+            markdown_render.preset_version("blurb"),
+        )
+
+        presets = {"default": {"extensions": ["extra"], "configs": {}}}
+        with patch.dict(markdown_render.PRESETS, presets), patch.dict(
+            markdown_render._versions, clear=True
+        ):
+            changed = markdown_render.preset_version("default")
+        self.assertNotEqual(changed, markdown_render.preset_version("default"))
+
+    def test_converter_is_reused_per_thread_and_reset(self):
+        footnote = markdown_render.render_uncached("Hi[^1]\n\n[^1]: Note")
+        self.assertIn("Note", footnote)
+        # State from the previous document doesn't leak into the next one
+        self.assertNotIn("Note", markdown_render.render_uncached("Plain"))
+
+        here = markdown_render._converter("default")
+        self.assertIs(markdown_render._converter("default"), here)
+
+        other = []
+        thread = threading.Thread(
+            target=lambda: other.append(markdown_render._converter("default"))
+        )
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], here)
+
+
+class RerenderCommandTests(TestCase):
+    def test_rerenders_stale_html_and_reindexes(self):
+        user = get_user_model().objects.create_user(username="vixi", password="x")
+        post = BlogPost.objects.create(
+            title="Post",
+            content="Some **bold** otters",
+            author=user,
+            status="published",
+        )
+        BlogPost.objects.filter(pk=post.pk).update(content_html="<p>stale</p>")
+
+        out = StringIO()
+        call_command("rerender_markdown", "--dry-run", stdout=out)
+        self.assertIn("blog.BlogPost.content_html: 1/1 would change", out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, "<p>stale</p>")
+
+        call_command("rerender_markdown", stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, "<p>Some <strong>bold</strong> otters</p>")
+        self.assertEqual(len(search.search("otters")), 1)
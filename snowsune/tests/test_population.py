@@ -0,0 +1,108 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.bot_manager import population
+from apps.bot_manager.members import GuildMembers
+from apps.bot_manager.models import PopulationSnapshot
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+MEMBERS = [
+    {"user": {"id": "1"}, "roles": ["10"]},
+    {"user": {"id": "2"}, "roles": ["20", "10"]},
+    {"user": {"id": "3"}, "roles": ["99"]},
+    {"user": {"id": "4"}, "roles": [20]},
+]
+
+
+class SpeciesMapTests(TestCase):
+    def test_first_and_hybrid_counts(self):
+        species_map = population.SpeciesMap({"Vulpine": {"10"}, "Canine": {"20"}})
+
+        first, hybrid, matched = species_map.count(GuildMembers.from_discord(MEMBERS))
+
+        self.assertEqual(first, {"Vulpine": 2, "Canine": 1})
+        self.assertEqual(hybrid, {"Vulpine": 2, "Canine": 2})
+        self.assertEqual(matched, 3)
+
+    def test_yaml_is_compiled_once_per_mtime(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False) as f:
+            f.write('Vulpine:\n  - "10"\n')
+        self.addCleanup(os.unlink, f.name)
+
+        first = population.load_species_map(f.name)
+        self.assertIs(population.load_species_map(f.name), first)
+
+        with open(f.name, "w") as out:
+            out.write('Vulpine:\n  - "10"\nCanine:\n  - "20"\n')
+        os.utime(f.name, ns=(1, os.stat(f.name).st_mtime_ns + 1_000_000))
+        reloaded = population.load_species_map(f.name)
+        self.assertEqual(reloaded.species, ["Vulpine", "Canine"])
+
+    def test_missing_yaml(self):
+        self.assertIsNone(population.load_species_map("/nonexistent/species.yaml"))
+
+
+@override_settings(CACHES=LOCMEM)
+class PopulationSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.species_map = population.SpeciesMap({"Vulpine": {"10"}, "Canine": {"20"}})
+
+    @patch("apps.bot_manager.population.discord_api.get_guild_members")
+    def test_snapshot_is_stored_and_served_from_cache(self, get_guild_members):
+        get_guild_members.return_value = GuildMembers.from_discord(MEMBERS)
+        with patch.object(
+            population, "load_species_map", return_value=self.species_map
+        ):
+            snapshot = population.take_snapshot("42")
+
+        self.assertEqual(snapshot.first_counts, {"Vulpine": 2, "Canine": 1})
+        self.assertEqual(snapshot.members_count, 4)
+        with self.assertNumQueries(0):
+            self.assertEqual(population.latest_snapshot("42").pk, snapshot.pk)
+
+    @patch("apps.bot_manager.population.discord_api.get_guild_members")
+    def test_failed_member_fetch_stores_nothing(self, get_guild_members):
+        get_guild_members.return_value = GuildMembers.from_discord([])
+        with patch.object(
+            population, "load_species_map", return_value=self.species_map
+        ):
+            with self.assertRaises(RuntimeError):
+                population.take_snapshot("42")
+
+        self.assertFalse(PopulationSnapshot.objects.exists())
+        self.assertIsNone(population.latest_snapshot("42"))
+
+    def test_history_is_oldest_first(self):
+        PopulationSnapshot.objects.create(guild_id="42", first_counts={"Vulpine": 1})
+        PopulationSnapshot.objects.create(
+            guild_id="42", first_counts={"Vulpine": 3, "Canine": 2}
+        )
+
+        trend = population.history("42")
+
+        self.assertEqual(len(trend["labels"]), 2)
+        self.assertEqual(trend["series"], {"Vulpine": [1, 3], "Canine": [0, 2]})
+
+    @patch("apps.bot_manager.population.discord_api.get_guild_members")
+    def test_view_only_reads_the_snapshot(self, get_guild_members):
+        PopulationSnapshot.objects.create(
+            guild_id=population.default_guild_id(),
+            first_counts={"Vulpine": 2, "Canine": 0},
+            hybrid_counts={"Vulpine": 2, "Canine": 1},
+            members_count=4,
+            matched_members=3,
+        )
+
+        response = self.client.get(reverse("bot_manager_pop"), {"hybrid": "1"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["chart_labels"], '["Vulpine", "Canine"]')
+        self.assertEqual(response.context["errors"], [])
+        get_guild_members.assert_not_called()
@@ -0,0 +1,270 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.blog.models import BlogPost, Tag
+from apps.characters import store as character_store
+from apps.comics.models import ComicPage
+from apps.custompages.models import CustomPage
+from snowsune import search
+from snowsune.models import SearchDocument
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="vixi", password="testpass123"
+        )
+
+    def make_post(self, title, content, status="published", **kwargs):
+        return BlogPost.objects.create(
+            title=title,
+            content=content,
+            author=self.user,
+            status=status,
+            published_at=timezone.now(),
+            **kwargs,
+        )
+
+    def kinds_and_ids(self, query, **kwargs):
+        return [(h["kind"], h["object_id"]) for h in search.search(query, **kwargs)]
+
+    def test_published_posts_are_indexed_and_drafts_are_not(self):
+        post = self.make_post("Foxes in winter", "Snow everywhere.")
+        self.make_post("Foxes draft", "Not yet.", status="draft")
+
+        self.assertEqual(self.kinds_and_ids("foxes"), [("blog", str(post.pk))])
+
+    def test_unpublishing_and_deleting_remove_the_document(self):
+        post = self.make_post("Foxes in winter", "Snow everywhere.")
+        post.status = "draft"
+        post.save()
+        self.assertFalse(SearchDocument.objects.filter(kind="blog").exists())
+
+        post.status = "published"
+        post.save()
+        post.delete()
+        self.assertEqual(search.search("foxes"), [])
+
+    def test_title_matches_rank_above_body_matches(self):
+        body = self.make_post("Winter walk", "We saw an otter by the river.")
+        title = self.make_post("Otter sighting", "Down by the river again.")
+
+        ids = [h["object_id"] for h in search.search("otter")]
+
+        self.assertEqual(ids, [str(title.pk), str(body.pk)])
+
+    def test_prefix_and_multi_word_queries(self):
+        post = self.make_post("Synthesizer build log", "Soldering the filter board.")
+
+        self.assertEqual(self.kinds_and_ids("synth"), [("blog", str(post.pk))])
+        self.assertEqual(self.kinds_and_ids("filter solder"), [("blog", str(post.pk))])
+        self.assertEqual(search.search("filter cake"), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.make_post("Quotes", 'He said "hello" (twice) AND left.')
+
+        self.assertEqual(len(search.search('"hello AND (twice')), 1)
+        self.assertEqual(search.search("***"), [])
+
+    def test_tags_are_searchable_and_follow_renames(self):
+        post = self.make_post("Untitled", "Nothing to see.")
+        tag = Tag.objects.create(name="Electronics", slug="electronics")
+        post.tags.add(tag)
+        self.assertEqual(self.kinds_and_ids("electronics"), [("blog", str(post.pk))])
+
+        tag.name = "Hardware"
+        tag.save()
+        self.assertEqual(search.search("electronics"), [])
+        self.assertEqual(self.kinds_and_ids("hardware"), [("blog", str(post.pk))])
+
+    def test_snippet_highlights_and_escapes(self):
+        self.make_post("Post", "<script>x</script> A lovely <b>badger</b> appeared.")
+
+        snippet = search.search("badger")[0]["snippet"]
+
+        self.assertIn("<mark>badger</mark>", snippet)
+        self.assertNotIn("<script>", snippet)
+
+    def test_html_entities_are_indexed_as_text(self):
+        self.make_post("Post", "Salt & pepper, <i>fish</i> & chips.")
+
+        self.assertEqual(search.search("amp"), [])
+        snippet = search.search("pepper")[0]["snippet"]
+        self.assertIn("Salt &amp; <mark>pepper</mark>", snippet)
+        self.assertNotIn("&amp;amp;", snippet)
+
+    def test_comics_pages_and_kind_filter(self):
+        comic = ComicPage.objects.create(
+            page_number=1,
+            title="The lighthouse",
+            transcript={"elements": [{"text": "Keeper: the lamp is out!"}]},
+            published_at=timezone.now() - timedelta(days=1),
+        )
+        page = CustomPage.objects.create(
+            title="About", path="about", content="Who keeps the lighthouse?"
+        )
+        self.make_post("Lighthouse trip", "We went.")
+
+        self.assertEqual(self.kinds_and_ids("lamp"), [("comic", str(comic.pk))])
+        self.assertEqual(
+            self.kinds_and_ids("lighthouse", kinds=["page"]),
+            [("page", str(page.pk))],
+        )
+        self.assertEqual(search.count("lighthouse"), 3)
+
+    def test_scheduled_comic_is_hidden_until_published(self):
+        ComicPage.objects.create(
+            page_number=2,
+            title="Future lighthouse",
+            published_at=timezone.now() + timedelta(days=1),
+        )
+
+        self.assertEqual(search.search("lighthouse"), [])
+        self.assertEqual(search.count("lighthouse"), 0)
+
+    def test_rebuild_command(self):
+        post = self.make_post("Foxes", "Snow.")
+        SearchDocument.objects.all().delete()
+        SearchDocument.objects.create(kind="blog", object_id="999", title="Gone")
+
+        call_command("rebuild_search_index", kind=["blog"], stdout=StringIO())
+
+        self.assertEqual(self.kinds_and_ids("foxes"), [("blog", str(post.pk))])
+        self.assertFalse(SearchDocument.objects.filter(object_id="999").exists())
+
+    def test_blog_list_uses_ranked_results_with_snippets(self):
+        self.make_post("Winter walk", "We saw an otter by the river.")
+        self.make_post("Otter sighting", "Down by the river again.")
+        self.make_post("Unrelated", "Nothing here.")
+
+        response = self.client.get(reverse("blog:blog_list"), {"search": "otter"})
+
+        posts = list(response.context["posts"])
+        self.assertEqual([p.title for p in posts], ["Otter sighting", "Winter walk"])
+        self.assertContains(response, "<mark>otter</mark>")
+
+    def test_blog_list_pages_through_every_match(self):
+        tag = Tag.objects.create(name="Rivers", slug="rivers")
+        for i in range(23):
+            post = self.make_post(f"Otter {i}", "An otter.")
+            if i % 2:
+                post.tags.add(tag)
+        self.make_post("Badger", "Not this one.")
+
+        url = reverse("blog:blog_list")
+        response = self.client.get(url, {"search": "otter", "page": 3})
+        self.assertEqual(response.context["paginator"].count, 23)
+        self.assertEqual(len(response.context["posts"]), 3)
+        self.assertContains(response, "<mark>Otter</mark>")
+
+        response = self.client.get(url, {"search": "otter", "tag": "rivers"})
+        self.assertEqual(response.context["paginator"].count, 11)
+        self.assertTrue(
+            all(p.tags.filter(pk=tag.pk) for p in response.context["posts"])
+        )
+
+
+class CharacterIndexTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch.object(
+            character_store, "STORE", character_store.CharacterStore(self.tmp.name)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, name, text, mtime=None):
+        path = os.path.join(self.tmp.name, f"{name}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def test_rebuild_indexes_character_files(self):
+        self.write("vixi_argorrok", "# Vixi\n\nA **sergal** engineer.")
+
+        self.assertEqual(search.rebuild([search.CHARACTER_KIND]), {"character": 1})
+
+        [hit] = search.search("sergal")
+        self.assertEqual(hit["kind"], "character")
+        self.assertEqual(hit["kind_label"], "Character")
+        self.assertEqual(hit["title"], "Vixi Argorrok")
+        self.assertEqual(hit["url"], "/characters/vixi_argorrok/")
+        self.assertNotIn("**", hit["snippet"])
+
+    def test_rebuild_skips_unchanged_files_and_drops_deleted_ones(self):
+        old = timezone.now().timestamp() - 3600
+        self.write("rhettan", "Likes boats.", mtime=old)
+        self.write("gone", "Temporary.", mtime=old)
+        search.rebuild([search.CHARACTER_KIND])
+
+        # Same mtime, so the edit isn't picked up without force
+        self.write("rhettan", "Likes trains.", mtime=old)
+        os.remove(os.path.join(self.tmp.name, "gone.md"))
+        search.rebuild([search.CHARACTER_KIND])
+        self.assertEqual(len(search.search("boats")), 1)
+        self.assertEqual(search.search("temporary"), [])
+
+        search.rebuild([search.CHARACTER_KIND], force=True)
+        self.assertEqual(search.search("boats"), [])
+        self.assertEqual(len(search.search("trains")), 1)
+
+        # A newer file is picked up on its own
+        self.write("rhettan", "Likes planes.")
+        search.rebuild([search.CHARACTER_KIND])
+        self.assertEqual(len(search.search("planes")), 1)
+
+
+class SearchViewTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            username="vixi", password="testpass123"
+        )
+        for i in range(3):
+            BlogPost.objects.create(
+                title=f"Badger post {i}",
+                content="Badgers.",
+                author=user,
+                status="published",
+                published_at=timezone.now(),
+            )
+        CustomPage.objects.create(title="Badger facts", path="badgers", content="x")
+
+    def test_api_paginates_and_filters_by_kind(self):
+        response = self.client.get(
+            reverse("search_api"), {"q": "badger", "per_page": 2, "page": 2}
+        )
+
+        data = response.json()
+        self.assertEqual(data["total"], 4)
+        self.assertEqual(data["num_pages"], 2)
+        self.assertEqual(data["page"], 2)
+        self.assertEqual(len(data["results"]), 2)
+        self.assertIn("<mark>", data["results"][0]["snippet"])
+
+        data = self.client.get(
+            reverse("search_api"), {"q": "badger", "kind": "page,bogus"}
+        ).json()
+        self.assertEqual(data["kinds"], ["page"])
+        self.assertEqual([r["title"] for r in data["results"]], ["Badger facts"])
+
+    def test_api_without_query(self):
+        data = self.client.get(reverse("search_api")).json()
+        self.assertEqual((data["total"], data["results"]), (0, []))
+
+    def test_page_renders_results(self):
+        response = self.client.get(reverse("search"), {"q": "badger", "kind": "blog"})
+
+        self.assertContains(response, "3 results")
+        self.assertContains(response, "Badger post 0")
+        self.assertNotContains(response, "Badger facts")
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from snowsune import site_settings
+from snowsune.models import SiteSetting
+
+LOCMEM_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "site-settings-tests",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SiteSettingCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        site_settings.invalidate()
+
+    def test_get_setting_returns_value_and_default(self):
+        SiteSetting.objects.create(key="discord_invite", value="https://discord.gg/x")
+        self.assertEqual(
+            site_settings.get_setting("discord_invite"), "https://discord.gg/x"
+        )
+        self.assertEqual(site_settings.get_setting("missing", "fallback"), "fallback")
+
+    def test_warm_cache_does_no_queries(self):
+        SiteSetting.objects.create(key="KO_FI_URL", value="https://ko-fi.com/test")
+        site_settings.get_setting("KO_FI_URL")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                site_settings.get_setting("KO_FI_URL"), "https://ko-fi.com/test"
+            )
+            site_settings.get_setting("GOOGLE_TAG")
+            site_settings.get_setting("discord_invite")
+
+    def test_save_and_delete_invalidate_snapshot(self):
+        setting = SiteSetting.objects.create(key="GOOGLE_TAG", value="G-OLD")
+        self.assertEqual(site_settings.get_setting("GOOGLE_TAG"), "G-OLD")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            setting.value = "G-NEW"
+            setting.save()
+        self.assertEqual(site_settings.get_setting("GOOGLE_TAG"), "G-NEW")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            setting.delete()
+        self.assertIsNone(site_settings.get_setting("GOOGLE_TAG"))
+
+    def test_invalidation_waits_for_commit(self):
+        setting = SiteSetting.objects.create(key="GOOGLE_TAG", value="G-OLD")
+        self.assertEqual(site_settings.get_setting("GOOGLE_TAG"), "G-OLD")
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            setting.value = "G-NEW"
+            setting.save()
+            # Still uncommitted: the cached snapshot stays as it was
+            self.assertEqual(site_settings.get_setting("GOOGLE_TAG"), "G-OLD")
+        self.assertEqual(callbacks, [site_settings.invalidate])
+
+    def test_discord_redirect_uses_cached_setting(self):
+        SiteSetting.objects.create(key="discord_invite", value="https://discord.gg/y")
+        response = self.client.get("/discord")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response["Location"], "https://discord.gg/y")
+
+    def test_home_page_context_reads_site_settings(self):
+        SiteSetting.objects.create(key="KO_FI_URL", value="https://ko-fi.com/test")
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response.context["ko_fi_url"], "https://ko-fi.com/test")
+        self.assertEqual(response.context["discord_invite"], "")
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.blog.models import BlogPost
+from apps.comics.models import ComicPage
+from snowsune import sitemaps
+
+LOCMEM = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "sitemap-tests",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM, SITE_URL="https://example.test")
+class SitemapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="vixi", password="testpass123", email_verified=True
+        )
+        self.post = BlogPost.objects.create(
+            title="Hello",
+            slug="hello",
+            content="Hi",
+            author=self.user,
+            status="published",
+            published_at=timezone.now(),
+        )
+        BlogPost.objects.create(
+            title="Draft", slug="draft", content="Hi", author=self.user
+        )
+
+    def test_index_lists_every_section(self):
+        response = self.client.get("/sitemap.xml")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/xml")
+        for section in sitemaps.SECTIONS:
+            self.assertContains(
+                response, f"<loc>https://example.test/sitemap-{section}.xml</loc>"
+            )
+
+    def test_sections_contain_published_content_only(self):
+        blog = self.client.get("/sitemap-blog.xml")
+        self.assertContains(blog, "https://example.test/blog/post/hello/")
+        self.assertNotContains(blog, "/blog/post/draft/")
+        self.assertIn("Last-Modified", blog)
+
+        users = self.client.get("/sitemap-users.xml")
+        self.assertContains(users, "https://example.test/users/vixi/")
+
+        self.assertEqual(self.client.get("/sitemap-nope.xml").status_code, 404)
+
+    def test_cached_and_conditional(self):
+        first = self.client.get("/sitemap-blog.xml")
+
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get(
+                "/sitemap-blog.xml", HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+    def test_saving_content_invalidates_its_section(self):
+        etag = self.client.get("/sitemap-blog.xml")["ETag"]
+
+        self.post.slug = "hello-again"
+        self.post.save()
+
+        blog = self.client.get("/sitemap-blog.xml", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(blog.status_code, 200)
+        self.assertContains(blog, "/blog/post/hello-again/")
+
+    def test_scheduled_comic_caps_comics_ttl(self):
+        ComicPage.objects.create(
+            page_number=1,
+            title="Soon",
+            published_at=timezone.now() + timedelta(minutes=5),
+        )
+        self.assertLessEqual(sitemaps._section_ttl("comics"), 5 * 60 + 1)
+        self.assertEqual(sitemaps._section_ttl("blog"), sitemaps.SITEMAP_TTL)
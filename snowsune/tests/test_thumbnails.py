@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from snowsune import thumbnails
+
+
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        os.makedirs(os.path.join(self.media_root, "comics", "pages"))
+        self.image_name = "comics/pages/page.png"
+        Image.new("RGB", (1000, 500), (0, 128, 255)).save(
+            os.path.join(self.media_root, self.image_name)
+        )
+
+    def _render(self, preset):
+        return Template(
+            '{% load image_tags %}{% thumbnail name preset alt="Page" %}'
+        ).render(Context({"name": self.image_name, "preset": preset}))
+
+    def test_tag_links_lazy_view_then_media_files(self):
+        html = self._render("md")
+        self.assertIn('<picture class="thumbnail">', html)
+        self.assertIn("/thumbnail/md/jpeg/comics/pages/page.png", html)
+        self.assertIn("/thumbnail/xs/jpeg/comics/pages/page.png 160w", html)
+        self.assertNotIn("1280w", html)
+        for fmt in thumbnails.MODERN_FORMATS:
+            self.assertIn(f'type="image/{fmt}"', html)
+
+        thumbnails.generate_derivatives(self.image_name)
+        html = self._render("md")
+        self.assertNotIn("/thumbnail/", html)
+        self.assertIn("/media/thumbs/", html)
+
+    def test_presets_never_upscale(self):
+        path = thumbnails.get_or_create_derivative(self.image_name, "lg", "jpeg")
+        with Image.open(path) as img:
+            self.assertEqual(img.size, (1000, 500))
+
+        self.assertIn("1000w", self._render("lg"))
+        self.assertNotIn("1280w", self._render("lg"))
+
+    def test_backfill_command_covers_image_fields(self):
+        user = get_user_model().objects.create_user("vixi", password="x")
+        get_user_model().objects.filter(pk=user.pk).update(
+            profile_picture=self.image_name
+        )
+
+        call_command("generate_thumbnails", stdout=StringIO())
+
+        self.assertNotIn("/thumbnail/", self._render("lg"))
+        self.assertEqual(thumbnails.generate_derivatives(self.image_name), 0)
+
+    def test_lazy_view_renders_and_serves(self):
+        response = self.client.get(f"/thumbnail/sm/webp/{self.image_name}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+
+        path = thumbnails.get_or_create_derivative(self.image_name, "sm", "webp")
+        with Image.open(path) as img:
+            self.assertEqual(img.size, (320, 160))
+
+        revalidated = self.client.get(
+            f"/thumbnail/sm/webp/{self.image_name}",
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_bad_requests_are_404(self):
+        self.assertEqual(
+            self.client.get(f"/thumbnail/huge/webp/{self.image_name}").status_code,
+            404,
+        )
+        self.assertEqual(
+            self.client.get(f"/thumbnail/sm/tiff/{self.image_name}").status_code, 404
+        )
+        self.assertEqual(
+            self.client.get("/thumbnail/sm/webp/../../etc/passwd").status_code, 404
+        )
+
+    def test_animated_images_fall_back_to_plain_img(self):
+        frames = [Image.new("RGB", (100, 100), c) for c in ("red", "blue")]
+        frames[0].save(
+            os.path.join(self.media_root, "anim.gif"),
+            save_all=True,
+            append_images=frames[1:],
+        )
+        html = Template('{% load image_tags %}{% thumbnail "anim.gif" "sm" %}').render(
+            Context()
+        )
+        self.assertEqual(html, '<img src="/media/anim.gif">')
@@ -0,0 +1,152 @@
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+import requests
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.commorganizer.utils import send_discord_webhook
+from snowsune import webhooks
+from snowsune.models import OutboundWebhook
+
+URL = "https://discord.com/api/webhooks/1/abc"
+OTHER_URL = "https://discord.com/api/webhooks/2/def"
+
+
+def _response(status=204, headers=None, json_body=None):
+    response = Mock(status_code=status, headers=headers or {}, text="")
+    response.ok = 200 <= status < 300
+    response.json.return_value = json_body or {}
+    return response
+
+
+@patch("snowsune.webhooks.http_client.post")
+class WebhookQueueTests(TestCase):
+    def test_send_discord_webhook_only_queues(self, post):
+        send_discord_webhook(URL, "hello")
+
+        post.assert_not_called()
+        job = OutboundWebhook.objects.get()
+        self.assertEqual(job.status, OutboundWebhook.PENDING)
+        self.assertEqual(job.payload, {"content": "hello"})
+
+    def test_plain_messages_to_one_webhook_are_merged(self, post):
+        post.return_value = _response()
+        webhooks.enqueue(URL, "one")
+        webhooks.enqueue(OTHER_URL, "elsewhere")
+        webhooks.enqueue(URL, "two")
+        webhooks.enqueue(URL, "x" * 1999)
+
+        counts = webhooks.process_due()
+
+        self.assertEqual(counts["sent"], 4)
+        self.assertEqual(post.call_count, 3)
+        self.assertEqual(
+            post.call_args_list[0].kwargs["json"], {"content": "one\n\ntwo"}
+        )
+        self.assertFalse(
+            OutboundWebhook.objects.exclude(status=OutboundWebhook.SENT).exists()
+        )
+
+    def test_coalesce_key_supersedes_pending_jobs(self, post):
+        old = webhooks.enqueue(URL, "leader: a", coalesce_key="bookclub:leader")
+        new = webhooks.enqueue(URL, "leader: b", coalesce_key="bookclub:leader")
+
+        old.refresh_from_db()
+        self.assertEqual(old.status, OutboundWebhook.SUPERSEDED)
+
+        post.return_value = _response()
+        webhooks.process_due()
+        post.assert_called_once()
+        self.assertEqual(post.call_args.kwargs["json"], {"content": "leader: b"})
+        new.refresh_from_db()
+        self.assertEqual(new.status, OutboundWebhook.SENT)
+
+    def test_attachments_are_sent_as_multipart(self, post):
+        post.return_value = _response(200)
+        webhooks.enqueue(URL, "look", attachment=b"png", attachment_name="a.png")
+
+        webhooks.process_due()
+
+        kwargs = post.call_args.kwargs
+        self.assertEqual(kwargs["files"], {"file": ("a.png", b"png")})
+        self.assertIn('"content": "look"', kwargs["data"]["payload_json"])
+
+    def test_rate_limited_jobs_wait_without_using_an_attempt(self, post):
+        post.return_value = _response(429, headers={"Retry-After": "30"})
+        job = webhooks.enqueue(URL, "hello")
+
+        counts = webhooks.process_due()
+
+        job.refresh_from_db()
+        self.assertEqual(counts["deferred"], 1)
+        self.assertEqual(job.status, OutboundWebhook.PENDING)
+        self.assertEqual(job.attempts, 0)
+        self.assertGreater(job.next_attempt_at, timezone.now() + timedelta(seconds=25))
+
+    def test_exhausted_bucket_defers_next_send_to_same_webhook(self, post):
+        post.return_value = _response(
+            204,
+            headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "2"},
+        )
+        webhooks.enqueue(URL, "first", attachment=b"1", attachment_name="1.png")
+        webhooks.enqueue(URL, "second", attachment=b"2", attachment_name="2.png")
+
+        counts = webhooks.process_due()
+
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(counts, {"sent": 1, "retried": 0, "failed": 0, "deferred": 1})
+
+    def test_server_errors_retry_with_backoff_then_fail(self, post):
+        post.side_effect = requests.ConnectionError("boom")
+        job = webhooks.enqueue(URL, "hello")
+
+        webhooks.process_due()
+        job.refresh_from_db()
+        self.assertEqual(job.status, OutboundWebhook.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("boom", job.last_error)
+        self.assertGreater(job.next_attempt_at, timezone.now())
+
+        OutboundWebhook.objects.filter(pk=job.pk).update(
+            attempts=webhooks.MAX_ATTEMPTS - 1, next_attempt_at=timezone.now()
+        )
+        post.side_effect = None
+        post.return_value = _response(502)
+        webhooks.process_due()
+        job.refresh_from_db()
+        self.assertEqual(job.status, OutboundWebhook.FAILED)
+        self.assertEqual(job.last_status_code, 502)
+
+    def test_client_errors_fail_immediately(self, post):
+        post.return_value = _response(404)
+        job = webhooks.enqueue(URL, "hello")
+
+        counts = webhooks.process_due()
+
+        job.refresh_from_db()
+        self.assertEqual(counts["failed"], 1)
+        self.assertEqual(job.status, OutboundWebhook.FAILED)
+
+    def test_jobs_taken_over_by_another_worker_are_not_sent_twice(self, post):
+        first = webhooks.enqueue(URL, "1", attachment=b"1", attachment_name="1.png")
+        second = webhooks.enqueue(URL, "2", attachment=b"2", attachment_name="2.png")
+        other_claim = timezone.now() + timedelta(hours=1)
+
+        def slow_send(*args, **kwargs):
+            # Our claim on the second job expired and another worker took it
+            OutboundWebhook.objects.filter(pk=second.pk).update(
+                next_attempt_at=other_claim
+            )
+            return _response()
+
+        post.side_effect = slow_send
+        counts = webhooks.process_due()
+
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(counts["sent"], 1)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.status, OutboundWebhook.SENT)
+        self.assertEqual(second.status, OutboundWebhook.SENDING)
+        self.assertEqual(second.next_attempt_at, other_claim)
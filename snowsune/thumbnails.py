@@ -0,0 +1,293 @@
+"""
+Resized (and re-encoded) copies of uploaded images.
+
+List pages used to ship the full-size originals and let CSS scale them down.
+Now every ImageField upload gets a set of derivatives: one per width preset
+below, in AVIF / WebP (when this Pillow build can write them) plus a JPEG or
+PNG fallback. They're written in a background thread after upload, by the
+generate_thumbnails command for existing images, and lazily by the
+/thumbnail/ view for anything that slipped through.
+
+Derivatives live under MEDIA_ROOT/thumbs/ and, like the social previews, are
+keyed by the source path, its mtime, the width and the format, so replacing
+an image just means new files.
+
+Usage (template):
+    {% load image_tags %}
+    {% thumbnail post.featured_image "md" alt=post.title loading="lazy" %}
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.signals import post_save
+from django.urls import reverse
+from PIL import Image, ImageOps, features
+
+from .views.image_utils import THUMBNAIL_CACHE_DIR, resolve_media_path
+
+logger = logging.getLogger(__name__)
+
+# Name -> max width in px. A preset never upscales, small sources are capped
+# at their own width.
+THUMBNAIL_PRESETS = {
+    "xs": 160,
+    "sm": 320,
+    "md": 640,
+    "lg": 1280,
+}
+
+# Pillow format name, file extension, mime type, save() options
+_FORMATS = {
+    "avif": ("AVIF", "avif", "image/avif", {"quality": 60}),
+    "webp": ("WEBP", "webp", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", "image/jpeg", {"quality": 85, "optimize": True}),
+    "png": ("PNG", "png", "image/png", {"optimize": True}),
+}
+
+# Offered in <source> tags, best first; skipped if Pillow can't encode them
+MODERN_FORMATS = [fmt for fmt in ("avif", "webp") if features.check(fmt)]
+
+SOURCE_INFO_TTL = 60 * 60 * 24
+
+# One worker so a burst of uploads doesn't eat every core
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+
+# Model -> names of its ImageFields, filled in by connect_signals()
+_image_fields = {}
+
+
+def source_info(image_name):
+    """
+    Path, mtime and (orientation corrected) size of an uploaded image.
+
+    None if it doesn't exist, isn't an image, or is animated (resizing would
+    throw the animation away, so those are always served as-is).
+    """
+    full_path = resolve_media_path(image_name)
+    if not full_path:
+        return None
+    try:
+        mtime_ns = os.stat(full_path).st_mtime_ns
+    except OSError:
+        return None
+
+    cache_key = (
+        "thumbnails:info:"
+        + hashlib.sha256(f"{image_name}|{mtime_ns}".encode("utf-8")).hexdigest()
+    )
+    info = cache.get(cache_key)
+    if info is None:
+        try:
+            with Image.open(full_path) as img:
+                width, height = img.size
+                if img.getexif().get(0x0112) in (5, 6, 7, 8):
+                    width, height = height, width
+                info = {
+                    "width": width,
+                    "height": height,
+                    "alpha": img.mode in ("RGBA", "LA", "PA")
+                    or (img.mode == "P" and "transparency" in img.info),
+                    "animated": getattr(img, "is_animated", False),
+                }
+        except Exception as e:
+            logger.warning(f"Could not read image {image_name}: {e}")
+            info = {"width": 0, "height": 0, "alpha": False, "animated": True}
+        cache.set(cache_key, info, SOURCE_INFO_TTL)
+
+    if info["animated"] or not info["width"]:
+        return None
+    return dict(info, path=full_path, mtime_ns=mtime_ns)
+
+
+def fallback_format(info):
+    return "png" if info["alpha"] else "jpeg"
+
+
+def derivative_name(image_name, info, width, fmt):
+    """MEDIA_ROOT-relative name of a derivative (whether or not it exists)."""
+    digest = hashlib.sha256(
+        f"{image_name}|{info['mtime_ns']}|{width}|{fmt}".encode("utf-8")
+    ).hexdigest()
+    return f"{THUMBNAIL_CACHE_DIR}/{digest[:2]}/{digest}.{_FORMATS[fmt][1]}"
+
+
+def render_derivative(info, width, fmt, dest_path):
+    """Resize the source to ``width`` and write it to ``dest_path`` atomically."""
+    pil_format, _, _, save_options = _FORMATS[fmt]
+
+    with Image.open(info["path"]) as img:
+        img = ImageOps.exif_transpose(img)
+        if fmt == "jpeg" or not info["alpha"]:
+            if img.mode in ("RGBA", "LA", "P", "PA"):
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.split()[-1])
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+        elif img.mode != "RGBA":
+            img = img.convert("RGBA")
+
+        height = max(1, round(img.height * width / img.width))
+        if (width, height) != img.size:
+            img = img.resize((width, height), Image.Resampling.LANCZOS)
+
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                img.save(tmp_file, format=pil_format, **save_options)
+            os.replace(tmp_path, dest_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def get_or_create_derivative(image_name, preset, fmt, info=None):
+    """
+    Absolute path of the ``preset``/``fmt`` derivative, rendering it if needed.
+
+    None if the source can't be thumbnailed.
+    """
+    info = info or source_info(image_name)
+    if info is None:
+        return None
+    width = min(THUMBNAIL_PRESETS[preset], info["width"])
+    dest_path = os.path.join(
+        settings.MEDIA_ROOT, derivative_name(image_name, info, width, fmt)
+    )
+    if not os.path.exists(dest_path):
+        render_derivative(info, width, fmt, dest_path)
+    return dest_path
+
+
+def generate_derivatives(image_name):
+    """Render every missing preset/format for ``image_name``. Returns the count."""
+    info = source_info(image_name)
+    if info is None:
+        return 0
+
+    created = 0
+    for width in sorted({min(w, info["width"]) for w in THUMBNAIL_PRESETS.values()}):
+        for fmt in MODERN_FORMATS + [fallback_format(info)]:
+            dest_path = os.path.join(
+                settings.MEDIA_ROOT, derivative_name(image_name, info, width, fmt)
+            )
+            if not os.path.exists(dest_path):
+                render_derivative(info, width, fmt, dest_path)
+                created += 1
+    return created
+
+
+def _derivative_url(image_name, info, width, preset, fmt):
+    """Direct media URL if the file exists yet, else the lazy /thumbnail/ view."""
+    name = derivative_name(image_name, info, width, fmt)
+    if os.path.exists(os.path.join(settings.MEDIA_ROOT, name)):
+        return settings.MEDIA_URL + name
+    return reverse("thumbnail", args=[preset, fmt, image_name])
+
+
+def picture_sources(image_name, preset):
+    """
+    What the {% thumbnail %} tag needs to build a <picture>, or None if the
+    image can't be thumbnailed:
+
+        {"sources": [(mime, srcset), ...], "src": url, "srcset": srcset}
+    """
+    info = source_info(image_name)
+    if info is None:
+        return None
+
+    # Every preset up to the requested one, capped at the source width, each
+    # width mapped to the (smallest) preset that produces it
+    limit = THUMBNAIL_PRESETS[preset]
+    widths = {}
+    for name, max_width in sorted(THUMBNAIL_PRESETS.items(), key=lambda p: p[1]):
+        if max_width <= limit:
+            widths.setdefault(min(max_width, info["width"]), name)
+
+    def srcset(fmt):
+        return ", ".join(
+            f"{_derivative_url(image_name, info, w, name, fmt)} {w}w"
+            for w, name in sorted(widths.items())
+        )
+
+    fallback = fallback_format(info)
+    width = min(THUMBNAIL_PRESETS[preset], info["width"])
+    return {
+        "sources": [(_FORMATS[fmt][2], srcset(fmt)) for fmt in MODERN_FORMATS],
+        "src": _derivative_url(image_name, info, width, preset, fallback),
+        "srcset": srcset(fallback),
+        "width": width,
+    }
+
+
+def mime_type(fmt):
+    return _FORMATS[fmt][2]
+
+
+def is_servable_format(fmt):
+    return fmt in MODERN_FORMATS or fmt in ("jpeg", "png")
+
+
+def _generate_quietly(image_name):
+    try:
+        created = generate_derivatives(image_name)
+        if created:
+            logger.info(f"Generated {created} thumbnail(s) for {image_name}")
+    except Exception as e:
+        logger.error(f"Error generating thumbnails for {image_name}: {e}")
+
+
+def _image_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    for field_name in _image_fields.get(sender, ()):
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        image_name = getattr(instance, field_name).name
+        if image_name:
+            transaction.on_commit(
+                lambda name=image_name: _executor.submit(_generate_quietly, name)
+            )
+
+
+def connect_signals():
+    """Generate derivatives after any model with an ImageField is saved."""
+    for model in apps.get_models():
+        fields = [
+            f.name for f in model._meta.get_fields() if isinstance(f, models.ImageField)
+        ]
+        if fields:
+            _image_fields[model] = fields
+            post_save.connect(
+                _image_saved, sender=model, dispatch_uid=f"thumbnails:{model._meta}"
+            )
+
+
+def iter_image_names():
+    """Every distinct image name stored in any ImageField."""
+    seen = set()
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if not isinstance(field, models.ImageField):
+                continue
+            names = (
+                model._default_manager.exclude(**{f"{field.name}__isnull": True})
+                .exclude(**{field.name: ""})
+                .values_list(field.name, flat=True)
+                .iterator()
+            )
+            for name in names:
+                if name not in seen:
+                    seen.add(name)
+                    yield name
@@ -11,10 +11,13 @@ from snowsune.views.projects import ProjectsView
 from snowsune.views.tools import ToolsView
 from snowsune.views.live_status import live_status_view
 from snowsune.views.image_utils import format_preview_view
+from snowsune.views.thumbnails import thumbnail_view
 from snowsune.views.randal_fanclub import RandalFanclubView
 from snowsune.views.calendar import CalendarView, CalendarEventsAPIView
 from snowsune.views.health import health_check
+from snowsune.views.search import SearchAPIView, SearchView
 from snowsune.views.redirects import discord_redirect
+from snowsune.views.sitemap import sitemap_index_view, sitemap_section_view
 from apps.thank_yous.views import thank_you_view
 
 
@@ -32,6 +35,7 @@ urlpatterns = [
     path("tos/", TemplateView.as_view(template_name="tos.html"), name="tos"),
     path("login/", HomeView.as_view(), name="login"),
     path("logout/", auth_views.LogoutView.as_view(), name="logout"),
+    path("search/", SearchView.as_view(), name="search"),
     # API endpoints
     path("api/live/", live_status_view, name="live_status_api"),
     path(
@@ -39,12 +43,19 @@ urlpatterns = [
         CalendarEventsAPIView.as_view(),
         name="calendar_events_api",
     ),
+    path("api/search/", SearchAPIView.as_view(), name="search_api"),
     path("api/quotes/", include("apps.quotes.api_urls")),
     path("api/commorganizer/", include("apps.commorganizer.api_urls")),
     # Image formatting for social media previews
     path(
         "format_preview/<path:image_path>", format_preview_view, name="format_preview"
     ),
+    # Resized copies of uploads, see snowsune/thumbnails.py
+    path(
+        "thumbnail/<slug:preset>/<slug:fmt>/<path:image_path>",
+        thumbnail_view,
+        name="thumbnail",
+    ),
     # "app" urls
     path("blog/", include("apps.blog.urls")),
     path("comics/", include("apps.comics.urls")),
@@ -59,12 +70,9 @@ urlpatterns = [
     # Hidden pages
     path("orfc/", RandalFanclubView.as_view(), name="randal_fanclub"),
     # SEO
+    path("sitemap.xml", sitemap_index_view, name="sitemap"),
     path(
-        "sitemap.xml",
-        lambda request: HttpResponse(
-            open("static/sitemap.xml").read(), content_type="application/xml"
-        ),
-        name="sitemap",
+        "sitemap-<slug:section>.xml", sitemap_section_view, name="sitemap_section"
     ),
     path(
         "robots.txt",
@@ -1,29 +1,36 @@
 from django.views import View
 from django.shortcuts import render
 from django.http import JsonResponse
-from django.views.decorators.cache import cache_page
-from django.utils.decorators import method_decorator
-import requests
-from icalendar import Calendar
-from datetime import datetime, date, timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.db.models import Q
+from datetime import datetime, time, timedelta
+import hashlib
+import logging
 import pytz
-import recurring_ical_events
-import json
 
-from snowsune.models import SiteSetting
+from snowsune.calendar_sync import (
+    expand_occurrences,
+    get_calendar_sources,
+    get_events_version,
+    stored_window,
+)
+from snowsune.models import CalendarEvent, CalendarSource
 
+logger = logging.getLogger(__name__)
 
-def get_calendar_sources():
-    """Get calendar sources from SiteSetting, with fallback to default"""
-    try:
-        setting = SiteSetting.objects.filter(key="CALENDAR_SOURCES").first()
-        if setting and setting.value:
-            return json.loads(setting.value)
-    except (json.JSONDecodeError, AttributeError):
-        pass
+# Window used when the client doesn't say (calendar.js always does)
+DEFAULT_PAST_DAYS = 31
+DEFAULT_FUTURE_DAYS = 62
+
+# Nobody needs more than a year in one request
+MAX_WINDOW_DAYS = 400
+# Dates outside these years are treated like unparseable ones; near the ends
+# of what datetime can hold the window arithmetic would overflow
+MIN_YEAR, MAX_YEAR = 1900, 9000
 
-    # Default
-    return []
+EVENTS_CACHE_TTL = 60 * 60
 
 
 class CalendarView(View):
@@ -39,94 +46,167 @@ class CalendarView(View):
         )
 
 
-@method_decorator(cache_page(60 * 15), name="dispatch")  # Cache for 15 minutes
-class CalendarEventsAPIView(View):
-    """API endpoint that fetches and parses ICS files, returns JSON events"""
-
-    def get(self, request, *args, **kwargs):
-        all_events = []
-        calendar_sources = get_calendar_sources()
-
-        for calendar_config in calendar_sources:
-            try:
-                # Fetch the ICS file
-                response = requests.get(
-                    calendar_config["url"],
-                    timeout=10,
-                    headers={"User-Agent": "Snowsune Calendar Fetcher"},
-                )
-                response.raise_for_status()
-
-                # Parse the ICS file
-                cal = Calendar.from_ical(response.content)
-
-                # For reoccuring events, have to look backwards and forwards in time
-                now = datetime.now(pytz.UTC)
-                start_date = now - timedelta(days=365)
-                end_date = now + timedelta(days=365)
-
-                # Use recurring_ical_events to expand recurring events
-                recurring_events = recurring_ical_events.of(cal).between(
-                    start_date.date(), end_date.date()
-                )
-
-                # Process each event occurrence (including expanded recurring events)
-                for component in recurring_events:
-                    event = {
-                        "title": str(component.get("summary", "No Title")),
-                        "start": self._parse_datetime(component.get("dtstart")),
-                        "end": self._parse_datetime(component.get("dtend")),
-                        "description": str(component.get("description", "")),
-                        "location": str(component.get("location", "")),
-                        "url": str(component.get("url", "")),
-                        "calendar": calendar_config["name"],
-                        "color": calendar_config.get("color", "#3788d8"),
-                    }
-
-                    # Handle all-day events and serialize datetimes
-                    if isinstance(event["start"], str):
-                        # All-day event (date only)
-                        event["allDay"] = True
-                    else:
-                        event["allDay"] = False
-                        # Ensure timezone-aware datetime and convert to ISO string
-                        if event["start"]:
-                            if not event["start"].tzinfo:
-                                event["start"] = pytz.UTC.localize(event["start"])
-                            event["start"] = event["start"].isoformat()
-                        if event["end"]:
-                            if not event["end"].tzinfo:
-                                event["end"] = pytz.UTC.localize(event["end"])
-                            event["end"] = event["end"].isoformat()
-
-                    all_events.append(event)
-
-            except Exception as e:
-                # Log error but continue with other calendars
-                import logging
-
-                logger = logging.getLogger(__name__)
-                logger.error(f"Error fetching calendar {calendar_config['name']}: {e}")
+def _parse_range_param(value):
+    """Parse a start/end query param (ISO date or datetime) to an aware datetime."""
+    if not value:
+        return None
+    try:
+        # A literal "+" in the offset arrives as a space unless it was encoded
+        parsed = parse_datetime(value.replace(" ", "+"))
+        if parsed is None:
+            parsed_date = parse_date(value[:10])
+            if parsed_date is None:
+                return None
+            parsed = datetime.combine(parsed_date, datetime.min.time())
+    except ValueError:
+        return None
+    if not MIN_YEAR <= parsed.year <= MAX_YEAR:
+        return None
+    if not parsed.tzinfo:
+        parsed = pytz.UTC.localize(parsed)
+    return parsed
+
+
+def _day_floor(dt):
+    day = dt.astimezone(pytz.UTC).date()
+    return pytz.UTC.localize(datetime.combine(day, time.min))
+
+
+def normalize_window(start, end):
+    """
+    Snap a requested window out to whole UTC days (and clamp its size) so
+    different views of the same days share one cache entry.
+    """
+    now = timezone.now()
+    start = start or now - timedelta(days=DEFAULT_PAST_DAYS)
+    end = end or now + timedelta(days=DEFAULT_FUTURE_DAYS)
+
+    start = _day_floor(start)
+    end = _day_floor(end - timedelta(microseconds=1)) + timedelta(days=1)
+    if end <= start:
+        end = start + timedelta(days=1)
+    if end - start > timedelta(days=MAX_WINDOW_DAYS):
+        end = start + timedelta(days=MAX_WINDOW_DAYS)
+    return start, end
+
+
+def serialize_occurrence(occurrence, source):
+    """Occurrence dict (or CalendarEvent) -> the JSON shape calendar.js expects."""
+    get = (
+        occurrence.get
+        if isinstance(occurrence, dict)
+        else lambda field: getattr(occurrence, field)
+    )
+    event_start, event_end, all_day = get("start"), get("end"), get("all_day")
+
+    if all_day:
+        start = event_start.date().isoformat()
+        end = event_end.date().isoformat() if event_end else None
+    else:
+        start = event_start.isoformat()
+        end = event_end.isoformat() if event_end else None
+
+    return {
+        "title": get("title"),
+        "start": start,
+        "end": end,
+        "description": get("description"),
+        "location": get("location"),
+        "url": get("url"),
+        "calendar": source.name,
+        "color": source.color,
+        "allDay": all_day,
+    }
+
+
+def get_events_for_window(start, end, calendar=None):
+    """
+    Events overlapping [start, end), optionally for one calendar by name.
+
+    Sources whose stored occurrences cover the window are answered with one
+    indexed range query; anything else is expanded from the stored ICS for
+    just this window. Results are cached per (window, calendar) until the
+    next sync changes something. Unknown calendar names aren't cached.
+    """
+    # The name comes from the query string: hashed, it's always a short and
+    # valid cache key
+    cache_key = "calendar_events:{}:{}:{}:{}".format(
+        get_events_version(),
+        start.strftime("%Y%m%d"),
+        end.strftime("%Y%m%d"),
+        hashlib.md5(calendar.encode()).hexdigest() if calendar else "*",
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    sources = CalendarSource.objects.defer("ics_data")
+    if calendar:
+        sources = list(sources.filter(name=calendar))
+        if not sources:
+            return []
+
+    results = []
+    stored_sources = {}
+    for source in sources:
+        window = stored_window(source)
+        if window and window[0] <= start and end <= window[1]:
+            stored_sources[source.pk] = source
+            continue
+
+        # Outside what sync stored: expand only the requested window
+        try:
+            ics_data = CalendarSource.objects.values_list("ics_data", flat=True).get(
+                pk=source.pk
+            )
+            if not ics_data:
                 continue
+            for occurrence in expand_occurrences(ics_data, start, end):
+                results.append(
+                    (occurrence["start"], serialize_occurrence(occurrence, source))
+                )
+        except Exception as e:
+            logger.error(f"Error expanding calendar {source.name}: {e}")
+
+    if stored_sources:
+        events = (
+            CalendarEvent.objects.filter(
+                source_id__in=stored_sources.keys(), start__lt=end
+            )
+            .filter(Q(end__gt=start) | Q(end__isnull=True, start__gte=start))
+            .order_by("start")
+        )
+        for event in events:
+            source = stored_sources[event.source_id]
+            results.append((event.start, serialize_occurrence(event, source)))
 
-        # Sort events by start time (all strings now, so simple string sort works)
-        all_events.sort(key=lambda x: x["start"] or "")
+    results.sort(key=lambda pair: pair[0])
+    payload = [event for _, event in results]
+    cache.set(cache_key, payload, EVENTS_CACHE_TTL)
+    return payload
 
-        return JsonResponse(all_events, safe=False)
 
-    def _parse_datetime(self, dt_value):
-        """Parse iCalendar datetime/date value to Python datetime or date string"""
-        if dt_value is None:
-            return None
+class CalendarEventsAPIView(View):
+    """
+    API endpoint serving calendar occurrences as JSON.
 
-        # Get the underlying datetime/date value
-        dt = dt_value.dt if hasattr(dt_value, "dt") else dt_value
+    Reads what ``manage.py sync_calendars`` stored; nothing is fetched here.
+    Query params:
+        start, end: ISO dates/datetimes for the visible window (FullCalendar
+                    sends these), defaulting to roughly a month back and two
+                    forward
+        calendar:   only events from the calendar with this name
+    """
 
-        # Handle date-only (all-day events)
-        if isinstance(dt, date) and not isinstance(dt, datetime):
-            # Return ISO format string for all-day events
-            return dt.isoformat()
-        elif isinstance(dt, datetime):
-            return dt
+    def get(self, request, *args, **kwargs):
+        start, end = normalize_window(
+            _parse_range_param(request.GET.get("start")),
+            _parse_range_param(request.GET.get("end")),
+        )
+        events = get_events_for_window(
+            start, end, calendar=request.GET.get("calendar") or None
+        )
 
-        return None
+        response = JsonResponse(events, safe=False)
+        response["Cache-Control"] = "public, max-age=300"
+        return response
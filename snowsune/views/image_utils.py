@@ -1,8 +1,90 @@
 from PIL import Image
-from io import BytesIO
-from django.http import HttpResponse, Http404
+from django.http import FileResponse, Http404
 from django.conf import settings
+import hashlib
 import os
+import tempfile
+
+from ..conditional import conditional_file
+
+# Rendered previews live under MEDIA_ROOT/<this>/ and are keyed by the source
+# path, its mtime and the ratio, so an edited image just gets a new file.
+PREVIEW_CACHE_DIR = "previews"
+# Resized copies made by snowsune/thumbnails.py
+THUMBNAIL_CACHE_DIR = "thumbs"
+PREVIEW_JPEG_QUALITY = 85
+PREVIEW_RATIO = 1.91
+PREVIEW_MAX_AGE = 60 * 60 * 24
+
+
+def resolve_media_path(image_path):
+    """
+    Absolute path of ``image_path`` inside MEDIA_ROOT, or None if it would
+    escape MEDIA_ROOT (``../`` tricks) or points inside one of our generated
+    image caches.
+    """
+    media_root = os.path.realpath(settings.MEDIA_ROOT)
+    full_path = os.path.realpath(os.path.join(media_root, image_path.lstrip("/")))
+    if os.path.commonpath([media_root, full_path]) != media_root:
+        return None
+    for cache_dir in (PREVIEW_CACHE_DIR, THUMBNAIL_CACHE_DIR):
+        cache_root = os.path.join(media_root, cache_dir)
+        if os.path.commonpath([cache_root, full_path]) == cache_root:
+            return None
+    return full_path
+
+
+def get_preview_cache_path(image_path, target_ratio=1.91):
+    """
+    Where the rendered preview for ``image_path`` lives (whether or not it has
+    been generated yet). None if the source image doesn't exist.
+    """
+    full_path = resolve_media_path(image_path)
+    if not full_path or not os.path.isfile(full_path):
+        return None
+
+    mtime_ns = os.stat(full_path).st_mtime_ns
+    digest = hashlib.sha256(
+        f"{image_path.lstrip('/')}|{mtime_ns}|{target_ratio}".encode("utf-8")
+    ).hexdigest()
+    return os.path.join(
+        settings.MEDIA_ROOT, PREVIEW_CACHE_DIR, digest[:2], f"{digest}.jpg"
+    )
+
+
+def get_or_create_social_preview(image_path, target_ratio=1.91):
+    """
+    Return the on-disk path of the rendered preview, rendering it first if
+    this (path, mtime, ratio) combination hasn't been seen before.
+
+    Returns None if the source is missing or can't be processed.
+    """
+    cache_path = get_preview_cache_path(image_path, target_ratio)
+    if cache_path is None:
+        return None
+    if os.path.exists(cache_path):
+        return cache_path
+
+    preview_img = create_social_preview_image(image_path, target_ratio)
+    if not preview_img:
+        return None
+
+    # Write to a temp file and rename so a concurrent request never serves
+    # a half-written JPEG
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            preview_img.save(
+                tmp_file, format="JPEG", quality=PREVIEW_JPEG_QUALITY, optimize=True
+            )
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return cache_path
 
 
 def create_social_preview_image(image_path, target_ratio=1.91):
@@ -18,9 +100,9 @@ def create_social_preview_image(image_path, target_ratio=1.91):
     """
     try:
         # Build full path to the image
-        full_path = os.path.join(settings.MEDIA_ROOT, image_path.lstrip("/"))
+        full_path = resolve_media_path(image_path)
 
-        if not os.path.exists(full_path):
+        if not full_path or not os.path.exists(full_path):
             return None
 
         # Open the image
@@ -88,43 +170,40 @@ def get_social_preview_url(original_url, target_ratio=1.91):
     return f"/format_preview/{path}"
 
 
+def _preview_sources(request, image_path):
+    return [resolve_media_path(image_path)]
+
+
+@conditional_file(
+    _preview_sources,
+    variant=f"preview|{PREVIEW_RATIO}|{PREVIEW_JPEG_QUALITY}",
+    max_age=PREVIEW_MAX_AGE,
+)
 def format_preview_view(request, image_path):
     """
     Serve a formatted preview image with the correct aspect ratio for social media.
 
     URL pattern: /format_preview/blog/featured/image.jpg
-    """
-    try:
-        # Build the full path to the original image
-        original_path = os.path.join(settings.MEDIA_ROOT, image_path)
-
-        if not os.path.exists(original_path):
-            raise Http404(f"Image not found: {image_path}, searched {original_path}")
 
-        # Create the social preview image
-        preview_img = create_social_preview_image(image_path)
-
-        if not preview_img:
-            raise Http404("Could not process image")
-
-        # Convert to bytes
-        buffer = BytesIO()
-        preview_img.save(buffer, format="JPEG", quality=85, optimize=True)
-        buffer.seek(0)
-
-        # Create response with improved caching
-        response = HttpResponse(buffer.getvalue(), content_type="image/jpeg")
-
-        # Caching for preview images (1 day)
-        response["Cache-Control"] = "public, max-age=86400, immutable"
-        response["Expires"] = "Thu, 31 Dec 2037 23:55:55 GMT"
-        response["ETag"] = f'"{hash(image_path)}"'
-
-        return response
+    The first request renders the preview into MEDIA_ROOT/previews/, every
+    request after that just streams the file (see warm_social_previews to
+    render them ahead of time). ETag / Last-Modified come from the source
+    image, so a revalidating client gets a 304 without touching Pillow.
+    """
+    original_path = resolve_media_path(image_path)
+    if not original_path or not os.path.exists(original_path):
+        raise Http404(f"Image not found: {image_path}")
 
+    try:
+        cache_path = get_or_create_social_preview(image_path, PREVIEW_RATIO)
     except Exception as e:
         print(f"Error serving format_preview for {image_path}: {e}")
         import traceback
 
         traceback.print_exc()
         raise Http404(f"Image processing error: {str(e)}")
+
+    if not cache_path:
+        raise Http404("Could not process image")
+
+    return FileResponse(open(cache_path, "rb"), content_type="image/jpeg")
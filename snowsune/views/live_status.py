@@ -1,46 +1,51 @@
 import logging
+import threading
+import time
 from datetime import timedelta
 
-import requests
 from django.core.cache import cache
+from django.db import connections
 from django.http import JsonResponse
 from django.utils import timezone
-from django.views.decorators.cache import cache_page
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
-from snowsune.models import SiteSetting
+from snowsune import http_client
+from snowsune.site_settings import get_setting
 
 logger = logging.getLogger(__name__)
 
+# One shared payload for every visitor (nothing in it is per-user)
+LIVE_PAYLOAD_CACHE_KEY = "live_status_payload"
+LIVE_PAYLOAD_LOCK_KEY = "live_status_payload_lock"
+LIVE_PAYLOAD_FRESH_SECONDS = 30  # Serve as-is
+LIVE_PAYLOAD_STALE_SECONDS = 300  # Serve while a background refresh runs
+LIVE_PAYLOAD_LOCK_SECONDS = 15  # Longer than the slowest (HA) call
+LIVE_PAYLOAD_WAIT_SECONDS = 2  # How long a cold miss waits on another worker
+
 
 def get_ko_fi_progress():
-    ko_fi_setting = SiteSetting.objects.filter(key="KO_FI_PROGRESS").first()
-    if ko_fi_setting:
+    ko_fi_progress = get_setting("KO_FI_PROGRESS")
+    if ko_fi_progress is not None:
         try:
-            return f"{float(ko_fi_setting.value):.1f}"
+            return f"{float(ko_fi_progress):.1f}"
         except (ValueError, TypeError):
             return "?"
     return "?"
 
 
 def get_active_logged_in_session_count():
-    """Count non-expired Django sessions that have a logged-in user (_auth_user_id)."""
-    from django.contrib.sessions.models import Session
+    """Count non-expired sessions with a logged-in user (see apps.users.presence)."""
+    from apps.users.presence import active_session_count
 
-    now = timezone.now()
-    count = 0
-    for session in Session.objects.filter(expire_date__gt=now).iterator(chunk_size=500):
-        if session.get_decoded().get("_auth_user_id"):
-            count += 1
-    return count
+    return active_session_count()
 
 
 def get_server_offset():
     """Home Assistant server offset percentage if configured, else None."""
-    ha_url_setting = SiteSetting.objects.filter(key="HOME_ASSISTANT_URL").first()
-    ha_token_setting = SiteSetting.objects.filter(key="HOME_ASSISTANT_TOKEN").first()
-    if not (ha_url_setting and ha_token_setting):
+    ha_url = get_setting("HOME_ASSISTANT_URL")
+    ha_token = get_setting("HOME_ASSISTANT_TOKEN")
+    if ha_url is None or ha_token is None:
         return None
 
     cache_key = "live_status_server_offset"
@@ -49,9 +54,9 @@ def get_server_offset():
         return cached
 
     try:
-        resp = requests.get(
-            f"{ha_url_setting.value}/api/states/sensor.server_offset_percentage",
-            headers={"Authorization": f"Bearer {ha_token_setting.value}", "Content-Type": "application/json"},
+        resp = http_client.get(
+            f"{ha_url}/api/states/sensor.server_offset_percentage",
+            headers={"Authorization": f"Bearer {ha_token}", "Content-Type": "application/json"},
             timeout=5,
         )
         value = resp.json().get("state", "Unknown") if resp.status_code == 200 else "Error"
@@ -63,24 +68,78 @@ def get_server_offset():
     return value
 
 
+def build_live_payload():
+    """Do the actual (slow-ish) work behind /api/live/."""
+    return {
+        "active_users": get_active_logged_in_session_count(),
+        "server_offset": get_server_offset(),
+        "ko_fi_progress": get_ko_fi_progress(),
+        "timestamp": timezone.now().isoformat(),
+    }
+
+
+def _refresh_live_payload():
+    """Recompute and store the payload. Caller must hold the lock."""
+    try:
+        payload = build_live_payload()
+        cache.set(
+            LIVE_PAYLOAD_CACHE_KEY,
+            {"payload": payload, "generated_at": time.time()},
+            LIVE_PAYLOAD_STALE_SECONDS,
+        )
+        return payload
+    finally:
+        cache.delete(LIVE_PAYLOAD_LOCK_KEY)
+
+
+def _refresh_in_background():
+    try:
+        _refresh_live_payload()
+    except Exception as e:
+        logger.warning("Background live status refresh failed: %s", e)
+    finally:
+        # Threads get their own DB connections, don't leak them
+        connections.close_all()
+
+
+def get_live_payload():
+    """
+    Shared, cookie-independent cache for the live payload.
+
+    - fresh entry: returned straight from the cache
+    - stale entry: returned immediately, one worker refreshes it in a thread
+    - no entry: one worker recomputes (single-flight via cache.add), the
+      others wait briefly for its result instead of stampeding
+    """
+    entry = cache.get(LIVE_PAYLOAD_CACHE_KEY)
+    if entry is not None:
+        age = time.time() - entry["generated_at"]
+        if age >= LIVE_PAYLOAD_FRESH_SECONDS and cache.add(
+            LIVE_PAYLOAD_LOCK_KEY, 1, LIVE_PAYLOAD_LOCK_SECONDS
+        ):
+            threading.Thread(target=_refresh_in_background, daemon=True).start()
+        return entry["payload"]
+
+    if cache.add(LIVE_PAYLOAD_LOCK_KEY, 1, LIVE_PAYLOAD_LOCK_SECONDS):
+        return _refresh_live_payload()
+
+    # Someone else is already computing it, give them a moment
+    deadline = time.monotonic() + LIVE_PAYLOAD_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        entry = cache.get(LIVE_PAYLOAD_CACHE_KEY)
+        if entry is not None:
+            return entry["payload"]
+
+    return build_live_payload()
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
-@cache_page(30)
 def live_status_view(request):
-    active_users = get_active_logged_in_session_count()
-    server_offset = get_server_offset()
-    ko_fi_progress = get_ko_fi_progress()
-
-    response = JsonResponse(
-        {
-            "active_users": active_users,
-            "server_offset": server_offset,
-            "ko_fi_progress": ko_fi_progress,
-            "timestamp": timezone.now().isoformat(),
-        }
-    )
-    response["Cache-Control"] = "public, max-age=30"
-    response["Vary"] = "Cookie"
-    response["Expires"] = (timezone.now() + timedelta(seconds=30)).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    response = JsonResponse(get_live_payload())
+    response["Cache-Control"] = f"public, max-age={LIVE_PAYLOAD_FRESH_SECONDS}"
+    response["Expires"] = (
+        timezone.now() + timedelta(seconds=LIVE_PAYLOAD_FRESH_SECONDS)
+    ).strftime("%a, %d %b %Y %H:%M:%S GMT")
     return response
-
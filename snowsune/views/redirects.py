@@ -3,7 +3,7 @@ import os
 from django.http import HttpRequest, HttpResponseRedirect
 from django.views.decorators.http import require_http_methods
 
-from snowsune.models import SiteSetting
+from snowsune.site_settings import get_setting
 
 
 @require_http_methods(["GET", "HEAD"])
@@ -16,11 +16,7 @@ def discord_redirect(_request: HttpRequest, *_args, **_kwargs):
     target = ""
 
     try:
-        value = (
-            SiteSetting.objects.filter(key="discord_invite")
-            .values_list("value", flat=True)
-            .first()
-        )
+        value = get_setting("discord_invite")
         if value:
             target = value.strip()
     except Exception:
@@ -0,0 +1,92 @@
+import math
+import time
+from urllib.parse import urlencode
+
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.views import View
+
+from snowsune import search
+
+PER_PAGE = 20
+MAX_PER_PAGE = 50
+MAX_QUERY_LENGTH = 200
+
+
+def _positive_int(value, default):
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return default
+
+
+def run_search(params):
+    """
+    Search for the q/kind/page/per_page query params and return one page:
+    {"query", "kinds", "page", "per_page", "num_pages", "total", "results",
+    "took_ms"}. ``kind`` may be repeated or comma separated.
+    """
+    started = time.perf_counter()
+    query = params.get("q", "").strip()[:MAX_QUERY_LENGTH]
+    kinds = [
+        kind
+        for value in params.getlist("kind")
+        for kind in value.split(",")
+        if kind in search.KINDS
+    ]
+    per_page = min(_positive_int(params.get("per_page"), PER_PAGE), MAX_PER_PAGE)
+
+    total = search.count(query, kinds) if query else 0
+    num_pages = max(math.ceil(total / per_page), 1)
+    page = min(_positive_int(params.get("page"), 1), num_pages)
+    results = (
+        search.search(query, kinds, limit=per_page, offset=(page - 1) * per_page)
+        if total
+        else []
+    )
+
+    return {
+        "query": query,
+        "kinds": kinds,
+        "page": page,
+        "per_page": per_page,
+        "num_pages": num_pages,
+        "total": total,
+        "results": results,
+        "took_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+class SearchView(View):
+    """Site-wide search page over everything snowsune.search indexes"""
+
+    def get(self, request, *args, **kwargs):
+        context = run_search(request.GET)
+        context["kind_choices"] = search.KIND_LABELS.items()
+        # For the pagination links
+        context["base_query"] = urlencode(
+            [("q", context["query"])] + [("kind", kind) for kind in context["kinds"]]
+        )
+        return render(request, "search.html", context)
+
+
+class SearchAPIView(View):
+    """
+    Site-wide search as JSON.
+
+    Query params:
+        q:        the search terms
+        kind:     blog, comic, page and/or character (repeat or comma
+                  separate, default: everything)
+        page:     1-based page number
+        per_page: results per page (max 50)
+    """
+
+    def get(self, request, *args, **kwargs):
+        payload = run_search(request.GET)
+        for hit in payload["results"]:
+            hit["snippet"] = str(hit["snippet"])
+
+        response = JsonResponse(payload)
+        response["Cache-Control"] = "public, max-age=60"
+        return response
@@ -0,0 +1,37 @@
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+
+from ..sitemaps import get_index, get_section
+
+SITEMAP_MAX_AGE = 60 * 60
+
+
+def _sitemap_response(request, entry):
+    response = get_conditional_response(
+        request, etag=entry["etag"], last_modified=entry["last_modified"]
+    )
+    if response is None:
+        response = HttpResponse(entry["xml"], content_type="application/xml")
+
+    response["ETag"] = entry["etag"]
+    if entry["last_modified"]:
+        response["Last-Modified"] = http_date(entry["last_modified"])
+    patch_cache_control(response, public=True, max_age=SITEMAP_MAX_AGE)
+    return response
+
+
+@require_GET
+def sitemap_index_view(request):
+    """The /sitemap.xml index, pointing at each section's sitemap."""
+    return _sitemap_response(request, get_index())
+
+
+@require_GET
+def sitemap_section_view(request, section):
+    """One section's sitemap, e.g. /sitemap-blog.xml."""
+    entry = get_section(section)
+    if entry is None:
+        raise Http404(f"No sitemap section {section}")
+    return _sitemap_response(request, entry)
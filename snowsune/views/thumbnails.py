@@ -0,0 +1,40 @@
+import logging
+
+from django.http import FileResponse, Http404
+
+from .. import thumbnails
+from ..conditional import conditional_file
+from .image_utils import resolve_media_path
+
+logger = logging.getLogger(__name__)
+
+
+def _thumbnail_sources(request, preset, fmt, image_path):
+    return [resolve_media_path(image_path)]
+
+
+@conditional_file(_thumbnail_sources, variant="thumbnail-v1", max_age=60 * 60 * 24)
+def thumbnail_view(request, preset, fmt, image_path):
+    """
+    Serve (rendering on first request) one derivative of an uploaded image.
+
+    URL pattern: /thumbnail/md/webp/blog/featured/image.jpg
+
+    The {% thumbnail %} tag only links here until the file exists, after
+    that it points straight at MEDIA_URL.
+    """
+    if preset not in thumbnails.THUMBNAIL_PRESETS:
+        raise Http404(f"Unknown thumbnail preset: {preset}")
+    if not thumbnails.is_servable_format(fmt):
+        raise Http404(f"Unsupported thumbnail format: {fmt}")
+
+    try:
+        path = thumbnails.get_or_create_derivative(image_path, preset, fmt)
+    except Exception as e:
+        logger.error(f"Error rendering thumbnail for {image_path}: {e}")
+        raise Http404("Could not process image")
+
+    if not path:
+        raise Http404(f"Image not found: {image_path}")
+
+    return FileResponse(open(path, "rb"), content_type=thumbnails.mime_type(fmt))
@@ -0,0 +1,321 @@
+"""
+Outbound webhook queue.
+
+Saving a blog post, a comment or a draft used to POST to Discord inside the
+request (5-10 s timeouts), so a slow Discord stalled a gunicorn worker and a
+failed post was just printed and forgotten. Now request code only inserts an
+OutboundWebhook row via enqueue(); the send_webhooks worker (cron, every
+minute) delivers them:
+
+- plain text jobs for the same webhook are merged into as few messages as
+  Discord's 2000 character limit allows
+- a job enqueued with a coalesce_key replaces older pending jobs with the
+  same key (only the latest "new book club leader" matters)
+- Discord's X-RateLimit-* / Retry-After headers are honoured per webhook
+- network errors and 5xx are retried with exponential backoff, other 4xx
+  (deleted webhook, bad payload) fail straight away
+
+Usage:
+    from snowsune.webhooks import enqueue
+
+    enqueue(webhook_url, "Hello from snowsune.net!")
+"""
+
+import json
+import logging
+import random
+from datetime import timedelta
+
+import requests
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import http_client
+from .models import OutboundWebhook
+
+logger = logging.getLogger(__name__)
+
+MAX_CONTENT_LENGTH = 2000  # Discord's limit for a message's content
+SEND_TIMEOUT = 10
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 30  # seconds, doubled every attempt
+BACKOFF_MAX = 60 * 60
+# A claimed job whose worker died is picked up again after this long. The
+# claim is renewed right before each send, so it only has to outlast one.
+CLAIM_TIMEOUT = timedelta(minutes=5)
+KEEP_FINISHED_FOR = timedelta(days=7)
+
+
+def enqueue(
+    url,
+    content=None,
+    payload=None,
+    attachment=None,
+    attachment_name="",
+    coalesce_key="",
+):
+    """
+    Queue a webhook post. Returns the OutboundWebhook, or None without a url.
+
+    ``attachment`` is the raw bytes of a file to upload with the message.
+    """
+    url = (url or "").strip()
+    if not url:
+        return None
+
+    payload = dict(payload or {})
+    if content is not None:
+        payload["content"] = content[:MAX_CONTENT_LENGTH]
+
+    with transaction.atomic():
+        if coalesce_key:
+            OutboundWebhook.objects.filter(
+                url=url, coalesce_key=coalesce_key, status=OutboundWebhook.PENDING
+            ).update(status=OutboundWebhook.SUPERSEDED)
+        return OutboundWebhook.objects.create(
+            url=url,
+            payload=payload,
+            attachment=attachment,
+            attachment_name=attachment_name if attachment else "",
+            coalesce_key=coalesce_key,
+        )
+
+
+def _is_plain(job):
+    return not job.attachment_name and set(job.payload) == {"content"}
+
+
+def batch_jobs(jobs):
+    """
+    Group jobs into [(url, payload, attachment, [jobs])] sends, merging
+    consecutive plain text jobs for the same url.
+    """
+    batches = []
+    open_batch = {}  # url -> index of the batch plain jobs can still join
+
+    for job in jobs:
+        if not _is_plain(job):
+            batches.append(
+                (job.url, job.payload, (job.attachment_name, job.attachment), [job])
+            )
+            open_batch.pop(job.url, None)
+            continue
+
+        content = job.payload["content"]
+        index = open_batch.get(job.url)
+        if index is not None:
+            url, payload, attachment, members = batches[index]
+            merged = f"{payload['content']}\n\n{content}"
+            if len(merged) <= MAX_CONTENT_LENGTH:
+                batches[index] = (url, {"content": merged}, None, members + [job])
+                continue
+
+        open_batch[job.url] = len(batches)
+        batches.append((job.url, {"content": content}, None, [job]))
+
+    return batches
+
+
+def rate_limit_delay(response):
+    """Seconds Discord wants us to wait before posting to this webhook again."""
+    if response.status_code == 429:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is None:
+            try:
+                retry_after = response.json().get("retry_after")
+            except ValueError:
+                retry_after = None
+        try:
+            return max(float(retry_after), 1.0)
+        except (TypeError, ValueError):
+            return 5.0
+
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            return float(response.headers.get("X-RateLimit-Reset-After", 0))
+        except ValueError:
+            return 1.0
+    return 0.0
+
+
+def backoff(attempts):
+    """Delay before retry number ``attempts`` (1-based), with some jitter."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _post(url, payload, attachment):
+    if attachment:
+        name, data = attachment
+        return http_client.post(
+            url,
+            data={"payload_json": json.dumps(payload)},
+            files={"file": (name, bytes(data))},
+            timeout=SEND_TIMEOUT,
+        )
+    return http_client.post(url, json=payload, timeout=SEND_TIMEOUT)
+
+
+def _claim_due(now):
+    """Mark up to BATCH_SIZE due jobs as ours and return them, oldest first."""
+    due = (
+        OutboundWebhook.objects.filter(
+            Q(status=OutboundWebhook.PENDING)
+            | Q(status=OutboundWebhook.SENDING),  # claim expired
+            next_attempt_at__lte=now,
+        )
+        .order_by("created_at")
+        .values_list("pk", flat=True)[:BATCH_SIZE]
+    )
+    ids = list(due)
+    if not ids:
+        return []
+
+    # The claim deadline doubles as our claim token: a concurrent worker
+    # can't have written the same microsecond.
+    deadline = now + CLAIM_TIMEOUT
+    OutboundWebhook.objects.filter(
+        Q(status=OutboundWebhook.PENDING) | Q(status=OutboundWebhook.SENDING),
+        pk__in=ids,
+        next_attempt_at__lte=now,
+    ).update(status=OutboundWebhook.SENDING, next_attempt_at=deadline)
+    return list(
+        OutboundWebhook.objects.filter(
+            pk__in=ids, status=OutboundWebhook.SENDING, next_attempt_at=deadline
+        ).order_by("created_at")
+    )
+
+
+def _renew_claim(jobs):
+    """
+    Push our claim on ``jobs`` out by CLAIM_TIMEOUT just before sending them.
+    Returns False if another worker took any of them over in the meantime;
+    the ones still ours are handed back so they go out with a fresh claim.
+    """
+    token = jobs[0].next_attempt_at
+    deadline = timezone.now() + CLAIM_TIMEOUT
+    ids = [job.pk for job in jobs]
+    renewed = OutboundWebhook.objects.filter(
+        pk__in=ids, status=OutboundWebhook.SENDING, next_attempt_at=token
+    ).update(next_attempt_at=deadline)
+    if renewed == len(jobs):
+        for job in jobs:
+            job.next_attempt_at = deadline
+        return True
+
+    if renewed:
+        OutboundWebhook.objects.filter(
+            pk__in=ids, status=OutboundWebhook.SENDING, next_attempt_at=deadline
+        ).update(status=OutboundWebhook.PENDING, next_attempt_at=timezone.now())
+    return False
+
+
+def _finish(jobs, **fields):
+    OutboundWebhook.objects.filter(pk__in=[job.pk for job in jobs]).update(**fields)
+
+
+def process_due(rate_limits=None, now=None):
+    """
+    Deliver every due job once. ``rate_limits`` (url -> datetime) carries
+    Discord's per-webhook limits between calls in the same worker.
+
+    Returns a dict of counts: sent, retried, failed, deferred.
+    """
+    rate_limits = {} if rate_limits is None else rate_limits
+    now = now or timezone.now()
+    counts = {"sent": 0, "retried": 0, "failed": 0, "deferred": 0}
+
+    for url, payload, attachment, jobs in batch_jobs(_claim_due(now)):
+        allowed_at = rate_limits.get(url)
+        if allowed_at and allowed_at > timezone.now():
+            _finish(jobs, status=OutboundWebhook.PENDING, next_attempt_at=allowed_at)
+            counts["deferred"] += len(jobs)
+            continue
+
+        if not _renew_claim(jobs):
+            continue
+
+        try:
+            response = _post(url, payload, attachment)
+        except requests.RequestException as e:
+            response, error = None, str(e)
+
+        if response is not None:
+            delay = rate_limit_delay(response)
+            if delay:
+                rate_limits[url] = timezone.now() + timedelta(seconds=delay)
+
+            if response.ok:
+                _finish(
+                    jobs,
+                    status=OutboundWebhook.SENT,
+                    sent_at=timezone.now(),
+                    last_status_code=response.status_code,
+                    last_error="",
+                )
+                counts["sent"] += len(jobs)
+                continue
+
+            if response.status_code == 429:
+                # Not the job's fault, doesn't count as an attempt
+                _finish(
+                    jobs,
+                    status=OutboundWebhook.PENDING,
+                    next_attempt_at=rate_limits[url],
+                    last_status_code=429,
+                    last_error="Rate limited",
+                )
+                counts["deferred"] += len(jobs)
+                continue
+
+            error = f"HTTP {response.status_code}: {response.text[:500]}"
+            if response.status_code < 500:
+                ids = ", ".join(f"#{job.pk}" for job in jobs)
+                logger.error(f"Webhook {ids} rejected: {error}")
+                _finish(
+                    jobs,
+                    status=OutboundWebhook.FAILED,
+                    last_status_code=response.status_code,
+                    last_error=error,
+                )
+                counts["failed"] += len(jobs)
+                continue
+
+        # Network error or 5xx: back off and try again later
+        for job in jobs:
+            job.attempts += 1
+            job.last_status_code = (
+                response.status_code if response is not None else None
+            )
+            job.last_error = error
+            if job.attempts >= MAX_ATTEMPTS:
+                logger.error(f"Giving up on webhook #{job.pk}: {error}")
+                job.status = OutboundWebhook.FAILED
+                counts["failed"] += 1
+            else:
+                job.status = OutboundWebhook.PENDING
+                job.next_attempt_at = timezone.now() + backoff(job.attempts)
+                counts["retried"] += 1
+            job.save(
+                update_fields=[
+                    "attempts",
+                    "last_status_code",
+                    "last_error",
+                    "status",
+                    "next_attempt_at",
+                ]
+            )
+
+    return counts
+
+
+def purge_finished(now=None):
+    """Delete sent/superseded jobs older than KEEP_FINISHED_FOR."""
+    cutoff = (now or timezone.now()) - KEEP_FINISHED_FOR
+    deleted, _ = OutboundWebhook.objects.filter(
+        status__in=[OutboundWebhook.SENT, OutboundWebhook.SUPERSEDED],
+        created_at__lt=cutoff,
+    ).delete()
+    return deleted
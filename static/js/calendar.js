@@ -30,8 +30,12 @@ function transformEvents(data, filterFn) {
 
 function createEventsFunction(filterFn) {
     return function (fetchInfo, successCallback, failureCallback) {
-        // Fetch events from our API endpoint
-        fetch(window.calendarEventsApiUrl || '/api/calendar/events/')
+        // Fetch only the visible window from our API endpoint
+        const params = new URLSearchParams({
+            start: fetchInfo.startStr,
+            end: fetchInfo.endStr,
+        });
+        fetch((window.calendarEventsApiUrl || '/api/calendar/events/') + '?' + params.toString())
             .then(response => response.json())
             .then(data => {
                 // Apply filter if provided